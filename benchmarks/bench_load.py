@@ -0,0 +1,150 @@
+# benchmarks/bench_load.py
+"""
+Benchmark de charge de bout en bout : Gateway réelle face au 1min.ai factice local.
+
+Scénarios (chacun mesuré séparément, sous charge constante) :
+- chat   : POST /v1/chat/completions
+- stream : POST /v1/chat/completions avec stream=true (TTFB = premier chunk SSE)
+- image  : message avec image en data URI (upload /api/assets sur le mock)
+- models : GET /v1/models
+
+Rapporte req/s, latence et TTFB p50/p95/p99 (ms) et erreurs : une base de
+performance reproductible, à comparer avant/après une modification.
+
+Usage:
+    python benchmarks/bench_load.py [--scenarios chat,stream,image,models] [--duration 10]
+        [--clients 32] [--workers 1] [--latency 0.05] [--error-rate 0.0]
+        [--chunks 20] [--chunk-interval 0.0]
+    python benchmarks/bench_load.py --gateway-url http://127.0.0.1:5001 --scenarios models
+        (Gateway déjà lancée : seul le générateur de charge tourne)
+"""
+
+import argparse
+import base64
+import json
+import os
+import sys
+from urllib.parse import urlparse
+
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+from loadgen import run_load  # noqa: E402
+from local_stack import start_gateway, start_mock, stop  # noqa: E402
+from mock_1min import add_mock_arguments  # noqa: E402
+
+CHAT_MESSAGES = [{"role": "user", "content": "Donne trois idées de nom pour un chat roux."}]
+
+
+def image_data_uri(size_kb):
+    """Image PNG synthétique (en-tête PNG + octets pseudo-aléatoires) en data URI."""
+    raw = b"\x89PNG\r\n\x1a\n" + os.urandom(max(0, size_kb * 1024 - 8))
+    return "data:image/png;base64," + base64.b64encode(raw).decode("ascii")
+
+
+def build_scenarios(image_kb):
+    """(chemin, payload) par scénario ; payload None = requête GET."""
+    image_message = {
+        "role": "user",
+        "content": [
+            {"type": "text", "text": "Décris cette image."},
+            {"type": "image_url", "image_url": {"url": image_data_uri(image_kb)}},
+        ],
+    }
+    return {
+        "chat": ("/v1/chat/completions", {"model": "gpt-4o-mini", "messages": CHAT_MESSAGES}),
+        "stream": (
+            "/v1/chat/completions",
+            {"model": "gpt-4o-mini", "messages": CHAT_MESSAGES, "stream": True},
+        ),
+        "image": ("/v1/chat/completions", {"model": "gpt-4o", "messages": [image_message]}),
+        "models": ("/v1/models", None),
+    }
+
+
+def print_report(rows):
+    header = (
+        f"{'Scénario':<9} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8} "
+        f"{'TTFB50':>8} {'TTFB95':>8} {'TTFB99':>8} {'err':>5}"
+    )
+    print(header)
+    print("-" * len(header))
+    for name, r in rows:
+        print(
+            f"{name:<9} {r['rps']:>8.1f} {r['p50']:>8.1f} {r['p95']:>8.1f} {r['p99']:>8.1f} "
+            f"{r['ttfb_p50']:>8.1f} {r['ttfb_p95']:>8.1f} {r['ttfb_p99']:>8.1f} {r['errors']:>5}"
+        )
+    print("(latences en ms)")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--scenarios", default="chat,stream,image,models")
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--processes", type=int, default=4, help="Processus générateurs")
+    parser.add_argument("--workers", type=int, default=1, help="Workers de la Gateway")
+    parser.add_argument("--image-kb", type=int, default=64, help="Taille de l'image (Ko)")
+    parser.add_argument("--port", type=int, default=5099)
+    parser.add_argument("--mock-port", type=int, default=8081)
+    parser.add_argument("--gateway-url", help="Gateway déjà lancée (aucun processus démarré)")
+    parser.add_argument("--json", action="store_true", help="Résultats au format JSON")
+    add_mock_arguments(parser)
+    args = parser.parse_args()
+
+    scenarios = build_scenarios(args.image_kb)
+    selected = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = set(selected) - set(scenarios)
+    if unknown:
+        parser.error(f"Scénarios inconnus : {', '.join(sorted(unknown))}")
+
+    mock = gateway = None
+    if args.gateway_url:
+        target = urlparse(args.gateway_url)
+        host, port = target.hostname, target.port or 80
+    else:
+        host, port = "127.0.0.1", args.port
+        mock = start_mock(
+            args.mock_port,
+            latency=args.latency,
+            jitter=args.jitter,
+            error_rate=args.error_rate,
+            chunks=args.chunks,
+            chunk_interval=args.chunk_interval,
+        )
+        # Caches désactivés : chaque requête image paie réellement l'upload
+        gateway = start_gateway(
+            port,
+            args.mock_port,
+            args.workers,
+            extra_env={"ASSET_CACHE_ENABLED": "false", "COMPLETION_CACHE_ENABLED": "false"},
+        )
+
+    rows = []
+    try:
+        for name in selected:
+            path, payload = scenarios[name]
+            # Tour de chauffe (connexions keep-alive, tokenizers)
+            run_load(host, port, path, payload, duration=1, clients=4, processes=1)
+            rows.append(
+                (
+                    name,
+                    run_load(
+                        host, port, path, payload, args.duration, args.clients, args.processes
+                    ),
+                )
+            )
+    finally:
+        for process in (gateway, mock):
+            if process is not None:
+                stop(process)
+
+    if args.json:
+        print(json.dumps(dict(rows), indent=2))
+    else:
+        print_report(rows)
+
+
+if __name__ == "__main__":
+    main()
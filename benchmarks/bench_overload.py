@@ -0,0 +1,104 @@
+# benchmarks/bench_overload.py
+"""
+Benchmark de surcharge : un 1min.ai lent sature les threads waitress de complétions,
+pendant qu'un second générateur interroge / (health) et /v1/models.
+
+Compare la Gateway sans puis avec le limiteur de concurrence adaptatif
+(UPSTREAM_CONCURRENCY_ENABLED) : latence de la voie prioritaire, complétions servies
+et délestées (503 + Retry-After).
+
+Usage:
+    python benchmarks/bench_overload.py [--latency 2.0] [--clients 32] [--duration 10]
+        [--threads 8]
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+from bench_load import CHAT_MESSAGES  # noqa: E402
+from loadgen import run_load  # noqa: E402
+from local_stack import start_gateway, start_mock, stop  # noqa: E402
+
+CHAT_PAYLOAD = {"model": "gpt-4o-mini", "messages": CHAT_MESSAGES}
+
+
+def measure(args, limiter_enabled):
+    """Charge de complétions en arrière-plan, voie prioritaire mesurée au premier plan."""
+    gateway = start_gateway(
+        args.port,
+        args.mock_port,
+        extra_env={
+            "SERVER_THREADS": str(args.threads),
+            "UPSTREAM_CONCURRENCY_ENABLED": "true" if limiter_enabled else "false",
+        },
+    )
+    completions = {}
+    try:
+        background = threading.Thread(
+            target=lambda: completions.update(
+                run_load(
+                    "127.0.0.1",
+                    args.port,
+                    "/v1/chat/completions",
+                    CHAT_PAYLOAD,
+                    args.duration,
+                    args.clients,
+                    args.processes,
+                )
+            )
+        )
+        background.start()
+        health = run_load("127.0.0.1", args.port, "/", None, args.duration, 2, 1)
+        background.join()
+    finally:
+        stop(gateway)
+    return {"health": health, "completions": completions}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--latency", type=float, default=2.0, help="Latence du mock (s)")
+    parser.add_argument("--clients", type=int, default=32, help="Clients de complétions")
+    parser.add_argument("--processes", type=int, default=2, help="Processus générateurs")
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--threads", type=int, default=8, help="SERVER_THREADS de la Gateway")
+    parser.add_argument("--port", type=int, default=5099)
+    parser.add_argument("--mock-port", type=int, default=8081)
+    parser.add_argument("--json", action="store_true", help="Résultats au format JSON")
+    args = parser.parse_args()
+
+    mock = start_mock(args.mock_port, latency=args.latency)
+    try:
+        rows = [
+            (label, measure(args, enabled)) for label, enabled in (("sans", False), ("avec", True))
+        ]
+    finally:
+        stop(mock)
+
+    if args.json:
+        print(json.dumps(dict(rows), indent=2))
+        return
+
+    print(
+        f"{'Limiteur':<9} {'health p50':>11} {'health p99':>11} {'chat req/s':>11} "
+        f"{'chat p99':>9} {'non-200':>8}"
+    )
+    print("-" * 63)
+    for label, r in rows:
+        health, chat = r["health"], r["completions"]
+        print(
+            f"{label:<9} {health['p50']:>11.1f} {health['p99']:>11.1f} {chat['rps']:>11.1f} "
+            f"{chat['p99']:>9.1f} {chat['errors']:>8}"
+        )
+    print("(latences en ms ; non-200 = complétions délestées ou en échec)")
+
+
+if __name__ == "__main__":
+    main()
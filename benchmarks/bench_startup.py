@@ -0,0 +1,97 @@
+# benchmarks/bench_startup.py
+"""
+Benchmark du démarrage de la Gateway : temps d'import et de création de l'application,
+mesurés dans des processus neufs (aucun module déjà chargé, aucun cache d'import partagé).
+
+Étapes mesurées :
+- import   : `import src.routes` (configuration, routes et leurs dépendances)
+- create   : `create_app()` (logging, limiteur, enregistrement des routes)
+- tokenize : premier comptage de tokens (chargement différé de tiktoken)
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 5] [--memcached-host memcached]
+    python -X importtime -c "import src.routes" 2> import.log   (détail par module)
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+PROBE = """
+import json, time
+started = time.perf_counter()
+import src.routes
+imported = time.perf_counter()
+from src.factory import create_app
+create_app()
+created = time.perf_counter()
+from src.infrastructure.token_service import calculate_token
+try:
+    calculate_token("Bonjour", "gpt-4o-mini")
+except Exception:
+    pass
+tokenized = time.perf_counter()
+print(json.dumps({
+    "import": imported - started,
+    "create": created - imported,
+    "tokenize": tokenized - created,
+}))
+"""
+
+
+def measure_once(env):
+    """Lance un interpréteur neuf et retourne la durée de chaque étape (s)."""
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument(
+        "--memcached-host", help="MEMCACHED_HOST du processus mesuré (défaut : environnement)"
+    )
+    parser.add_argument("--json", action="store_true", help="Résultats au format JSON")
+    args = parser.parse_args()
+
+    env = dict(os.environ, TOKENIZER_PREWARM="false")
+    if args.memcached_host:
+        env["MEMCACHED_HOST"] = args.memcached_host
+
+    runs = [measure_once(env) for _ in range(args.runs)]
+    steps = ("import", "create", "tokenize")
+    summary = {
+        step: {
+            "median_ms": statistics.median(run[step] for run in runs) * 1000,
+            "max_ms": max(run[step] for run in runs) * 1000,
+        }
+        for step in steps
+    }
+
+    if args.json:
+        print(json.dumps(summary, indent=2))
+        return
+
+    print(f"{'Étape':<10} {'médiane ms':>11} {'max ms':>9}")
+    print("-" * 32)
+    for step in steps:
+        print(f"{step:<10} {summary[step]['median_ms']:>11.1f} {summary[step]['max_ms']:>9.1f}")
+    print(f"({args.runs} processus neufs)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+# benchmarks/bench_stream_response.py
+"""
+Benchmark du relais SSE : rejoue un flux 1min.ai de 10k chunks dans l'ancien et le
+nouveau stream_response (le comptage de tokens est neutralisé pour isoler le relais).
+
+Usage:
+    python benchmarks/bench_stream_response.py [--chunks 10000] [--repeat 5]
+    python benchmarks/bench_stream_response.py --replay capture.sse
+        (capture.sse : une ligne brute du flux amont par ligne, ex. via curl -N)
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import uuid
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.adapters import openai_adapter  # noqa: E402
+
+
+class ReplayResponse:
+    """Réponse amont simulée rejouant des lignes enregistrées."""
+
+    def __init__(self, lines):
+        self._lines = lines
+
+    def iter_lines(self):
+        return iter(self._lines)
+
+    def close(self):
+        pass
+
+
+def synthetic_capture(chunks):
+    """Flux déterministe : majorité de chunks JSON, quelques lignes en texte brut."""
+    words = ["Le", " modèle", " répond", " avec", " des", ' "guillemets"', " et", " é\\n"]
+    lines = []
+    for i in range(chunks):
+        word = words[i % len(words)]
+        if i % 10 == 9:
+            lines.append(" suite en texte brut".encode())
+        else:
+            lines.append(f"data: {json.dumps({'result': word})}".encode())
+        lines.append(b"")
+    lines.append(b"data: [DONE]")
+    return lines
+
+
+def legacy_stream_response(response, model_name, prompt_tokens):
+    """Reproduction du relais historique (decode + json.loads + json.dumps + concaténation)."""
+    all_chunks_text = ""
+    chat_id = f"chatcmpl-{uuid.uuid4()}"
+    for line in response.iter_lines():
+        if not line:
+            continue
+        decoded_line = line.decode("utf-8", errors="ignore").strip()
+        if decoded_line.startswith("data: "):
+            decoded_line = decoded_line[6:]
+        if decoded_line == "[DONE]":
+            break
+        try:
+            data = json.loads(decoded_line)
+            content_to_send = data.get("result", data.get("content", ""))
+        except json.JSONDecodeError:
+            content_to_send = decoded_line
+        if not content_to_send:
+            continue
+        all_chunks_text += content_to_send
+        chunk_data = {
+            "id": chat_id,
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": model_name,
+            "choices": [{"index": 0, "delta": {"content": content_to_send}, "finish_reason": None}],
+        }
+        yield f"data: {json.dumps(chunk_data)}\n\n"
+    completion_tokens = max(1, len(all_chunks_text) // 4)
+    final_metadata = {
+        "id": chat_id,
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model_name,
+        "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        },
+    }
+    yield f"data: {json.dumps(final_metadata)}\n\n"
+    yield "data: [DONE]\n\n"
+
+
+def run(stream_func, lines, repeat):
+    """Durées (ms) de `repeat` rejeus complets, sortie encodée en octets comme côté WSGI."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for chunk in stream_func(ReplayResponse(lines), "gpt-4o", 10):
+            if isinstance(chunk, str):
+                chunk = chunk.encode("utf-8")
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--chunks", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--replay", help="Fichier de capture brute du flux amont")
+    args = parser.parse_args()
+
+    if args.replay:
+        with open(args.replay, "rb") as capture:
+            lines = capture.read().split(b"\n")
+    else:
+        lines = synthetic_capture(args.chunks)
+
+    chunk_count = sum(1 for line in lines if line.strip())
+    with patch.object(openai_adapter, "USAGE_ACCOUNTING_MODE", "estimate"):
+        before = statistics.median(run(legacy_stream_response, lines, args.repeat))
+        after = statistics.median(run(openai_adapter.stream_response, lines, args.repeat))
+
+    print(f"Flux rejoué : {chunk_count} lignes amont")
+    print(f"{'Version':<10} {'Total (ms)':>12} {'µs/chunk':>10}")
+    print("-" * 34)
+    print(f"{'Avant':<10} {before:>12.1f} {before * 1000 / chunk_count:>10.2f}")
+    print(f"{'Après':<10} {after:>12.1f} {after * 1000 / chunk_count:>10.2f}")
+    print(f"Gain : {before / after:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
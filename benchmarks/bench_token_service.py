@@ -0,0 +1,84 @@
+# benchmarks/bench_token_service.py
+"""
+Micro-benchmark du calcul de tokens : chargement par appel, registre partagé,
+puis registre + mémo des comptes (même texte recompté, comme un prompt système).
+
+Usage: python benchmarks/bench_token_service.py [--iterations 200]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import tiktoken  # noqa: E402
+from mistral_common.protocol.instruct.messages import UserMessage  # noqa: E402
+from mistral_common.protocol.instruct.request import ChatCompletionRequest  # noqa: E402
+from mistral_common.tokens.tokenizers.mistral import MistralTokenizer  # noqa: E402
+
+from src.infrastructure.token_service import (  # noqa: E402
+    calculate_token,
+    get_tokenizer_registry,
+)
+
+SAMPLE_TEXT = "Bonjour, peux-tu résumer ce paragraphe en trois points clés ? " * 20
+MODELS = ["gpt-4o", "claude-sonnet-4-5-20250929", "deepseek-chat", "open-mistral-nemo"]
+
+
+def legacy_calculate_token(sentence, model="gpt-4o"):
+    """Reproduction du chemin historique : tokenizer résolu à chaque appel."""
+    model_lower = model.lower()
+    if "mistral" in model_lower or "nemo" in model_lower:
+        tokenizer = MistralTokenizer.from_model("open-mistral-nemo")
+        tokenized = tokenizer.encode_chat_completion(
+            ChatCompletionRequest(
+                messages=[UserMessage(content=str(sentence))], model="open-mistral-nemo"
+            )
+        )
+        return len(tokenized.tokens)
+    if any(m in model_lower for m in ["gpt-3.5", "gpt-4", "gpt-4o", "claude", "o1", "o3"]):
+        try:
+            encoding = tiktoken.encoding_for_model(model)
+        except KeyError:
+            encoding = tiktoken.get_encoding("cl100k_base")
+        return len(encoding.encode(str(sentence)))
+    return len(tiktoken.get_encoding("cl100k_base").encode(str(sentence)))
+
+
+def measure(func, model, iterations):
+    """Retourne les latences (ms) de `iterations` appels."""
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func(SAMPLE_TEXT, model)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--models", default=",".join(MODELS), help="Liste séparée par virgules")
+    args = parser.parse_args()
+    models = [m.strip() for m in args.models.split(",") if m.strip()]
+
+    # Échauffement : le premier appel télécharge/charge les vocabulaires
+    for model in models:
+        calculate_token(SAMPLE_TEXT, model)
+        legacy_calculate_token(SAMPLE_TEXT, model)
+
+    registry = get_tokenizer_registry()
+    print(f"{'Modèle':<30} {'Avant (ms)':>12} {'Registre (ms)':>14} {'Mémo (ms)':>10} {'Gain':>8}")
+    print("-" * 78)
+    for model in models:
+        before = statistics.median(measure(legacy_calculate_token, model, args.iterations))
+        shared = statistics.median(measure(registry.count, model, args.iterations))
+        memo = statistics.median(measure(calculate_token, model, args.iterations))
+        print(f"{model:<30} {before:>12.3f} {shared:>14.3f} {memo:>10.3f} {before / memo:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
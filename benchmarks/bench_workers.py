@@ -0,0 +1,79 @@
+# benchmarks/bench_workers.py
+"""
+Benchmark de montée en charge du mode pre-fork : débit de la Gateway de 1 à N workers
+face au 1min.ai factice (benchmarks/mock_1min.py), sans réseau externe.
+
+Usage:
+    python benchmarks/bench_workers.py [--workers 1,2,4] [--duration 10] [--clients 64]
+        [--stream] [--latency 0.05]
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+from loadgen import run_load  # noqa: E402
+from local_stack import start_gateway, start_mock, stop  # noqa: E402
+
+CHAT_PAYLOAD = {
+    "model": "gpt-4o-mini",
+    "messages": [{"role": "user", "content": "Résume le mode pre-fork en une phrase."}],
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", default=f"1,2,{os.cpu_count() or 4}")
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--clients", type=int, default=64)
+    parser.add_argument("--processes", type=int, default=4, help="Processus générateurs")
+    parser.add_argument("--latency", type=float, default=0.05, help="Latence du mock (s)")
+    parser.add_argument("--stream", action="store_true", help="Requêtes stream=true")
+    parser.add_argument("--port", type=int, default=5099)
+    parser.add_argument("--mock-port", type=int, default=8081)
+    args = parser.parse_args()
+
+    payload = dict(CHAT_PAYLOAD, stream=args.stream)
+    mock = start_mock(args.mock_port, latency=args.latency)
+    rows = []
+    try:
+        for workers in [int(w) for w in args.workers.split(",")]:
+            gateway = start_gateway(args.port, args.mock_port, workers)
+            try:
+                # Tour de chauffe (connexions keep-alive, tokenizers)
+                run_load("127.0.0.1", args.port, "/v1/chat/completions", payload, 2, 8, 1)
+                rows.append(
+                    (
+                        workers,
+                        run_load(
+                            "127.0.0.1",
+                            args.port,
+                            "/v1/chat/completions",
+                            payload,
+                            args.duration,
+                            args.clients,
+                            args.processes,
+                        ),
+                    )
+                )
+            finally:
+                stop(gateway)
+    finally:
+        stop(mock)
+
+    base_rps = rows[0][1]["rps"] or 1
+    print(
+        f"{'Workers':>7} {'req/s':>9} {'x':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'err':>5}"
+    )
+    print("-" * 58)
+    for workers, r in rows:
+        print(
+            f"{workers:>7} {r['rps']:>9.1f} {r['rps'] / base_rps:>6.2f} "
+            f"{r['p50']:>8.1f} {r['p95']:>8.1f} {r['p99']:>8.1f} {r['errors']:>5}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+# benchmarks/loadgen.py
+"""
+Générateur de charge HTTP minimal pour les benchmarks de la Gateway.
+
+Les clients tournent dans plusieurs processus (connexions keep-alive, un thread par
+client) pour que le générateur lui-même ne soit pas limité par le GIL.
+"""
+
+import http.client
+import json
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+
+def percentile(samples, q):
+    """Percentile q (0-100) par rang le plus proche ; 0.0 sans échantillon."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(q / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def _client_loop(host, port, method, path, body, headers, deadline, results, lock):
+    conn = http.client.HTTPConnection(host, port, timeout=60)
+    latencies = []
+    ttfbs = []
+    errors = 0
+    while time.monotonic() < deadline:
+        started = time.perf_counter()
+        try:
+            conn.request(method, path, body=body, headers=headers)
+            response = conn.getresponse()
+            # Premier octet du corps : premier chunk SSE pour un flux
+            response.read1(65536)
+            first_byte = time.perf_counter()
+            response.read()
+            ok = response.status == 200
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            conn = http.client.HTTPConnection(host, port, timeout=60)
+            ok = False
+        if ok:
+            ttfbs.append(first_byte - started)
+            latencies.append(time.perf_counter() - started)
+        else:
+            errors += 1
+    conn.close()
+    with lock:
+        results["latencies"].extend(latencies)
+        results["ttfbs"].extend(ttfbs)
+        results["errors"] += errors
+
+
+def _client_process(host, port, method, path, body, headers, duration, clients):
+    """Lance `clients` clients concurrents dans ce processus pendant `duration` s."""
+    results = {"latencies": [], "ttfbs": [], "errors": 0}
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+    threads = [
+        threading.Thread(
+            target=_client_loop,
+            args=(host, port, method, path, body, headers, deadline, results, lock),
+        )
+        for _ in range(clients)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def run_load(host, port, path, payload=None, duration=10, clients=32, processes=4):
+    """
+    Envoie des requêtes en boucle pendant `duration` secondes et retourne
+    débit (req/s), latences et TTFB p50/p95/p99 (ms) et nombre d'erreurs.
+    """
+    method = "POST" if payload is not None else "GET"
+    body = json.dumps(payload).encode("utf-8") if payload is not None else None
+    headers = {"Content-Type": "application/json", "Authorization": "Bearer bench-key"}
+    per_process = [
+        clients // processes + (1 if i < clients % processes else 0) for i in range(processes)
+    ]
+
+    latencies = []
+    ttfbs = []
+    errors = 0
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        futures = [
+            pool.submit(_client_process, host, port, method, path, body, headers, duration, n)
+            for n in per_process
+            if n
+        ]
+        for future in futures:
+            result = future.result()
+            latencies.extend(result["latencies"])
+            ttfbs.extend(result["ttfbs"])
+            errors += result["errors"]
+
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / duration,
+        "p50": percentile(latencies, 50) * 1000,
+        "p95": percentile(latencies, 95) * 1000,
+        "p99": percentile(latencies, 99) * 1000,
+        "ttfb_p50": percentile(ttfbs, 50) * 1000,
+        "ttfb_p95": percentile(ttfbs, 95) * 1000,
+        "ttfb_p99": percentile(ttfbs, 99) * 1000,
+    }
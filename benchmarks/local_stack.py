@@ -0,0 +1,91 @@
+# benchmarks/local_stack.py
+"""
+Démarrage local du 1min.ai factice et de la Gateway pour les benchmarks de charge.
+"""
+
+import os
+import signal
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def wait_ready(url, timeout=30):
+    """Attend qu'une URL réponde (n'importe quel statut HTTP)."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=1):
+                return
+        except urllib.error.HTTPError:
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"{url} ne répond pas après {timeout}s")
+
+
+def start_mock(port, latency=0.05, jitter=0.0, error_rate=0.0, chunks=20, chunk_interval=0.0):
+    """Lance benchmarks/mock_1min.py dans un processus séparé (hors du GIL du générateur)."""
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            os.path.join(ROOT, "benchmarks", "mock_1min.py"),
+            "--port",
+            str(port),
+            "--latency",
+            str(latency),
+            "--jitter",
+            str(jitter),
+            "--error-rate",
+            str(error_rate),
+            "--chunks",
+            str(chunks),
+            "--chunk-interval",
+            str(chunk_interval),
+        ],
+        stdout=subprocess.DEVNULL,
+    )
+    wait_ready(f"http://127.0.0.1:{port}/static/image.png")
+    return process
+
+
+def start_gateway(port, mock_port, workers=1, extra_env=None):
+    """
+    Lance main.py contre le mock ; limiteurs (débit, concurrence amont) désactivés,
+    logs console ignorés. Le générateur répète la même requête : sans
+    SINGLE_FLIGHT_ENABLED=false, les requêtes simultanées seraient coalescées en un
+    seul appel amont.
+    """
+    env = dict(
+        os.environ,
+        PORT=str(port),
+        ONE_MIN_BASE_URL=f"http://127.0.0.1:{mock_port}",
+        RATELIMIT_ENABLED="false",
+        UPSTREAM_CONCURRENCY_ENABLED="false",
+        SINGLE_FLIGHT_ENABLED="false",
+        MEMCACHED_HOST="127.0.0.1",
+    )
+    env.update(extra_env or {})
+    process = subprocess.Popen(
+        [sys.executable, "main.py", "--workers", str(workers)],
+        cwd=ROOT,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    wait_ready(f"http://127.0.0.1:{port}/")
+    return process
+
+
+def stop(process):
+    """Arrêt propre (SIGTERM), forcé après 60 s."""
+    process.send_signal(signal.SIGTERM)
+    try:
+        process.wait(timeout=60)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
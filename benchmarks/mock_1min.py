@@ -0,0 +1,167 @@
+# benchmarks/mock_1min.py
+"""
+Serveur 1min.ai factice pour les benchmarks de charge (aucun appel réseau réel).
+
+Endpoints simulés :
+- POST /api/features          réponse complète, ou flux SSE avec ?isStreaming=true
+- POST /api/conversations     création de conversation (UUID)
+- POST /api/assets            upload d'image (chemin d'asset)
+- GET  /static/image.png      image servie aux clients qui passent une URL externe
+
+Latence, gigue, taux d'erreur (HTTP 500) et cadence des chunks sont injectables,
+afin que le coût mesuré soit celui de la Gateway dans des conditions reproductibles.
+
+Usage:
+    python benchmarks/mock_1min.py [--port 8081] [--latency 0.05] [--jitter 0.01]
+        [--error-rate 0.0] [--chunks 20] [--chunk-interval 0.0]
+    puis lancer la Gateway avec ONE_MIN_BASE_URL=http://127.0.0.1:8081
+"""
+
+import argparse
+import json
+import random
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+REPLY_WORDS = ["Bonjour", " !", " Voici", " une", " réponse", " simulée", " par", " le", " mock."]
+# Image PNG minimale (1x1) servie sur /static/image.png
+PNG_1X1 = bytes.fromhex(
+    "89504e470d0a1a0a0000000d4948445200000001000000010806000000"
+    "1f15c4890000000d49444154789c6360000002000001e221bc330000000049454e44ae426082"
+)
+
+
+class MockOneMinHandler(BaseHTTPRequestHandler):
+    """Réponses au format 1min.ai ; la configuration est portée par le serveur."""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _read_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def _send_bytes(self, body, content_type, status=200):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, payload, status=200):
+        self._send_bytes(json.dumps(payload).encode("utf-8"), "application/json", status)
+
+    def _wait_and_maybe_fail(self):
+        """Latence simulée ; True si une erreur 500 a été injectée à la place de la réponse."""
+        server = self.server
+        delay = server.latency + random.uniform(-server.jitter, server.jitter)
+        if delay > 0:
+            time.sleep(delay)
+        if server.error_rate and random.random() < server.error_rate:
+            self._send_json({"error": "mock injected failure"}, status=500)
+            return True
+        return False
+
+    def do_GET(self):
+        if self.path.startswith("/static/image.png"):
+            self._send_bytes(PNG_1X1, "image/png")
+        else:
+            self._send_json({"error": "not found"}, status=404)
+
+    def do_POST(self):
+        self._read_body()
+        if self._wait_and_maybe_fail():
+            return
+
+        if self.path.startswith("/api/features"):
+            if "isStreaming=true" in self.path:
+                self._stream_reply()
+            else:
+                text = "".join(REPLY_WORDS)
+                self._send_json({"aiRecord": {"aiRecordDetail": {"resultObject": [text]}}})
+        elif self.path.startswith("/api/conversations"):
+            self._send_json({"conversation": {"uuid": str(uuid.uuid4())}})
+        elif self.path.startswith("/api/assets"):
+            self._send_json({"fileContent": {"path": f"images/mock/{uuid.uuid4()}.png"}})
+        else:
+            self._send_json({"error": "not found"}, status=404)
+
+    def _stream_reply(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for i in range(self.server.chunks):
+            if i and self.server.chunk_interval:
+                time.sleep(self.server.chunk_interval)
+            word = REPLY_WORDS[i % len(REPLY_WORDS)]
+            self._write_chunk(f"data: {json.dumps({'result': word})}\n\n".encode("utf-8"))
+            self.wfile.flush()
+        self._write_chunk(b"data: [DONE]\n\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _write_chunk(self, data):
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+
+
+def make_server(
+    host="127.0.0.1",
+    port=8081,
+    latency=0.05,
+    jitter=0.0,
+    error_rate=0.0,
+    chunks=20,
+    chunk_interval=0.0,
+):
+    """Construit le serveur factice (à lancer avec serve_forever())."""
+    # File d'attente large : la valeur par défaut (5) perd des connexions sous charge
+    ThreadingHTTPServer.request_queue_size = 1024
+    server = ThreadingHTTPServer((host, port), MockOneMinHandler)
+    server.daemon_threads = True
+    server.latency = latency
+    server.jitter = min(jitter, latency)
+    server.error_rate = error_rate
+    server.chunks = chunks
+    server.chunk_interval = chunk_interval
+    return server
+
+
+def add_mock_arguments(parser):
+    """Options du mock, partagées avec les benchmarks qui le lancent."""
+    parser.add_argument("--latency", type=float, default=0.05, help="Secondes avant réponse")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Variation de latence (±s)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Part de réponses 500")
+    parser.add_argument("--chunks", type=int, default=20, help="Chunks par réponse streamée")
+    parser.add_argument(
+        "--chunk-interval", type=float, default=0.0, help="Secondes entre deux chunks"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    add_mock_arguments(parser)
+    args = parser.parse_args()
+
+    server = make_server(
+        args.host,
+        args.port,
+        args.latency,
+        args.jitter,
+        args.error_rate,
+        args.chunks,
+        args.chunk_interval,
+    )
+    print(f"Mock 1min.ai sur http://{args.host}:{args.port} (latence {args.latency}s)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
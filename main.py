@@ -1,15 +1,67 @@
 # main.py
 
+import argparse
+import os
 import socket
 
 from waitress import serve
 
-from src.factory import create_app
+from src.config import APP_HOST, APP_PORT, SERVER_THREADS, TOKENIZER_PREWARM, WORKERS
+from src.factory import configure_logging, create_app
+from src.infrastructure.token_service import prewarm_tokenizers
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="1min-Gateway")
+    parser.add_argument(
+        "--asgi",
+        action="store_true",
+        help="Sert la Gateway en mode asyncio (uvicorn + httpx) au lieu de waitress",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=WORKERS,
+        help="Processus waitress pré-forkés partageant le port (POSIX uniquement)",
+    )
+    return parser.parse_args()
 
-# Création explicite de l'app
-app, logger, limiter = create_app()
 
 if __name__ == "__main__":
+    args = parse_args()
     local_ip = socket.gethostbyname(socket.gethostname())
-    logger.info(f"RUNNING | Gateway sur http://{local_ip}:5001")
-    serve(app, host="0.0.0.0", port=5001, threads=8)
+
+    # Une seule pile construite : l'app Flask pour waitress / pre-fork, rien en ASGI
+    # (uvicorn appelle lui-même la fabrique create_asgi_app)
+    if args.asgi:
+        logger = configure_logging()
+    else:
+        app, logger, limiter = create_app()
+
+    # Tokenizers chargés pendant que le serveur démarre (le mode pre-fork l'attend avant de forker)
+    if TOKENIZER_PREWARM:
+        prewarm_tokenizers()
+
+    if args.asgi:
+        import uvicorn
+
+        logger.info("RUNNING | Gateway (ASGI) sur http://%s:%s", local_ip, APP_PORT)
+        uvicorn.run(
+            "src.asgi:create_asgi_app",
+            factory=True,
+            host=APP_HOST,
+            port=APP_PORT,
+            log_level="warning",
+        )
+    elif args.workers > 1 and hasattr(os, "fork"):
+        from src.prefork import PreforkServer
+
+        logger.info(
+            "RUNNING | Gateway (%d workers) sur http://%s:%s", args.workers, local_ip, APP_PORT
+        )
+        PreforkServer(app, APP_HOST, APP_PORT, args.workers, SERVER_THREADS).run()
+    else:
+        if args.workers > 1:
+            logger.warning("PREFORK | fork() indisponible sur cette plateforme : 1 seul worker.")
+        logger.info("RUNNING | Gateway sur http://%s:%s", local_ip, APP_PORT)
+        serve(app, host=APP_HOST, port=APP_PORT, threads=SERVER_THREADS)
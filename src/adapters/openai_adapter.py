@@ -1,115 +1,279 @@
 # src/adapters/openai_adapter.py
 
+import asyncio
 import json
 import logging
 import time
 import uuid
+from json.encoder import encode_basestring_ascii
 
-from ..infrastructure.token_service import calculate_token
+from ..config import USAGE_ACCOUNTING_MODE, USAGE_WORKERS
+from ..infrastructure.token_service import (
+    CompletionUsageCounter,
+    count_text_tokens,
+    estimate_token,
+)
 
 # Logger pour la couche de transformation
 logger = logging.getLogger("1min-gateway.openai-adapter")
 
 
+def extract_result_content(one_min_response):
+    """
+    Extrait le texte de la réponse non-streaming 1min.ai, ou None si elle est vide.
+    """
+    # Extraction sécurisée selon la structure imbriquée de 1min.ai
+    result_list = (
+        one_min_response.get("aiRecord", {}).get("aiRecordDetail", {}).get("resultObject", [])
+    )
+    return result_list[0] if result_list else None
+
+
+def build_chat_completion(content, model_name, prompt_token, completion_token):
+    """
+    Construit l'objet OpenAI Chat Completion à partir d'un contenu déjà compté.
+    """
+    return {
+        "id": f"chatcmpl-{uuid.uuid4()}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model_name,
+        "choices": [
+            {
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }
+        ],
+        "usage": {
+            "prompt_tokens": prompt_token,
+            "completion_tokens": completion_token,
+            "total_tokens": prompt_token + completion_token,
+        },
+    }
+
+
+def count_completion_tokens(content, model_name):
+    """Compte les tokens de complétion selon USAGE_ACCOUNTING_MODE."""
+    if USAGE_ACCOUNTING_MODE == "estimate":
+        return estimate_token(content)
+    return count_text_tokens(content, model_name)
+
+
 def transform_response(one_min_response, model_name, prompt_token):
     """
     Transforme une réponse non-streaming 1min.ai en objet OpenAI Chat Completion.
     """
     try:
-        # Extraction sécurisée selon la structure imbriquée de 1min.ai
-        result_list = (
-            one_min_response.get("aiRecord", {}).get("aiRecordDetail", {}).get("resultObject", [])
-        )
-        content = result_list[0] if result_list else "Error: No response content from provider."
-
-        completion_token = calculate_token(content)
-
-        return {
-            "id": f"chatcmpl-{uuid.uuid4()}",
-            "object": "chat.completion",
-            "created": int(time.time()),
-            "model": model_name,
-            "choices": [
-                {
-                    "index": 0,
-                    "message": {"role": "assistant", "content": content},
-                    "finish_reason": "stop",
-                }
-            ],
-            "usage": {
-                "prompt_tokens": prompt_token,
-                "completion_tokens": completion_token,
-                "total_tokens": prompt_token + completion_token,
-            },
-        }
+        content = extract_result_content(one_min_response)
+        if content is None:
+            content = "Error: No response content from provider."
+
+        completion_token = count_completion_tokens(content, model_name)
+        return build_chat_completion(content, model_name, prompt_token, completion_token)
     except Exception as e:
-        logger.error(f"ADAPTER | Erreur Transformation (Non-stream): {str(e)}")
+        logger.error("ADAPTER | Erreur Transformation (Non-stream): %s", e)
         return {"error": "Failed to transform 1min.ai response"}
 
 
-def stream_response(response, model_name, prompt_tokens):
+# Marqueur de fin de flux renvoyé par parse_upstream_line
+STREAM_DONE = object()
+
+_DATA_PREFIX = b"data: "
+_DONE_LINE = b"[DONE]"
+
+
+def parse_upstream_line(line):
     """
-    Gère le streaming SSE en nettoyant les chunks de 1min.ai.
+    Extrait le texte d'une ligne (bytes) du flux 1min.ai.
     Supporte les formats: Texte brut, JSON par chunk, et préfixes 'data:'.
+    Retourne STREAM_DONE en fin de flux, "" si la ligne ne porte aucun texte.
     """
-    all_chunks_text = ""
-    chat_id = f"chatcmpl-{uuid.uuid4()}"
-
-    # On itère sur les lignes du flux (plus sûr pour le SSE)
-    for line in response.iter_lines():
-        if not line:
-            continue
+    if not line:
+        return ""
 
-        decoded_line = line.decode("utf-8", errors="ignore").strip()
+    line = line.strip()
 
-        # 1. Nettoyage du préfixe "data: " si 1min.ai l'envoie déjà
-        if decoded_line.startswith("data: "):
-            decoded_line = decoded_line[6:]
+    # 1. Nettoyage du préfixe "data: " si 1min.ai l'envoie déjà
+    if line.startswith(_DATA_PREFIX):
+        line = line[6:]
 
-        if decoded_line == "[DONE]":
-            break
+    if line == _DONE_LINE:
+        return STREAM_DONE
 
-        content_to_send = ""
-
-        # 2. Tentative de décodage JSON (si le chunk est un objet)
+    # 2. Décodage JSON uniquement si le chunk ressemble à un objet
+    if line.startswith(b"{"):
         try:
-            data = json.loads(decoded_line)
+            data = json.loads(line)
             # Selon la doc 1min.ai, le texte peut être dans 'result' ou directement à la racine
-            content_to_send = data.get("result", data.get("content", ""))
-        except json.JSONDecodeError:
-            # Si ce n't pas du JSON, c'est du texte brut
-            content_to_send = decoded_line
+            content = data.get("result", data.get("content", ""))
+            return content if isinstance(content, str) else str(content or "")
+        except (ValueError, AttributeError):
+            pass
 
-        if not content_to_send:
-            continue
+    # Sinon, c'est du texte brut
+    return line.decode("utf-8", errors="ignore")
 
-        all_chunks_text += content_to_send
 
-        # 3. Formatage pour OpenAI
-        chunk_data = {
-            "id": chat_id,
+class StreamEnvelope:
+    """
+    Enveloppe SSE constante d'un flux (id, object, created, model), sérialisée une
+    seule fois : chaque chunk ne coûte plus que l'échappement JSON de son delta.
+    """
+
+    def __init__(self, chat_id, model_name, created=None):
+        self.chat_id = chat_id
+        self.model_name = model_name
+        self.created = int(time.time()) if created is None else created
+
+        head = json.dumps(
+            {
+                "id": chat_id,
+                "object": "chat.completion.chunk",
+                "created": self.created,
+                "model": model_name,
+            }
+        )[:-1]
+        self._prefix = f'data: {head}, "choices": [{{"index": 0, "delta": {{"content": '.encode()
+        self._suffix = b'}, "finish_reason": null}]}\n\n'
+
+    def chunk(self, content):
+        """Octets SSE d'un delta de contenu (même sortie que json.dumps)."""
+        return self._prefix + encode_basestring_ascii(content).encode("ascii") + self._suffix
+
+    def end(self, prompt_tokens, completion_tokens):
+        """Octets du chunk final (usage) suivi du marqueur [DONE]."""
+        final_metadata = {
+            "id": self.chat_id,
             "object": "chat.completion.chunk",
-            "created": int(time.time()),
-            "model": model_name,
-            "choices": [{"index": 0, "delta": {"content": content_to_send}, "finish_reason": None}],
+            "created": self.created,
+            "model": self.model_name,
+            "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
         }
-        yield f"data: {json.dumps(chunk_data)}\n\n"
+        return f"data: {json.dumps(final_metadata)}\n\ndata: [DONE]\n\n".encode()
 
-    # 4. Envoi des métadonnées finales (Tokens)
-    completion_tokens = calculate_token(all_chunks_text)
 
-    final_metadata = {
-        "id": chat_id,
-        "object": "chat.completion.chunk",
-        "created": int(time.time()),
-        "model": model_name,
-        "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
-        "usage": {
-            "prompt_tokens": prompt_tokens,
-            "completion_tokens": completion_tokens,
-            "total_tokens": prompt_tokens + completion_tokens,
-        },
-    }
+def iter_upstream_contents(response):
+    """
+    Textes successifs d'un flux 1min.ai (lignes vides et bruit filtrés).
+    Ferme la réponse amont à la fin du flux ou dès que l'itération est interrompue.
+    """
+    try:
+        # On itère sur les lignes du flux (plus sûr pour le SSE)
+        for line in response.iter_lines():
+            content = parse_upstream_line(line)
+            if content is STREAM_DONE:
+                return
+            if content:
+                yield content
+    finally:
+        # Rend la connexion au pool keep-alive (y compris si le client se déconnecte)
+        response.close()
+
+
+def stream_contents(contents, model_name, prompt_tokens, on_complete=None, on_stream_end=None):
+    """
+    Produit les octets SSE OpenAI à partir d'un itérable de textes.
+
+    on_complete(content, completion_tokens) est appelé si le flux amont se termine
+    normalement (jamais si le client se déconnecte en cours de route).
+    on_stream_end(chunk_count, duration) est appelé dans tous les cas (métriques).
+    """
+    usage_counter = CompletionUsageCounter(model_name, USAGE_ACCOUNTING_MODE, USAGE_WORKERS)
+    envelope = StreamEnvelope(f"chatcmpl-{uuid.uuid4()}", model_name)
+    collected = [] if on_complete else None
+    chunk_count = 0
+    started = time.perf_counter()
+
+    try:
+        for content_to_send in contents:
+            chunk_count += 1
+            usage_counter.add(content_to_send)
+            if collected is not None:
+                collected.append(content_to_send)
+            yield envelope.chunk(content_to_send)
+    finally:
+        # Propage l'arrêt à la source (déconnexion client)
+        close = getattr(contents, "close", None)
+        if close:
+            close()
+        if on_stream_end:
+            try:
+                on_stream_end(chunk_count, time.perf_counter() - started)
+            except Exception as e:
+                logger.warning("ADAPTER | Callback de métriques en échec: %s", e)
+
+    # Envoi des métadonnées finales (Tokens)
+    completion_tokens = usage_counter.total()
+    if on_complete:
+        try:
+            on_complete("".join(collected), completion_tokens)
+        except Exception as e:
+            logger.warning("ADAPTER | Callback de fin de flux en échec: %s", e)
+    yield envelope.end(prompt_tokens, completion_tokens)
+
+
+def stream_response(response, model_name, prompt_tokens, on_complete=None, on_stream_end=None):
+    """
+    Gère le streaming SSE en nettoyant les chunks de 1min.ai.
+    Produit directement des octets pour le serveur WSGI.
+    """
+    return stream_contents(
+        iter_upstream_contents(response),
+        model_name,
+        prompt_tokens,
+        on_complete=on_complete,
+        on_stream_end=on_stream_end,
+    )
+
+
+def replay_stream(content, model_name, prompt_tokens, completion_tokens, chunk_chars=64):
+    """
+    Rejoue un contenu déjà connu (cache) sous forme de flux SSE OpenAI.
+    """
+    envelope = StreamEnvelope(f"chatcmpl-{uuid.uuid4()}", model_name)
+    for start in range(0, len(content), chunk_chars):
+        yield envelope.chunk(content[start : start + chunk_chars])
+    yield envelope.end(prompt_tokens, completion_tokens)
+
+
+async def _aiter_byte_lines(response):
+    """Découpe un flux httpx en lignes d'octets, sans décodage intermédiaire."""
+    pending = b""
+    async for data in response.aiter_bytes():
+        lines = (pending + data).split(b"\n") if pending else data.split(b"\n")
+        pending = lines.pop()
+        for line in lines:
+            yield line
+    if pending:
+        yield pending
+
+
+async def astream_response(response, model_name, prompt_tokens):
+    """
+    Équivalent asynchrone de stream_response pour un flux httpx (mode ASGI).
+    Le comptage final des tokens est déporté dans un thread pour ne pas bloquer la boucle.
+    """
+    usage_counter = CompletionUsageCounter(model_name, USAGE_ACCOUNTING_MODE, USAGE_WORKERS)
+    envelope = StreamEnvelope(f"chatcmpl-{uuid.uuid4()}", model_name)
+
+    try:
+        async for line in _aiter_byte_lines(response):
+            content_to_send = parse_upstream_line(line)
+            if content_to_send is STREAM_DONE:
+                break
+            if not content_to_send:
+                continue
+
+            usage_counter.add(content_to_send)
+            yield envelope.chunk(content_to_send)
+    finally:
+        await response.aclose()
 
-    yield f"data: {json.dumps(final_metadata)}\n\n"
-    yield "data: [DONE]\n\n"
+    completion_tokens = await asyncio.to_thread(usage_counter.total)
+    yield envelope.end(prompt_tokens, completion_tokens)
@@ -0,0 +1,127 @@
+# src/application/completion_cache.py
+
+"""
+Cache opt-in des complétions déterministes.
+Évite de renvoyer à 1min.ai une requête identique (sondes, retries d'agents, workflows n8n).
+"""
+
+import hashlib
+import json
+import logging
+
+from ..config import (
+    COMPLETION_CACHE_BACKEND,
+    COMPLETION_CACHE_ENABLED,
+    COMPLETION_CACHE_MAX_BYTES,
+    COMPLETION_CACHE_MAX_ENTRIES,
+    COMPLETION_CACHE_TTL,
+)
+from ..infrastructure.cache_service import build_cache
+from ..infrastructure.network_service import hash_api_key
+
+logger = logging.getLogger("1min-gateway.completion-cache")
+
+# Paramètres OpenAI qui changent la réponse attendue par le client
+KEY_REQUEST_PARAMS = (
+    "temperature",
+    "top_p",
+    "max_tokens",
+    "n",
+    "seed",
+    "stop",
+    "presence_penalty",
+    "frequency_penalty",
+    "response_format",
+)
+
+
+def completion_request_key(api_key, model_name, context, request_data=None):
+    """
+    Empreinte d'une requête de complétion : clé API (hachée), modèle, type,
+    prompt_object normalisé et paramètres pertinents de la requête.
+    """
+    request_data = request_data or {}
+    material = {
+        "key": hash_api_key(api_key),
+        "model": model_name,
+        "type": context["type"],
+        "prompt": context["prompt_object"],
+        "params": {p: request_data[p] for p in KEY_REQUEST_PARAMS if p in request_data},
+    }
+    normalized = json.dumps(material, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.blake2b(normalized.encode("utf-8"), digest_size=20).hexdigest()
+
+
+def is_cacheable(context):
+    """
+    Seules les requêtes sans état amont sont rejouables : pas de conversation 1min.ai
+    (session_id == type), pas de génération d'image ni de recherche web.
+    """
+    prompt_object = context.get("prompt_object", {})
+    return (
+        context.get("type") != "IMAGE_GENERATOR"
+        and context.get("session_id") == context.get("type")
+        and not prompt_object.get("webSearch")
+    )
+
+
+class CompletionCache:
+    """Cache des réponses (contenu + tokens de complétion) indexé par empreinte de requête."""
+
+    def __init__(self, enabled, backend="memory", max_entries=1024, max_bytes=None, ttl=300):
+        self.enabled = enabled
+        self._cache = (
+            build_cache(
+                "completions",
+                backend=backend,
+                max_entries=max_entries,
+                max_bytes=max_bytes,
+                ttl=ttl,
+            )
+            if enabled
+            else None
+        )
+
+    def key_for(self, api_key, model_name, context, request_data=None):
+        """Retourne la clé de cache de la requête, ou None si elle n'est pas éligible."""
+        if not self.enabled or not is_cacheable(context):
+            return None
+        return completion_request_key(api_key, model_name, context, request_data)
+
+    def lookup(self, key):
+        """Retourne {"content", "completion_tokens"} ou None."""
+        if not self.enabled or key is None:
+            return None
+        raw = self._cache.get(key)
+        if raw is None:
+            return None
+        try:
+            return json.loads(raw)
+        except ValueError:
+            self._cache.delete(key)
+            return None
+
+    def store(self, key, content, completion_tokens):
+        """Enregistre une réponse complète."""
+        if not self.enabled or key is None or not content:
+            return
+        entry = json.dumps({"content": content, "completion_tokens": completion_tokens})
+        if self._cache.set(key, entry):
+            logger.debug("CACHE | Réponse enregistrée (%d caractères)", len(content))
+
+    def stats(self):
+        if not self.enabled:
+            return {"enabled": False}
+        stats = self._cache.stats()
+        stats["enabled"] = True
+        return stats
+
+
+# --- INSTANCE GLOBALE ---
+completion_cache = CompletionCache(
+    COMPLETION_CACHE_ENABLED,
+    backend=COMPLETION_CACHE_BACKEND,
+    max_entries=COMPLETION_CACHE_MAX_ENTRIES,
+    max_bytes=COMPLETION_CACHE_MAX_BYTES,
+    ttl=COMPLETION_CACHE_TTL,
+)
@@ -0,0 +1,214 @@
+# src/application/hedging.py
+
+"""
+Requêtes de couverture (hedging) pour les complétions non-streaming.
+Si 1min.ai n'a pas répondu au p95 des latences récentes du modèle, un second appel
+identique part ; la première réponse réussie l'emporte. Un budget plafonne la charge
+supplémentaire à HEDGE_BUDGET_PERCENT des requêtes éligibles.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from ..config import (
+    HEDGE_BUDGET_PERCENT,
+    HEDGE_ENABLED,
+    HEDGE_MIN_DELAY,
+    HEDGE_MIN_SAMPLES,
+    SERVER_THREADS,
+)
+from .completion_cache import is_cacheable
+
+logger = logging.getLogger("1min-gateway.hedging")
+
+# Percentile des latences récentes au-delà duquel l'appel est couvert
+PERCENTILE = 0.95
+# Latences conservées par modèle pour estimer le percentile
+LATENCY_WINDOW = 200
+# Couvertures accumulables au plus (absorbe une rafale lente après une période calme)
+BUDGET_CAP = 10.0
+
+
+def is_hedgeable(context):
+    """
+    Seul un chat sans état amont est rejoué sans effet de bord : CHAT_WITH_AI sans
+    conversation 1min.ai (un tour, ou historique replié) ni recherche web.
+    """
+    return context.get("type") == "CHAT_WITH_AI" and is_cacheable(context)
+
+
+def _release_when_done(futures, release):
+    """Rend la place de l'appel supplémentaire quand les deux appels sont terminés."""
+    remaining = [len(futures)]
+    lock = threading.Lock()
+
+    def on_done(_future):
+        with lock:
+            remaining[0] -= 1
+            finished = remaining[0] == 0
+        if finished:
+            release()
+
+    for future in futures:
+        future.add_done_callback(on_done)
+
+
+class HedgedRequests:
+    """Seuil de couverture appris par modèle, budget et exécution des appels doublés."""
+
+    def __init__(
+        self,
+        enabled,
+        budget_percent=5.0,
+        min_samples=20,
+        min_delay=0.5,
+        max_workers=None,
+    ):
+        self.enabled = enabled
+        self.budget_percent = budget_percent
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self.max_workers = max_workers or 2 * SERVER_THREADS
+        self._latencies = {}
+        self._budget = 0.0
+        self._pool = None
+        self._lock = threading.Lock()
+
+        self._eligible = 0
+        self._hedged = 0
+        self._hedge_wins = 0
+        self._cancelled = 0
+        self._skipped_budget = 0
+        self._skipped_capacity = 0
+
+    def _executor(self):
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(
+                        max_workers=self.max_workers, thread_name_prefix="hedge"
+                    )
+        return self._pool
+
+    # --- SEUIL (p95 DES LATENCES RÉCENTES) ---
+
+    def observe(self, model, latency):
+        """Enregistre la durée d'un appel réussi (gagnant ou perdant)."""
+        with self._lock:
+            samples = self._latencies.get(model)
+            if samples is None:
+                samples = self._latencies[model] = deque(maxlen=LATENCY_WINDOW)
+            samples.append(latency)
+
+    def threshold(self, model):
+        """Délai avant couverture pour ce modèle ; None tant que l'historique est trop court."""
+        with self._lock:
+            samples = sorted(self._latencies.get(model, ()))
+        if len(samples) < self.min_samples:
+            return None
+        return max(self.min_delay, samples[min(len(samples) - 1, int(PERCENTILE * len(samples)))])
+
+    # --- EXÉCUTION ---
+
+    def _submit(self, model, call):
+        started = time.perf_counter()
+        future = self._executor().submit(call)
+
+        def record(done):
+            if not done.cancelled() and done.exception() is None:
+                self.observe(model, time.perf_counter() - started)
+
+        future.add_done_callback(record)
+        return future
+
+    def _reserve_hedge(self, reserve):
+        """Place pour l'appel supplémentaire : budget puis capacité amont disponibles."""
+        with self._lock:
+            if self._budget < 1.0:
+                self._skipped_budget += 1
+                return None
+            release = reserve() if reserve is not None else (lambda: None)
+            if release is None:
+                self._skipped_capacity += 1
+                return None
+            self._budget -= 1.0
+            self._hedged += 1
+        return release
+
+    def run(self, model, call, reserve=None):
+        """
+        Exécute `call` (appel amont complet, idempotent) et le couvre s'il dépasse le
+        seuil du modèle. `reserve` retourne la libération d'une place amont, ou None
+        si aucune n'est libre immédiatement : la couverture est alors abandonnée.
+        """
+        if not self.enabled:
+            return call()
+
+        with self._lock:
+            self._eligible += 1
+            self._budget = min(BUDGET_CAP, self._budget + self.budget_percent / 100)
+
+        delay = self.threshold(model)
+        if delay is None:
+            # Apprentissage : appel direct dans le thread de la requête
+            started = time.perf_counter()
+            result = call()
+            self.observe(model, time.perf_counter() - started)
+            return result
+
+        primary = self._submit(model, call)
+        if wait([primary], timeout=delay).done:
+            return primary.result()
+
+        release = self._reserve_hedge(reserve)
+        if release is None:
+            return primary.result()
+
+        logger.info("HEDGE | Pas de réponse après %.2fs (%s), second appel", delay, model)
+        hedge = self._submit(model, call)
+        _release_when_done((primary, hedge), release)
+        return self._first_success(primary, hedge)
+
+    def _first_success(self, primary, hedge):
+        """Première réponse réussie ; l'erreur de l'appel initial si les deux échouent."""
+        pending = {primary, hedge}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for winner in (primary, hedge):
+                if winner in done and winner.exception() is None:
+                    loser = hedge if winner is primary else primary
+                    # Un appel déjà envoyé à 1min.ai ne peut être rappelé : son résultat
+                    # est ignoré et sa place rendue à son terme
+                    with self._lock:
+                        if loser.cancel():
+                            self._cancelled += 1
+                        if winner is hedge:
+                            self._hedge_wins += 1
+                    return winner.result()
+        return primary.result()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "eligible": self._eligible,
+                "hedged": self._hedged,
+                "hedge_wins": self._hedge_wins,
+                "cancelled": self._cancelled,
+                "skipped_budget": self._skipped_budget,
+                "skipped_capacity": self._skipped_capacity,
+                "budget": round(self._budget, 2),
+                "models": len(self._latencies),
+            }
+
+
+# --- INSTANCE GLOBALE ---
+hedged_requests = HedgedRequests(
+    enabled=HEDGE_ENABLED,
+    budget_percent=HEDGE_BUDGET_PERCENT,
+    min_samples=HEDGE_MIN_SAMPLES,
+    min_delay=HEDGE_MIN_DELAY,
+)
@@ -0,0 +1,67 @@
+# src/application/model_catalog.py
+
+"""
+Catalogue des modèles servi par /v1/models, pré-sérialisé.
+Les clients OpenAI interrogent cet endpoint en boucle : le corps JSON de la liste et de
+chaque modèle est construit une seule fois (au démarrage ou à un rechargement), avec un
+ETag pour que les clients revalident en 304 Not Modified sans recevoir le corps.
+"""
+
+import hashlib
+import json
+import logging
+
+from ..config import AVAILABLE_MODELS
+from ..domain.model_provider import get_formatted_models_list
+
+logger = logging.getLogger("1min-gateway.model-catalog")
+
+
+def _etag(body):
+    return hashlib.blake2b(body, digest_size=12).hexdigest()
+
+
+def _serialize(data):
+    return json.dumps(data, separators=(",", ":")).encode("utf-8")
+
+
+class ModelCatalog:
+    """Liste et index des modèles exposés, avec leurs corps JSON et ETag précalculés."""
+
+    def __init__(self, models):
+        self.rebuild(models)
+
+    def rebuild(self, models):
+        """Reconstruit les corps pré-sérialisés (ex: après un rechargement de configuration)."""
+        # AVAILABLE_MODELS est déjà restreint au sous-ensemble autorisé et validé
+        entries = get_formatted_models_list(
+            all_models=models, permit_subset_only=False, subset_models=[]
+        )
+        list_body = _serialize({"object": "list", "data": entries})
+        index = {}
+        for entry in entries:
+            body = _serialize(entry)
+            index[entry["id"]] = (body, _etag(body))
+
+        # Remplacement en une affectation : un lecteur concurrent voit l'ancien ou le nouveau
+        self._listing = (list_body, _etag(list_body))
+        self._index = index
+        logger.info("MODELS | Catalogue précalculé: %d modèles", len(entries))
+
+    def listing(self):
+        """(corps, ETag) de la liste complète."""
+        return self._listing
+
+    def get(self, model_id):
+        """(corps, ETag) d'un modèle, ou None s'il n'est pas exposé."""
+        return self._index.get(model_id)
+
+    def __contains__(self, model_id):
+        return model_id in self._index
+
+    def __len__(self):
+        return len(self._index)
+
+
+# --- INSTANCE GLOBALE ---
+model_catalog = ModelCatalog(AVAILABLE_MODELS)
@@ -2,126 +2,226 @@
 
 import logging
 import re
+import threading
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 
-from ..config import ONE_MIN_ASSET_API_URL
+from ..config import (
+    HISTORY_MAX_TOKENS,
+    HISTORY_MODE,
+    HISTORY_RESPONSE_RESERVE,
+    IMAGE_UPLOAD_CONCURRENCY,
+    ONE_MIN_ASSET_API_URL,
+)
+from ..domain.conversation_service import (
+    context_window,
+    message_text,
+    pack_conversation_history,
+)
 from ..infrastructure.asset_service import upload_image_to_1min
 from ..infrastructure.one_min_client import create_1min_conversation
+from ..infrastructure.token_service import calculate_token, estimate_token
+from .session_cache import session_cache
 
 logger = logging.getLogger("1min-gateway.orchestrator")
 
+# --- UPLOADS D'IMAGES PARALLÈLES ---
+_upload_pool = None
+_upload_pool_lock = threading.Lock()
 
-def resolve_conversation_context(api_key, model_name, messages, request_data=None):
-    request_data = request_data or {}
-    conv_type = "CHAT_WITH_AI"
-    image_paths = []
-    file_ids = []
-    youtube_url = None
 
-    last_message = messages[-1] if messages else {}
-    content = last_message.get("content", "")
+def _get_upload_pool():
+    """Pool borné partagé par toutes les requêtes, créé au premier message multi-images."""
+    global _upload_pool
+    if _upload_pool is None:
+        with _upload_pool_lock:
+            if _upload_pool is None:
+                _upload_pool = ThreadPoolExecutor(
+                    max_workers=IMAGE_UPLOAD_CONCURRENCY, thread_name_prefix="image-upload"
+                )
+    return _upload_pool
 
-    # --- Headers pour upload image ---
-    asset_headers = {"API-KEY": api_key, "Authorization": f"Bearer {api_key}"}
 
-    raw_prompt = ""
-    if isinstance(content, list):
-        for part in content:
-            if part.get("type") == "text":
-                raw_prompt += part.get("text", "")
-            elif part.get("type") == "image_url":
-                try:
-                    logger.info("ORCHESTRATOR | Détection d'image, tentative d'upload...")
-                    path = upload_image_to_1min(part, asset_headers, ONE_MIN_ASSET_API_URL)
-                    if path:
-                        image_paths.append(path)
-                        conv_type = "CHAT_WITH_IMAGE"
-                except Exception as e:
-                    logger.error(f"ORCHESTRATOR | Échec upload image: {str(e)}")
+def _upload_one_image(part, asset_headers):
+    """Uploade une image ; un échec est journalisé et l'image ignorée."""
+    try:
+        return upload_image_to_1min(part, asset_headers, ONE_MIN_ASSET_API_URL)
+    except Exception as e:
+        logger.error("ORCHESTRATOR | Échec upload image: %s", e)
+        return None
+
+
+def upload_images(image_parts, asset_headers):
+    """
+    Uploade les images d'un message en parallèle (IMAGE_UPLOAD_CONCURRENCY max)
+    et retourne leurs chemins 1min.ai dans l'ordre du message.
+    """
+    logger.info("ORCHESTRATOR | Détection de %d image(s), tentative d'upload...", len(image_parts))
+    if len(image_parts) == 1:
+        paths = [_upload_one_image(image_parts[0], asset_headers)]
     else:
-        raw_prompt = str(content)
+        # map() conserve l'ordre des images quel que soit l'ordre de fin des uploads
+        paths = list(
+            _get_upload_pool().map(lambda part: _upload_one_image(part, asset_headers), image_parts)
+        )
+    return [path for path in paths if path]
 
-    # --- NOUVELLE LOGIQUE : On ne crée PAS de conversation pour les cas simples ---
 
-    # Cas 1: Image Generation (AMÉLIORÉ avec plus de paramètres)
-    if request_data.get("content_type") == "IMAGE_GENERATOR":
-        logger.info("ORCHESTRATOR | Mode Génération d'Image activé")
-
-        # Construire prompt_object avec TOUS les paramètres
-        prompt_object = {
-            "prompt": raw_prompt,
-            "language": request_data.get("language", "English"),
-            "n": int(request_data.get("n", 1)),
-            "size": request_data.get("size", "1024x1024"),
-            # --- NOUVEAUX PARAMÈTRES POUR IMAGE ---
-            "aspect_ratio": request_data.get("aspect_ratio", "1:1"),
-            "output_format": request_data.get("output_format", "webp"),
-            "num_outputs": int(request_data.get("n", 1)),  # Même que 'n'
-            "style": request_data.get("style", ""),
-            "negative_prompt": request_data.get("negative_prompt", ""),
-            "mode": request_data.get("mode", "fast"),
-            "isNiji6": bool(request_data.get("is_niji6", False)),
-            "maintainModeration": bool(request_data.get("maintain_moderation", True)),
-            "aspect_width": int(request_data.get("aspect_width", 1)),
-            "aspect_height": int(request_data.get("aspect_height", 1)),
-        }
-
-        # Nettoyer les paramètres vides
-        prompt_object = {k: v for k, v in prompt_object.items() if v not in [None, "", 0, False]}
-
-        return {
-            "type": "IMAGE_GENERATOR",
-            "session_id": f"gen-{uuid.uuid4()}",
-            "image_paths": [],
-            "prompt_object": prompt_object,
-        }
+# --- COMPACTAGE DE L'HISTORIQUE ---
+# Les clients renvoient tout l'historique à chaque tour : calculate_token mémorise les
+# comptes par empreinte, seuls les messages nouveaux sont réellement tokenisés
+def history_budget(model_name):
+    """Tokens disponibles pour le prompt replié : fenêtre du modèle moins la réponse."""
+    window = context_window(model_name)
+    budget = window - min(HISTORY_RESPONSE_RESERVE, window // 2)
+    return min(budget, HISTORY_MAX_TOKENS) if HISTORY_MAX_TOKENS else budget
 
-    # Cas 2: YouTube (nécessite une vraie conversation)
-    yt_match = re.search(r"(https?://(?:www\.)?youtube\.com/watch\?v=[^\s&]+)", raw_prompt)
-    if yt_match:
-        youtube_url = yt_match.group(1)
-        conv_type = "CHAT_WITH_YOUTUBE_VIDEO"
-        logger.info(f"ORCHESTRATOR | Mode YouTube détecté: {youtube_url}")
 
-        # Pour YouTube, on DOIT créer une conversation
-        session_id = create_1min_conversation(
-            api_key=api_key,
-            model=model_name,
-            conv_type=conv_type,
-            title=f"Chat_{model_name[:20]}",
-            file_ids=file_ids,
-            youtube_url=youtube_url,
-            prompt_object=None,
+def pack_history(model_name, messages):
+    """Prompt replié et son nombre de tokens (HISTORY_MODE=pack)."""
+    prompt, tokens, omitted = pack_conversation_history(
+        messages, history_budget(model_name), lambda text: calculate_token(text, model_name)
+    )
+    if omitted:
+        logger.info(
+            "ORCHESTRATOR | Historique compacté: %d message(s) ancien(s) retiré(s)", omitted
         )
+    return prompt, tokens
 
-        if not session_id:
-            logger.warning("ORCHESTRATOR | Session YouTube non créée.")
-            session_id = str(uuid.uuid4())
 
-    # Cas 3: Chat simple (sans historique complexe) - ON NE CRÉE PAS DE CONVERSATION
-    elif len(messages) <= 2:  # Un ou deux messages max
-        # On utilise directement le type comme ID (ex: "CHAT_WITH_AI")
-        session_id = conv_type
-        logger.info(f"ORCHESTRATOR | Mode simple - Utilisation du type comme ID: {session_id}")
+def estimate_request_tokens(messages):
+    """
+    Estimation rapide (sans tokenizer) des tokens de tous les messages, avant toute
+    orchestration : pondère le coût d'une requête dans le quota de la clé API.
+    """
+    return sum(
+        estimate_token(message_text(message.get("content")))
+        for message in messages
+        if isinstance(message, dict)
+    )
+
 
-    # Cas 4: Chat avec historique long - On crée une vraie conversation
+def get_or_create_conversation(
+    api_key, model_name, conv_type, messages, file_ids=None, youtube_url=None
+):
+    """
+    Réutilise la conversation 1min.ai du tour précédent (historique = messages[:-2] :
+    tout sauf la dernière réponse de l'assistant et le nouveau message) ou en crée une.
+    """
+    scope = youtube_url or ""
+    session_id = session_cache.lookup(api_key, model_name, conv_type, messages[:-2], scope)
+    if session_id:
+        logger.info("ORCHESTRATOR | Conversation réutilisée: %s", session_id)
     else:
-        logger.info("ORCHESTRATOR | Historique long détecté - Création conversation...")
         session_id = create_1min_conversation(
             api_key=api_key,
             model=model_name,
             conv_type=conv_type,
             title=f"Chat_{model_name[:20]}",
-            file_ids=file_ids,
+            file_ids=file_ids or [],
             youtube_url=youtube_url,
             prompt_object=None,
         )
 
-        if not session_id:
-            logger.warning("ORCHESTRATOR | Session non créée. Utilisation du type comme ID.")
-            session_id = conv_type
+    session_cache.remember(api_key, model_name, conv_type, messages, session_id, scope)
+    return session_id
+
+
+def _split_message_content(content):
+    """Texte du dernier message et ses parties image (contenu multimodal OpenAI)."""
+    if not isinstance(content, list):
+        return str(content), []
+
+    raw_prompt = ""
+    image_parts = []
+    for part in content:
+        if part.get("type") == "text":
+            raw_prompt += part.get("text", "")
+        elif part.get("type") == "image_url":
+            image_parts.append(part)
+    return raw_prompt, image_parts
+
+
+def _upload_message_images(api_key, image_parts):
+    """Chemins 1min.ai des images du dernier message (uploadées en parallèle)."""
+    if not image_parts:
+        return []
+    # --- Headers pour upload image ---
+    asset_headers = {"API-KEY": api_key, "Authorization": f"Bearer {api_key}"}
+    return upload_images(image_parts, asset_headers)
+
+
+def _image_generation_context(raw_prompt, request_data):
+    """Contexte IMAGE_GENERATOR : aucune conversation, tous les paramètres d'image."""
+    logger.info("ORCHESTRATOR | Mode Génération d'Image activé")
+
+    # Construire prompt_object avec TOUS les paramètres
+    prompt_object = {
+        "prompt": raw_prompt,
+        "language": request_data.get("language", "English"),
+        "n": int(request_data.get("n", 1)),
+        "size": request_data.get("size", "1024x1024"),
+        # --- NOUVEAUX PARAMÈTRES POUR IMAGE ---
+        "aspect_ratio": request_data.get("aspect_ratio", "1:1"),
+        "output_format": request_data.get("output_format", "webp"),
+        "num_outputs": int(request_data.get("n", 1)),  # Même que 'n'
+        "style": request_data.get("style", ""),
+        "negative_prompt": request_data.get("negative_prompt", ""),
+        "mode": request_data.get("mode", "fast"),
+        "isNiji6": bool(request_data.get("is_niji6", False)),
+        "maintainModeration": bool(request_data.get("maintain_moderation", True)),
+        "aspect_width": int(request_data.get("aspect_width", 1)),
+        "aspect_height": int(request_data.get("aspect_height", 1)),
+    }
+
+    # Nettoyer les paramètres vides
+    prompt_object = {k: v for k, v in prompt_object.items() if v not in [None, "", 0, False]}
+
+    return {
+        "type": "IMAGE_GENERATOR",
+        "session_id": f"gen-{uuid.uuid4()}",
+        "image_paths": [],
+        "prompt_object": prompt_object,
+    }
+
+
+def _conversation_session(api_key, model_name, conv_type, messages, youtube_url, fallback):
+    """Conversation 1min.ai réutilisée ou créée ; `fallback` si la création échoue."""
+    session_id = get_or_create_conversation(
+        api_key, model_name, conv_type, messages, [], youtube_url
+    )
+    if not session_id:
+        logger.warning("ORCHESTRATOR | Session non créée. Utilisation de %s comme ID.", fallback)
+        session_id = fallback
+    return session_id
+
+
+def _history_session(api_key, model_name, conv_type, messages, raw_prompt):
+    """
+    Session et prompt d'un chat selon l'historique : replié dans le prompt
+    (HISTORY_MODE=pack), simple, ou porté par une conversation 1min.ai.
+    Retourne (session_id, prompt, tokens du prompt ou None).
+    """
+    # Cas 3: Historique replié dans le prompt (budget de tokens du modèle), sans conversation
+    if HISTORY_MODE == "pack":
+        return (conv_type, *pack_history(model_name, messages))
+
+    # Cas 4: Chat simple (sans historique complexe) - ON NE CRÉE PAS DE CONVERSATION
+    if len(messages) <= 2:  # Un ou deux messages max
+        # On utilise directement le type comme ID (ex: "CHAT_WITH_AI")
+        logger.info("ORCHESTRATOR | Mode simple - Utilisation du type comme ID: %s", conv_type)
+        return conv_type, raw_prompt, None
+
+    # Cas 5: Chat avec historique long - On crée une vraie conversation
+    logger.info("ORCHESTRATOR | Historique long détecté - Résolution conversation...")
+    session_id = _conversation_session(
+        api_key, model_name, conv_type, messages, None, fallback=conv_type
+    )
+    return session_id, raw_prompt, None
 
-    # Construction du prompt_object (commun à tous les cas SAUF Image Generation)
+
+def _chat_prompt_object(raw_prompt, request_data, image_paths):
+    """prompt_object commun à tous les cas SAUF Image Generation."""
     prompt_object = {
         "prompt": raw_prompt,
         "isMixed": bool(request_data.get("is_mixed", False)),
@@ -148,11 +248,71 @@ def resolve_conversation_context(api_key, model_name, messages, request_data=Non
         prompt_object["maxTokens"] = int(request_data.get("max_tokens", 300))
 
     # Nettoyer les paramètres vides
-    prompt_object = {k: v for k, v in prompt_object.items() if v not in [None, ""]}
+    return {k: v for k, v in prompt_object.items() if v not in [None, ""]}
 
-    return {
+
+def resolve_conversation_context(api_key, model_name, messages, request_data=None):
+    request_data = request_data or {}
+    conv_type = "CHAT_WITH_AI"
+    prompt_tokens = None
+
+    last_message = messages[-1] if messages else {}
+    raw_prompt, image_parts = _split_message_content(last_message.get("content", ""))
+
+    image_paths = _upload_message_images(api_key, image_parts)
+    if image_paths:
+        conv_type = "CHAT_WITH_IMAGE"
+
+    # --- NOUVELLE LOGIQUE : On ne crée PAS de conversation pour les cas simples ---
+
+    # Cas 1: Image Generation (AMÉLIORÉ avec plus de paramètres)
+    if request_data.get("content_type") == "IMAGE_GENERATOR":
+        return _image_generation_context(raw_prompt, request_data)
+
+    # Cas 2: YouTube (nécessite une vraie conversation)
+    yt_match = re.search(r"(https?://(?:www\.)?youtube\.com/watch\?v=[^\s&]+)", raw_prompt)
+    if yt_match:
+        youtube_url = yt_match.group(1)
+        conv_type = "CHAT_WITH_YOUTUBE_VIDEO"
+        logger.info("ORCHESTRATOR | Mode YouTube détecté: %s", youtube_url)
+
+        # Pour YouTube, on DOIT avoir une conversation (réutilisée d'un tour à l'autre)
+        session_id = _conversation_session(
+            api_key, model_name, conv_type, messages, youtube_url, fallback=str(uuid.uuid4())
+        )
+    else:
+        session_id, raw_prompt, prompt_tokens = _history_session(
+            api_key, model_name, conv_type, messages, raw_prompt
+        )
+
+    context = {
         "type": conv_type,
         "session_id": session_id,
         "image_paths": image_paths,
-        "prompt_object": prompt_object,
+        "prompt_object": _chat_prompt_object(raw_prompt, request_data, image_paths),
+    }
+    # Tokens déjà comptés message par message : le prompt n'est pas re-tokenisé
+    if prompt_tokens is not None:
+        context["prompt_tokens"] = prompt_tokens
+    return context
+
+
+def build_feature_request(api_key, model_name, context):
+    """
+    Construit le payload et les headers de l'appel /api/features
+    à partir d'un contexte résolu par resolve_conversation_context.
+    """
+    payload = {
+        "model": model_name,
+        "type": context["type"],
+        "conversationId": context["session_id"],
+        "promptObject": context["prompt_object"],
+    }
+
+    # API-KEY obligatoire pour 1min.ai
+    headers = {
+        "API-KEY": api_key,
+        "Authorization": f"Bearer {api_key}",
+        "Content-Type": "application/json",
     }
+    return payload, headers
@@ -0,0 +1,94 @@
+# src/application/session_cache.py
+
+"""
+Cache des conversations 1min.ai entre les tours d'un même dialogue.
+Les clients OpenAI renvoient tout l'historique à chaque tour : l'empreinte des messages
+déjà échangés permet de retrouver la conversation créée au tour précédent au lieu
+d'en recréer une (un aller-retour /api/conversations de moins par tour).
+"""
+
+import hashlib
+import json
+import logging
+
+from ..config import (
+    SESSION_CACHE_BACKEND,
+    SESSION_CACHE_ENABLED,
+    SESSION_CACHE_MAX_ENTRIES,
+    SESSION_CACHE_TTL,
+)
+from ..infrastructure.cache_service import build_cache
+from ..infrastructure.network_service import hash_api_key
+
+logger = logging.getLogger("1min-gateway.session-cache")
+
+
+def messages_fingerprint(messages):
+    """
+    Empreinte d'une liste de messages OpenAI (rôle + contenu, dans l'ordre).
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    for message in messages:
+        canonical = json.dumps(
+            [message.get("role"), message.get("content")],
+            sort_keys=True,
+            separators=(",", ":"),
+            default=str,
+        )
+        digest.update(canonical.encode("utf-8"))
+        digest.update(b"\x1e")
+    return digest.hexdigest()
+
+
+class SessionCache:
+    """Associe (clé API, modèle, type, historique) à l'UUID de conversation 1min.ai."""
+
+    def __init__(self, enabled, backend="memory", max_entries=4096, ttl=1800):
+        self.enabled = enabled
+        self._cache = (
+            build_cache("sessions", backend=backend, max_entries=max_entries, ttl=ttl)
+            if enabled
+            else None
+        )
+
+    @staticmethod
+    def _key(api_key, model_name, conv_type, messages, scope):
+        return ":".join(
+            (hash_api_key(api_key), model_name, conv_type, scope, messages_fingerprint(messages))
+        )
+
+    def lookup(self, api_key, model_name, conv_type, messages, scope=""):
+        """
+        Retourne la conversation dont l'historique est exactement `messages`, ou None.
+        Un historique vide ne correspond jamais à une conversation existante.
+        """
+        if not self.enabled or not messages:
+            return None
+        return self._cache.get(self._key(api_key, model_name, conv_type, messages, scope))
+
+    def remember(self, api_key, model_name, conv_type, messages, session_id, scope=""):
+        """Associe l'historique complet du tour courant à sa conversation."""
+        if not self.enabled or not session_id:
+            return
+        self._cache.set(self._key(api_key, model_name, conv_type, messages, scope), session_id)
+
+    def clear(self):
+        """Vide le cache (backend mémoire uniquement, utile pour les tests)."""
+        if self.enabled and hasattr(self._cache, "clear"):
+            self._cache.clear()
+
+    def stats(self):
+        if not self.enabled:
+            return {"enabled": False}
+        stats = self._cache.stats()
+        stats["enabled"] = True
+        return stats
+
+
+# --- INSTANCE GLOBALE ---
+session_cache = SessionCache(
+    SESSION_CACHE_ENABLED,
+    backend=SESSION_CACHE_BACKEND,
+    max_entries=SESSION_CACHE_MAX_ENTRIES,
+    ttl=SESSION_CACHE_TTL,
+)
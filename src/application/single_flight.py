@@ -0,0 +1,282 @@
+# src/application/single_flight.py
+
+"""
+Coalescence des requêtes identiques en vol (single-flight).
+Quand N clients envoient la même requête au même moment, un seul appel /api/features
+part vers 1min.ai : les réponses complètes sont partagées, les flux SSE sont diffusés
+à tous les abonnés via un tampon commun.
+"""
+
+import logging
+import threading
+
+from ..config import SINGLE_FLIGHT_ENABLED
+
+logger = logging.getLogger("1min-gateway.single-flight")
+
+
+class _Call:
+    """Appel non-streaming en cours, attendu par les requêtes identiques."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class StreamFanout:
+    """
+    Tampon de diffusion d'un flux amont vers plusieurs abonnés.
+
+    Aucun thread dédié : l'abonné qui arrive au bout du tampon lit l'élément
+    suivant de la source pour tout le monde. Le départ d'un abonné n'interrompt
+    donc pas les autres ; la source n'est fermée qu'une fois le dernier parti.
+    """
+
+    def __init__(self, on_finished=None):
+        self._cond = threading.Condition()
+        self._started = threading.Event()
+        self._source = None
+        self._items = []
+        self._finished = False
+        self._error = None
+        self._pumping = False
+        self._subscribers = 0
+        self._abandoned = False
+        self._on_finished = on_finished
+
+    def start(self, source):
+        """Attache l'itérateur amont (ouvert par l'abonné initial)."""
+        self._source = source
+        self._started.set()
+
+    def fail(self, error):
+        """L'ouverture du flux amont a échoué : tous les abonnés reçoivent l'erreur."""
+        with self._cond:
+            self._error = error
+            self._finished = True
+            self._cond.notify_all()
+        self._started.set()
+        self._finish()
+
+    def wait_started(self):
+        self._started.wait()
+        if self._source is None and self._error is not None:
+            raise self._error
+
+    def subscribe(self):
+        """
+        Nouvel abonné : relit le tampon depuis le début puis suit le flux.
+        None si le flux a été abandonné (tampon tronqué) : l'appelant en ouvre un autre.
+        """
+        with self._cond:
+            if self._abandoned:
+                return None
+            self._subscribers += 1
+        return _Subscription(self)
+
+    def _next(self, index):
+        """Élément `index` du flux ; StopIteration en fin de flux."""
+        while True:
+            with self._cond:
+                while index >= len(self._items) and not self._finished and self._pumping:
+                    self._cond.wait()
+                if index < len(self._items):
+                    return self._items[index]
+                if self._finished:
+                    if self._error is not None:
+                        raise self._error
+                    raise StopIteration
+                self._pumping = True
+
+            # Cet abonné lit la source pour tous les autres
+            self._pump()
+
+    def _pump(self):
+        """Lit l'élément suivant de la source et le publie (ou la fin du flux)."""
+        finished = False
+        try:
+            item = next(self._source)
+        except StopIteration:
+            finished = True
+        except Exception as e:
+            with self._cond:
+                self._error = e
+            finished = True
+        with self._cond:
+            if finished:
+                self._finished = True
+            else:
+                self._items.append(item)
+            self._pumping = False
+            self._cond.notify_all()
+        if finished:
+            self._finish()
+
+    def _unsubscribe(self):
+        with self._cond:
+            self._subscribers -= 1
+            abandoned = self._subscribers == 0 and not self._finished
+            if abandoned:
+                self._abandoned = self._finished = True
+        if abandoned:
+            # Retiré du registre avant la fermeture : une requête identique ouvre un
+            # nouvel appel au lieu de relire (et mettre en cache) un tampon tronqué
+            self._finish()
+            # Plus aucun client : on libère la connexion amont
+            close = getattr(self._source, "close", None)
+            if close:
+                close()
+
+    def _finish(self):
+        if self._on_finished:
+            self._on_finished(self)
+            self._on_finished = None
+
+
+class _Subscription:
+    """Itérateur d'un abonné ; close() le désabonne même s'il n'a jamais été lu."""
+
+    def __init__(self, fanout):
+        self._fanout = fanout
+        self._index = 0
+        self._closed = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._closed:
+            raise StopIteration
+        try:
+            item = self._fanout._next(self._index)
+        except BaseException:
+            self.close()
+            raise
+        self._index += 1
+        return item
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            self._fanout._unsubscribe()
+
+    def __del__(self):
+        # Abonné jamais itéré (client parti avant le premier octet)
+        self.close()
+
+
+class SingleFlight:
+    """Registre des appels en vol, indexés par empreinte de requête."""
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._streams = {}
+        self._counts = {"calls": 0, "coalesced": 0, "streams": 0, "stream_subscribers": 0}
+
+    def do(self, key, fn):
+        """
+        Exécute fn() une seule fois pour toutes les requêtes concurrentes de même clé
+        et partage son résultat (ou son exception).
+        """
+        if not self.enabled or key is None:
+            return fn()
+
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+                self._counts["calls"] += 1
+            else:
+                self._counts["coalesced"] += 1
+
+        if not leader:
+            logger.debug("SINGLE_FLIGHT | Requête rattachée à un appel en cours")
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    def stream(self, key, open_stream):
+        """
+        Retourne un itérateur des textes du flux pour cette requête.
+        open_stream() ouvre le flux amont (et lève si 1min.ai refuse) : il n'est
+        appelé que par le premier abonné, les suivants s'attachent à son tampon.
+        """
+        if not self.enabled or key is None:
+            return open_stream()
+
+        with self._lock:
+            fanout = self._streams.get(key)
+            subscription = fanout.subscribe() if fanout is not None else None
+            leader = subscription is None
+            if leader:
+                fanout = StreamFanout(on_finished=lambda f: self._discard_stream(key, f))
+                self._streams[key] = fanout
+                self._counts["streams"] += 1
+                subscription = fanout.subscribe()
+            else:
+                self._counts["stream_subscribers"] += 1
+
+        if leader:
+            try:
+                fanout.start(open_stream())
+            except BaseException as e:
+                fanout.fail(e)
+                raise
+        else:
+            logger.debug("SINGLE_FLIGHT | Abonnement à un flux en cours")
+            try:
+                fanout.wait_started()
+            except BaseException:
+                subscription.close()
+                raise
+        return subscription
+
+    def _discard_stream(self, key, fanout):
+        """Retire un flux terminé : les requêtes suivantes ouvriront un nouvel appel."""
+        with self._lock:
+            if self._streams.get(key) is fanout:
+                del self._streams[key]
+
+    def stats(self):
+        """Ratios de coalescence (part des requêtes servies sans appel amont dédié)."""
+        with self._lock:
+            counts = dict(self._counts)
+            in_flight = len(self._calls) + len(self._streams)
+
+        requests_total = counts["calls"] + counts["coalesced"]
+        streams_total = counts["streams"] + counts["stream_subscribers"]
+        return {
+            "enabled": self.enabled,
+            "in_flight": in_flight,
+            "calls": counts["calls"],
+            "coalesced": counts["coalesced"],
+            "coalescing_ratio": (
+                round(counts["coalesced"] / requests_total, 4) if requests_total else 0.0
+            ),
+            "streams": counts["streams"],
+            "stream_subscribers": counts["stream_subscribers"],
+            "stream_coalescing_ratio": (
+                round(counts["stream_subscribers"] / streams_total, 4) if streams_total else 0.0
+            ),
+        }
+
+
+# --- INSTANCE GLOBALE ---
+single_flight = SingleFlight(SINGLE_FLIGHT_ENABLED)
@@ -0,0 +1,559 @@
+# src/asgi.py
+
+"""Point d'entrée ASGI (asyncio) de la Gateway 1min.
+
+Sert /v1/chat/completions et /v1/models sur une boucle d'événements unique avec un
+client httpx asynchrone : un flux SSE n'immobilise plus un thread waitress, des milliers
+de flux peuvent partager la même boucle. L'orchestrateur, l'adaptateur OpenAI et le
+service d'erreurs sont ceux du mode WSGI ; les étapes bloquantes (upload d'images,
+création de conversation, tokenisation) sont déportées dans des threads.
+
+Usage: python main.py --asgi   (ou: uvicorn --factory src.asgi:create_asgi_app)
+"""
+
+import asyncio
+import json
+import logging
+import time
+
+import httpx
+
+from .adapters.openai_adapter import (
+    astream_response,
+    build_chat_completion,
+    extract_result_content,
+    replay_stream,
+    transform_response,
+)
+from .application.completion_cache import completion_cache
+from .application.model_catalog import model_catalog
+from .application.orchestrator import (
+    build_feature_request,
+    estimate_request_tokens,
+    resolve_conversation_context,
+)
+from .config import (
+    ASYNC_MAX_CONNECTIONS,
+    ASYNC_MAX_KEEPALIVE,
+    MODELS_CACHE_MAX_AGE,
+    ONE_MIN_FEATURE_API_URL,
+    UPSTREAM_CONCURRENCY_ENABLED,
+    UPSTREAM_CONCURRENCY_MIN,
+    UPSTREAM_CONNECT_TIMEOUT,
+    UPSTREAM_FEATURE_TIMEOUT,
+    UPSTREAM_LATENCY_TOLERANCE,
+    UPSTREAM_QUEUE_SIZE,
+    UPSTREAM_QUEUE_TIMEOUT,
+    UPSTREAM_STREAM_TIMEOUT,
+    UPSTREAM_THROTTLE_DEFAULT_SECONDS,
+    check_config_safety,
+    print_summary,
+)
+from .domain.conversation_service import HistoryTooLong
+from .factory import configure_logging
+from .infrastructure.circuit_breaker import CircuitOpenError, one_min_breaker
+from .infrastructure.concurrency_limiter import AdaptiveConcurrencyLimiter, GatewayOverloaded
+from .infrastructure.error_service import get_error_response
+from .infrastructure.metrics import GATEWAY_SHED
+from .infrastructure.network_service import build_response_headers, extract_api_key
+from .infrastructure.rate_limiter import RateLimitExceeded, key_rate_limiter
+from .infrastructure.token_service import calculate_token
+from .infrastructure.upstream_throttle import UpstreamThrottled, upstream_throttle
+
+logger = logging.getLogger("1min-gateway.asgi")
+
+FEATURE_TIMEOUT = httpx.Timeout(UPSTREAM_FEATURE_TIMEOUT, connect=UPSTREAM_CONNECT_TIMEOUT)
+STREAM_TIMEOUT = httpx.Timeout(UPSTREAM_STREAM_TIMEOUT, connect=UPSTREAM_CONNECT_TIMEOUT)
+
+# Concurrence adaptative du mode ASGI : pas de threads waitress à réserver, le plafond
+# est le pool httpx ; même AIMD, même file bornée et même délestage qu'en WSGI
+async_upstream_limiter = AdaptiveConcurrencyLimiter(
+    max_limit=ASYNC_MAX_CONNECTIONS,
+    min_limit=UPSTREAM_CONCURRENCY_MIN,
+    queue_size=UPSTREAM_QUEUE_SIZE,
+    queue_timeout=UPSTREAM_QUEUE_TIMEOUT,
+    latency_tolerance=UPSTREAM_LATENCY_TOLERANCE,
+    enabled=UPSTREAM_CONCURRENCY_ENABLED,
+)
+
+
+class RequestHeaders(dict):
+    """Headers ASGI indexés sans tenir compte de la casse."""
+
+    def __init__(self, raw_headers):
+        super().__init__(
+            (name.decode("latin-1").lower(), value.decode("latin-1")) for name, value in raw_headers
+        )
+
+    def get(self, key, default=None):
+        return super().get(key.lower(), default)
+
+    def __contains__(self, key):
+        return super().__contains__(key.lower())
+
+
+def _encode_headers(headers):
+    return [
+        (name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in headers.items()
+    ]
+
+
+async def _send_body(send, status, body, headers):
+    """Envoie une réponse complète (headers + corps)."""
+    headers = dict(headers)
+    headers["Content-Length"] = str(len(body))
+    await send(
+        {"type": "http.response.start", "status": status, "headers": _encode_headers(headers)}
+    )
+    await send({"type": "http.response.body", "body": body})
+
+
+async def _send_json(send, status, data):
+    await _send_body(send, status, json.dumps(data).encode("utf-8"), build_response_headers())
+
+
+async def _send_error(send, code, model=None):
+    error_payload, status = get_error_response(code, model=model)
+    await _send_json(send, status, {"error": error_payload})
+
+
+async def _send_retry_after(send, code, retry_after, model=None):
+    """Erreur (429, 503) accompagnée du délai d'attente conseillé au client."""
+    error_payload, status = get_error_response(code, model=model)
+    headers = build_response_headers()
+    headers["Retry-After"] = str(retry_after)
+    await _send_body(send, status, json.dumps({"error": error_payload}).encode("utf-8"), headers)
+
+
+async def _send_catalog(scope, send, body, etag):
+    """Corps pré-sérialisé du catalogue des modèles, ou 304 si le client a déjà cet ETag."""
+    quoted = f'"{etag}"'
+    headers = build_response_headers()
+    headers["ETag"] = quoted
+    headers["Cache-Control"] = f"public, max-age={MODELS_CACHE_MAX_AGE}"
+    if_none_match = RequestHeaders(scope.get("headers", [])).get("if-none-match", "")
+    if quoted in (tag.strip() for tag in if_none_match.split(",")):
+        await _send_body(send, 304, b"", headers)
+        return
+    await _send_body(send, 200, body, headers)
+
+
+async def _read_body(receive):
+    """Lit le corps complet de la requête."""
+    chunks = []
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            break
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            break
+    return b"".join(chunks)
+
+
+async def _wait_for_disconnect(receive, disconnected):
+    """Signale la déconnexion du client pendant un flux."""
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            disconnected.set()
+            return
+
+
+async def _read_chat_request(scope, receive, send):
+    """
+    Authentification (Bearer + API-KEY) et lecture du corps JSON ; retourne
+    (api_key, request_data), ou None après avoir envoyé l'erreur au client.
+    """
+    api_key = extract_api_key(RequestHeaders(scope.get("headers", [])))
+    body = await _read_body(receive)
+
+    if not api_key:
+        logger.warning("AUTH | Tentative d'accès sans clé API valide.")
+        await _send_error(send, 1021)
+        return None
+
+    try:
+        request_data = json.loads(body) if body else {}
+    except ValueError:
+        request_data = {}
+    if not isinstance(request_data, dict):
+        request_data = {}
+
+    if not request_data.get("messages"):
+        await _send_error(send, 1412)
+        return None
+    return api_key, request_data
+
+
+async def _relay_stream(receive, send, res_stream, model_name, prompt_token_count):
+    """Relaie les chunks SSE jusqu'à la fin du flux amont ou la déconnexion du client."""
+    disconnected = asyncio.Event()
+    watcher = asyncio.create_task(_wait_for_disconnect(receive, disconnected))
+    chunks = astream_response(res_stream, model_name, int(prompt_token_count))
+    try:
+        async for chunk in chunks:
+            if disconnected.is_set():
+                logger.info("ASGI | Client déconnecté, arrêt du flux %s", model_name)
+                break
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+    finally:
+        # Ferme le flux amont même si le client est parti en cours de route
+        await chunks.aclose()
+        watcher.cancel()
+
+
+def _log_failure(exc):
+    if isinstance(exc, httpx.HTTPError):
+        logger.error("UPSTREAM_ERROR | Erreur API 1min.ai: %s", exc)
+    else:
+        logger.error("FATAL_ERROR | Type: %s | Msg: %s", type(exc).__name__, exc)
+
+
+async def _send_failure(send, exc, model_name):
+    """Traduit une erreur survenue avant la réponse en réponse client (400, 429, 503, 500)."""
+    if isinstance(exc, RateLimitExceeded):
+        logger.warning("RATE_LIMIT | Quota de la clé API atteint (%s)", exc.reason)
+        await _send_retry_after(send, 1429, exc.retry_after)
+    elif isinstance(exc, GatewayOverloaded):
+        logger.warning("OVERLOAD | Requête délestée (%s)", exc.reason)
+        GATEWAY_SHED.inc(exc.reason.replace(" ", "_"))
+        await _send_retry_after(send, 1529, exc.retry_after)
+    elif isinstance(exc, UpstreamThrottled):
+        logger.warning("THROTTLE | Clé API limitée par 1min.ai (%s)", exc.endpoint)
+        await _send_retry_after(send, 1430, exc.retry_after, model=model_name)
+    elif isinstance(exc, CircuitOpenError):
+        logger.error("CIRCUIT_OPEN | Requête refusée: %s", exc)
+        await _send_retry_after(send, 1503, exc.retry_after, model=model_name)
+    elif isinstance(exc, HistoryTooLong):
+        logger.warning("HISTORY | %s", exc)
+        await _send_error(send, 1415, model=model_name)
+    else:
+        _log_failure(exc)
+        await _send_error(send, 500, model=model_name)
+
+
+async def _acquire_upstream_slot():
+    """
+    Place dans la concurrence amont : immédiate si libre, sinon l'attente bornée (bloquante)
+    passe dans un thread. Si la requête est annulée pendant l'attente, la place accordée
+    ensuite est rendue aussitôt.
+    """
+    release = async_upstream_limiter.try_acquire()
+    if release is not None:
+        return release
+    waiting = asyncio.ensure_future(asyncio.to_thread(async_upstream_limiter.acquire))
+    try:
+        return await asyncio.shield(waiting)
+    except asyncio.CancelledError:
+        waiting.add_done_callback(
+            lambda done: done.cancelled() or done.exception() or done.result()()
+        )
+        raise
+
+
+def _admit_upstream_call(api_key):
+    """Refuse l'appel si la clé est en pause 429 ou si le circuit 1min.ai est ouvert."""
+    if api_key:
+        upstream_throttle.check(api_key, "features")
+    one_min_breaker.guard()
+
+
+def _record_upstream_call(api_key, status, headers):
+    """Issue de l'appel pour le circuit breaker ; retourne la pause annoncée par 1min.ai."""
+    if status >= 500:
+        one_min_breaker.call_failed()
+    else:
+        one_min_breaker.call_succeeded()
+    if not api_key:
+        return None
+    return upstream_throttle.observe(api_key, "features", status, headers)
+
+
+class GatewayASGI:
+    """Application ASGI minimale exposant les routes OpenAI de la Gateway."""
+
+    def __init__(self, http_client=None):
+        """
+        Args:
+            http_client: httpx.AsyncClient à utiliser (créé au démarrage si absent).
+        """
+        self._client = http_client
+
+    def _get_client(self):
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=ASYNC_MAX_CONNECTIONS,
+                    max_keepalive_connections=ASYNC_MAX_KEEPALIVE,
+                ),
+                headers={"User-Agent": "1min-Gateway/1.0"},
+            )
+        return self._client
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+
+        path, method = scope["path"], scope["method"]
+
+        if path == "/v1/chat/completions":
+            if method == "OPTIONS":
+                await self._options(send)
+            elif method == "POST":
+                await self.chat_completions(scope, receive, send)
+            else:
+                await _send_error(send, 1405)
+        elif path == "/v1/models" and method == "GET":
+            await _send_catalog(scope, send, *model_catalog.listing())
+        elif path.startswith("/v1/models/") and method == "GET":
+            await self.retrieve_model(scope, send, path[len("/v1/models/") :])
+        elif path == "/":
+            await _send_body(
+                send, 200, b"1min-Gateway is running", {"Content-Type": "text/plain; charset=utf-8"}
+            )
+        else:
+            await _send_body(send, 404, b"Not Found", {"Content-Type": "text/plain; charset=utf-8"})
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                self._get_client()
+                logger.info("ASGI | Client httpx prêt (max %d connexions)", ASYNC_MAX_CONNECTIONS)
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                if self._client is not None:
+                    await self._client.aclose()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _options(self, send):
+        """Pré-vol CORS, identique à handle_options_request."""
+        headers = build_response_headers()
+        headers.pop("Content-Type")
+        headers["Access-Control-Allow-Headers"] = "Content-Type,Authorization"
+        headers["Access-Control-Allow-Methods"] = "POST, GET, OPTIONS"
+        await _send_body(send, 204, b"", headers)
+
+    async def retrieve_model(self, scope, send, model_id):
+        """Détail d'un modèle, servi depuis l'index précalculé."""
+        found = model_catalog.get(model_id)
+        if found is None:
+            await _send_error(send, 1002, model=model_id)
+            return
+        await _send_catalog(scope, send, *found)
+
+    async def chat_completions(self, scope, receive, send):
+        """Endpoint principal compatible OpenAI Chat Completions (asynchrone)."""
+        request = await _read_chat_request(scope, receive, send)
+        if request is None:
+            return
+        api_key, request_data = request
+        model_name = request_data.get("model", "gpt-4o")
+        try:
+            await self._complete_chat(send, receive, api_key, model_name, request_data)
+        except Exception as exc:
+            await _send_failure(send, exc, model_name)
+
+    async def _complete_chat(self, send, receive, api_key, model_name, request_data):
+        """Quota et créneau de flux de la clé, puis orchestration et appel amont."""
+        # --- 2bis. Quota de la clé API (coût pondéré par les tokens estimés) ---
+        # Stockage Memcached par défaut (gets/cas bloquants) : hors de la boucle
+        await asyncio.to_thread(
+            key_rate_limiter.acquire,
+            api_key,
+            key_rate_limiter.request_cost(estimate_request_tokens(request_data["messages"])),
+        )
+
+        # Créneau de flux de la clé, réservé avant l'orchestration : une clé au-delà de
+        # son plafond n'a créé ni conversation ni upload chez 1min.ai
+        release_stream = None
+        if request_data.get("stream", False):
+            release_stream = await asyncio.to_thread(key_rate_limiter.open_stream, api_key)
+        try:
+            await self._resolve_and_send(send, receive, api_key, model_name, request_data)
+        finally:
+            if release_stream is not None:
+                # Rendu quelle que soit l'issue (le flux est relayé jusqu'au bout avant)
+                await asyncio.to_thread(release_stream)
+
+    async def _resolve_and_send(self, send, receive, api_key, model_name, request_data):
+        """Orchestration, cache puis appel amont (JSON ou flux)."""
+        messages = request_data["messages"]
+
+        # --- 3. Orchestration (bloquante : uploads, conversations) hors de la boucle ---
+        context = await asyncio.to_thread(
+            resolve_conversation_context, api_key, model_name, messages, request_data
+        )
+
+        if not context or not context.get("session_id") or "prompt_object" not in context:
+            logger.error("ORCHESTRATOR | Contexte invalide pour %s", model_name)
+            await _send_error(send, 500, model=model_name)
+            return
+
+        prompt = context.get("prompt_object", {}).get("prompt", "")
+        prompt_token_count = context.get("prompt_tokens")
+        if prompt_token_count is None:
+            prompt_token_count = await asyncio.to_thread(calculate_token, prompt, model_name)
+        payload, headers = build_feature_request(api_key, model_name, context)
+
+        # --- 4. Cache des complétions déterministes (opt-in) ---
+        cache_key = completion_cache.key_for(api_key, model_name, context, request_data)
+        # Backend memcached : E/S réseau bloquantes, hors de la boucle
+        cached = await asyncio.to_thread(completion_cache.lookup, cache_key) if cache_key else None
+        if cached:
+            logger.info("CACHE | HIT (ASGI) | Model: %s | Conv: %s", model_name, context["type"])
+            await self._send_cached(
+                send, cached, model_name, prompt_token_count, request_data.get("stream", False)
+            )
+            return
+
+        # --- 5. Exécution de l'appel ---
+        if request_data.get("stream", False):
+            logger.info(
+                "API_CALL | Mode: Stream (ASGI) | Model: %s | Conv: %s", model_name, context["type"]
+            )
+            await self._stream_completion(
+                send, receive, model_name, payload, headers, prompt_token_count
+            )
+        else:
+            logger.info(
+                "API_CALL | Mode: Normal (ASGI) | Model: %s | Conv: %s",
+                model_name,
+                context["type"],
+            )
+            await self._send_completion(
+                send, model_name, payload, headers, prompt_token_count, cache_key
+            )
+
+    async def _send_completion(
+        self, send, model_name, payload, headers, prompt_token_count, cache_key
+    ):
+        """Complétion non-streaming : réponse JSON complète, mise en cache si éligible."""
+        res = await self._send_upstream(
+            self._get_client().build_request(
+                "POST",
+                ONE_MIN_FEATURE_API_URL,
+                json=payload,
+                headers=headers,
+                timeout=FEATURE_TIMEOUT,
+            )
+        )
+        res.raise_for_status()
+        one_min_response = res.json()
+        transformed = await asyncio.to_thread(
+            transform_response, one_min_response, model_name, prompt_token_count
+        )
+        if cache_key and extract_result_content(one_min_response) is not None:
+            await asyncio.to_thread(
+                completion_cache.store,
+                cache_key,
+                transformed["choices"][0]["message"]["content"],
+                transformed["usage"]["completion_tokens"],
+            )
+        await _send_json(send, 200, transformed)
+
+    async def _stream_completion(
+        self, send, receive, model_name, payload, headers, prompt_token_count
+    ):
+        """Complétion en flux SSE, relayée jusqu'à la fin du flux amont."""
+        upstream_request = self._get_client().build_request(
+            "POST",
+            f"{ONE_MIN_FEATURE_API_URL}?isStreaming=true",
+            json=payload,
+            headers=headers,
+            timeout=STREAM_TIMEOUT,
+        )
+        res_stream = await self._send_upstream(upstream_request, stream=True)
+        if res_stream.is_error:
+            await res_stream.aclose()
+            res_stream.raise_for_status()
+
+        response_headers = build_response_headers()
+        response_headers["Content-Type"] = "text/event-stream"
+        response_headers["Cache-Control"] = "no-cache"
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": _encode_headers(response_headers),
+            }
+        )
+        try:
+            await _relay_stream(receive, send, res_stream, model_name, prompt_token_count)
+        except Exception as exc:
+            # Flux déjà commencé : plus de réponse d'erreur possible, fin propre
+            _log_failure(exc)
+        await send({"type": "http.response.body", "body": b""})
+
+    async def _send_upstream(self, upstream_request, stream=False):
+        """
+        Appel /api/features soumis à la concurrence adaptative, au circuit breaker et aux
+        pauses 429 de 1min.ai (comme upstream_client). L'état du breaker et des pauses
+        peut être partagé via Memcached (lecture bloquante sous verrou) : hors de la boucle.
+        """
+        api_key = upstream_request.headers.get("API-KEY")
+        release = await _acquire_upstream_slot()
+        try:
+            await asyncio.to_thread(_admit_upstream_call, api_key)
+            started = time.perf_counter()
+            try:
+                response = await self._get_client().send(upstream_request, stream=stream)
+            except httpx.TransportError:
+                async_upstream_limiter.on_overload("error")
+                await asyncio.to_thread(one_min_breaker.call_failed)
+                raise
+            # En flux, la place ne couvre que l'attente des en-têtes : un flux ouvert
+            # n'immobilise aucun thread en ASGI
+            latency = time.perf_counter() - started
+        finally:
+            release()
+
+        status = response.status_code
+        if status == 429 or status >= 500:
+            async_upstream_limiter.on_overload(str(status))
+        elif status < 400:
+            async_upstream_limiter.on_success(latency)
+        retry_after = await asyncio.to_thread(
+            _record_upstream_call, api_key, status, response.headers
+        )
+        if response.status_code == 429:
+            await response.aclose()
+            raise UpstreamThrottled(
+                "features", retry_after or UPSTREAM_THROTTLE_DEFAULT_SECONDS, True
+            )
+        return response
+
+    async def _send_cached(self, send, cached, model_name, prompt_token_count, is_stream):
+        """Sert une complétion depuis le cache (JSON ou flux SSE synthétique)."""
+        content = cached["content"]
+        completion_tokens = cached.get("completion_tokens", 0)
+        headers = build_response_headers()
+        headers["X-Cache"] = "HIT"
+        if is_stream:
+            headers["Content-Type"] = "text/event-stream"
+            headers["Cache-Control"] = "no-cache"
+            body = b"".join(
+                replay_stream(content, model_name, int(prompt_token_count), completion_tokens)
+            )
+        else:
+            completion = build_chat_completion(
+                content, model_name, prompt_token_count, completion_tokens
+            )
+            body = json.dumps(completion).encode("utf-8")
+        await _send_body(send, 200, body, headers)
+
+
+def create_asgi_app(http_client=None):
+    """
+    Application Factory du mode ASGI (logging, contrôles de configuration, résumé).
+    Rien n'est construit à l'import du module : uvicorn appelle la fabrique (factory=True).
+    """
+    configure_logging()
+    check_config_safety()
+    print_summary()
+    return GatewayASGI(http_client=http_client)
@@ -9,6 +9,9 @@ from typing import Final, List, Set
 
 from dotenv import load_dotenv
 
+from .domain.models import AVAILABLE_MODELS as CATALOG_MODELS
+from .domain.models import IMAGE_GENERATION_MODELS
+
 # Initialisation du logging
 logger = logging.getLogger("1min-gateway.config")
 load_dotenv()
@@ -26,16 +29,9 @@ class Defaults:
     # Modèles par défaut si la config est erronée
     MODELS: Final[List[str]] = ["gpt-4o-mini", "open-mistral-nemo"]
 
-    # Référence complète des modèles supportés (évite les imports circulaires)
-    SUPPORTED_MODELS: Final[List[str]] = [
-        "gpt-4o-mini",
-        "gpt-4o",
-        "claude-3-haiku",
-        "claude-3-5-sonnet",
-        "gemini-1.5-flash",
-        "open-mistral-nemo",
-        "deepseek-chat",
-    ]
+    # Référence complète des modèles supportés : le catalogue du domaine (chat et
+    # génération d'images), seule source de vérité (domain/models.py n'importe rien)
+    SUPPORTED_MODELS: Final[List[str]] = CATALOG_MODELS + IMAGE_GENERATION_MODELS
 
     TRUTHY_VALUES: Final[Set[str]] = {"true", "1", "yes", "on", "enabled"}
     LOG_LEVELS: Final[Set[str]] = {"DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"}
@@ -49,6 +45,50 @@ def get_bool(key: str, default: str = "false") -> bool:
     return os.getenv(key, default).lower() in Defaults.TRUTHY_VALUES
 
 
+def get_int(key: str, default: int, minimum: int = 0) -> int:
+    """Convertit une variable d'environnement en entier borné inférieurement."""
+    raw = os.getenv(key, str(default))
+    try:
+        value = int(raw)
+        if value >= minimum:
+            return value
+        logger.warning(
+            "%s=%d inférieur à %d. Utilisation du défaut: %d", key, value, minimum, default
+        )
+    except ValueError:
+        logger.warning("%s invalide '%s'. Utilisation du défaut: %d", key, raw, default)
+    return default
+
+
+def get_float(key: str, default: float, minimum: float = 0.0, maximum: float = 1.0) -> float:
+    """Convertit une variable d'environnement en nombre décimal borné."""
+    raw = os.getenv(key, str(default))
+    try:
+        value = float(raw)
+        if minimum <= value <= maximum:
+            return value
+        logger.warning(
+            "%s=%s hors de [%s, %s]. Utilisation du défaut: %s",
+            key,
+            value,
+            minimum,
+            maximum,
+            default,
+        )
+    except ValueError:
+        logger.warning("%s invalide '%s'. Utilisation du défaut: %s", key, raw, default)
+    return default
+
+
+def get_choice(key: str, default: str, choices: Set[str]) -> str:
+    """Lit une variable d'environnement restreinte à un ensemble de valeurs."""
+    value = os.getenv(key, default).strip().lower()
+    if value in choices:
+        return value
+    logger.warning("%s invalide '%s'. Utilisation du défaut: %s", key, value, default)
+    return default
+
+
 def get_validated_port() -> int:
     """Récupère et valide le port réseau (1-65535)."""
     port_str = os.getenv("PORT", str(Defaults.PORT))
@@ -86,6 +126,164 @@ ONE_MIN_FEATURE_API_URL: Final[str] = f"{ONE_MIN_BASE_URL}/api/features"
 ONE_MIN_CONVERSATION_API_URL: Final[str] = f"{ONE_MIN_BASE_URL}/api/conversations"
 ONE_MIN_ASSET_API_URL: Final[str] = f"{ONE_MIN_BASE_URL}/api/assets"
 
+# --- SERVEUR & CLIENT AMONT (POOL HTTP) ---
+SERVER_THREADS: Final[int] = get_int("SERVER_THREADS", 8, minimum=1)
+
+# Mode pre-fork (POSIX) : processus waitress partageant le socket d'écoute
+WORKERS: Final[int] = get_int("WORKERS", 1, minimum=1)
+# Délai laissé à un worker arrêté pour terminer ses requêtes (flux SSE compris)
+WORKER_GRACEFUL_TIMEOUT: Final[int] = get_int("WORKER_GRACEFUL_TIMEOUT", 30, minimum=1)
+
+# Taille du pool keep-alive vers 1min.ai : un socket par thread waitress par défaut
+UPSTREAM_POOL_SIZE: Final[int] = get_int("UPSTREAM_POOL_SIZE", SERVER_THREADS, minimum=1)
+UPSTREAM_CONNECT_TIMEOUT: Final[int] = get_int("UPSTREAM_CONNECT_TIMEOUT", 5, minimum=1)
+UPSTREAM_FEATURE_TIMEOUT: Final[int] = get_int("UPSTREAM_FEATURE_TIMEOUT", 60, minimum=1)
+UPSTREAM_STREAM_TIMEOUT: Final[int] = get_int("UPSTREAM_STREAM_TIMEOUT", 300, minimum=1)
+UPSTREAM_CONVERSATION_TIMEOUT: Final[int] = get_int("UPSTREAM_CONVERSATION_TIMEOUT", 20, minimum=1)
+UPSTREAM_ASSET_TIMEOUT: Final[int] = get_int("UPSTREAM_ASSET_TIMEOUT", 30, minimum=1)
+UPSTREAM_DOWNLOAD_TIMEOUT: Final[int] = get_int("UPSTREAM_DOWNLOAD_TIMEOUT", 20, minimum=1)
+UPSTREAM_FEATURE_RETRIES: Final[int] = get_int("UPSTREAM_FEATURE_RETRIES", 2)
+UPSTREAM_CONVERSATION_RETRIES: Final[int] = get_int("UPSTREAM_CONVERSATION_RETRIES", 3)
+UPSTREAM_ASSET_RETRIES: Final[int] = get_int("UPSTREAM_ASSET_RETRIES", 2)
+
+# Mode ASGI (asyncio) : connexions simultanées vers 1min.ai partagées par la boucle
+ASYNC_MAX_CONNECTIONS: Final[int] = get_int("ASYNC_MAX_CONNECTIONS", 1000, minimum=1)
+ASYNC_MAX_KEEPALIVE: Final[int] = get_int("ASYNC_MAX_KEEPALIVE", 100, minimum=1)
+
+# Uploads d'images simultanés vers /api/assets (plafond partagé par toutes les requêtes)
+IMAGE_UPLOAD_CONCURRENCY: Final[int] = get_int("IMAGE_UPLOAD_CONCURRENCY", 4, minimum=1)
+# Taille d'une image gardée en mémoire avant débordement sur un fichier temporaire
+IMAGE_SPOOL_MEMORY_BYTES: Final[int] = get_int("IMAGE_SPOOL_MEMORY_BYTES", 1024 * 1024)
+
+# --- CIRCUIT BREAKER (API 1MIN.AI) ---
+# Ouverture quand, sur la fenêtre glissante, le nombre d'échecs atteint le seuil
+# ET que le taux d'échec atteint BREAKER_FAILURE_RATE
+BREAKER_FAILURE_THRESHOLD: Final[int] = get_int("BREAKER_FAILURE_THRESHOLD", 5, minimum=1)
+BREAKER_FAILURE_RATE: Final[float] = get_float("BREAKER_FAILURE_RATE", 0.5)
+BREAKER_WINDOW_SECONDS: Final[int] = get_int("BREAKER_WINDOW_SECONDS", 60, minimum=1)
+BREAKER_OPEN_SECONDS: Final[int] = get_int("BREAKER_OPEN_SECONDS", 60, minimum=1)
+BREAKER_HALF_OPEN_PROBES: Final[int] = get_int("BREAKER_HALF_OPEN_PROBES", 1, minimum=1)
+BREAKER_BACKEND: Final[str] = get_choice("BREAKER_BACKEND", "memory", {"memory", "memcached"})
+
+# --- LIMITATIONS DE DÉBIT DE 1MIN.AI (429, RETRY-AFTER) ---
+# Pause par clé API et endpoint annoncée par 1min.ai : appels suspendus jusqu'à réouverture
+UPSTREAM_THROTTLE_BACKEND: Final[str] = get_choice(
+    "UPSTREAM_THROTTLE_BACKEND", "memory", {"memory", "memcached"}
+)
+# Pause sur un 429 sans Retry-After ni Reset, et pause maximale acceptée d'un en-tête
+UPSTREAM_THROTTLE_DEFAULT_SECONDS: Final[int] = get_int(
+    "UPSTREAM_THROTTLE_DEFAULT_SECONDS", 5, minimum=1
+)
+UPSTREAM_THROTTLE_MAX_SECONDS: Final[int] = get_int("UPSTREAM_THROTTLE_MAX_SECONDS", 300, minimum=1)
+
+# --- CONCURRENCE ADAPTATIVE VERS 1MIN.AI (AIMD, FILE BORNÉE, DÉLESTAGE) ---
+UPSTREAM_CONCURRENCY_ENABLED: Final[bool] = get_bool("UPSTREAM_CONCURRENCY_ENABLED", "true")
+# Threads waitress jamais occupés par les complétions : / (health), /v1/models, /metrics
+UPSTREAM_PRIORITY_THREADS: Final[int] = get_int("UPSTREAM_PRIORITY_THREADS", 2)
+# Plancher de la limite adaptative d'appels simultanés
+UPSTREAM_CONCURRENCY_MIN: Final[int] = get_int("UPSTREAM_CONCURRENCY_MIN", 1, minimum=1)
+# Requêtes en attente d'une place au plus, et attente maximale (s) avant délestage (503)
+UPSTREAM_QUEUE_SIZE: Final[int] = get_int("UPSTREAM_QUEUE_SIZE", SERVER_THREADS)
+UPSTREAM_QUEUE_TIMEOUT: Final[int] = get_int("UPSTREAM_QUEUE_TIMEOUT", 10)
+# Réduction de la limite quand la latence récente dépasse N fois la latence de référence
+UPSTREAM_LATENCY_TOLERANCE: Final[float] = get_float(
+    "UPSTREAM_LATENCY_TOLERANCE", 2.0, minimum=1.0, maximum=10.0
+)
+
+# --- LIMITATION DE DÉBIT ---
+RATELIMIT_ENABLED: Final[bool] = get_bool("RATELIMIT_ENABLED", "true")
+# Quotas de /v1/chat/completions par clé API (empreinte de la clé, jamais la clé brute)
+# token-bucket   : RATELIMIT_KEY_RATE unités par minute, rafales jusqu'à RATELIMIT_KEY_BURST
+# sliding-window : au plus RATELIMIT_KEY_RATE unités sur toute fenêtre de 60 secondes
+RATELIMIT_KEY_STRATEGY: Final[str] = get_choice(
+    "RATELIMIT_KEY_STRATEGY", "token-bucket", {"token-bucket", "sliding-window"}
+)
+RATELIMIT_KEY_RATE: Final[int] = get_int("RATELIMIT_KEY_RATE", 180, minimum=1)
+RATELIMIT_KEY_BURST: Final[int] = get_int("RATELIMIT_KEY_BURST", 60, minimum=1)
+# Tokens de prompt estimés valant une unité de quota (0 = une unité par requête)
+RATELIMIT_TOKENS_PER_REQUEST: Final[int] = get_int("RATELIMIT_TOKENS_PER_REQUEST", 1000)
+# Flux (stream=true) ouverts simultanément par clé API (0 = illimité)
+RATELIMIT_MAX_STREAMS_PER_KEY: Final[int] = get_int("RATELIMIT_MAX_STREAMS_PER_KEY", 8)
+# Stockage des quotas : memcached (partagé entre workers et réplicas) ou memory
+RATELIMIT_BACKEND: Final[str] = get_choice(
+    "RATELIMIT_BACKEND", "memcached", {"memory", "memcached"}
+)
+
+# Chargement des tokenizers en tâche de fond au démarrage du serveur
+TOKENIZER_PREWARM: Final[bool] = get_bool("TOKENIZER_PREWARM", "true")
+
+# Durée (s) pendant laquelle un client peut réutiliser /v1/models sans revalider (ETag)
+MODELS_CACHE_MAX_AGE: Final[int] = get_int("MODELS_CACHE_MAX_AGE", 300)
+
+# --- JOURNALISATION (FILE D'ATTENTE + THREAD D'ÉCRITURE) ---
+LOG_LEVEL: Final[str] = get_choice(
+    "LOG_LEVEL", Defaults.LOG_LEVEL.lower(), {level.lower() for level in Defaults.LOG_LEVELS}
+).upper()
+# json : une ligne JSON par enregistrement (console et fichier) ; text : console colorée
+LOG_FORMAT: Final[str] = get_choice("LOG_FORMAT", "json", {"json", "text"})
+LOG_FILE: Final[str] = os.getenv("LOG_FILE", "logs/api.log")
+# Enregistrements en attente d'écriture au plus ; au-delà ils sont perdus (et comptés)
+LOG_QUEUE_SIZE: Final[int] = get_int("LOG_QUEUE_SIZE", 10000, minimum=1)
+# Échantillonnage des lignes < WARNING par logger : "1min-gateway.routes=0.1,..."
+LOG_SAMPLING: Final[str] = os.getenv("LOG_SAMPLING", "")
+
+# --- MEMCACHED (LIMITEUR, CACHES PARTAGÉS) ---
+MEMCACHED_HOST: Final[str] = os.getenv("MEMCACHED_HOST", "memcached")
+MEMCACHED_PORT: Final[int] = get_int("MEMCACHED_PORT", 11211, minimum=1)
+
+# --- CACHE DES COMPLÉTIONS (OPT-IN) ---
+COMPLETION_CACHE_ENABLED: Final[bool] = get_bool("COMPLETION_CACHE_ENABLED", "false")
+COMPLETION_CACHE_BACKEND: Final[str] = get_choice(
+    "COMPLETION_CACHE_BACKEND", "memory", {"memory", "memcached"}
+)
+COMPLETION_CACHE_TTL: Final[int] = get_int("COMPLETION_CACHE_TTL", 300, minimum=1)
+COMPLETION_CACHE_MAX_ENTRIES: Final[int] = get_int("COMPLETION_CACHE_MAX_ENTRIES", 1024, minimum=1)
+COMPLETION_CACHE_MAX_BYTES: Final[int] = get_int(
+    "COMPLETION_CACHE_MAX_BYTES", 32 * 1024 * 1024, minimum=1024
+)
+
+# --- COALESCENCE DES REQUÊTES IDENTIQUES EN VOL (SINGLE-FLIGHT) ---
+SINGLE_FLIGHT_ENABLED: Final[bool] = get_bool("SINGLE_FLIGHT_ENABLED", "true")
+
+# --- REQUÊTES DE COUVERTURE (HEDGING, OPT-IN) ---
+# Complétion non-streaming sans état amont encore sans réponse au p95 du modèle :
+# un second appel identique part, la première réponse l'emporte
+HEDGE_ENABLED: Final[bool] = get_bool("HEDGE_ENABLED", "false")
+# Appels de couverture au plus, en pourcentage des requêtes éligibles
+HEDGE_BUDGET_PERCENT: Final[float] = get_float(
+    "HEDGE_BUDGET_PERCENT", 5.0, minimum=0.0, maximum=100.0
+)
+# Latences observées avant d'apprendre le p95 d'un modèle, et délai minimal (s) de couverture
+HEDGE_MIN_SAMPLES: Final[int] = get_int("HEDGE_MIN_SAMPLES", 20, minimum=1)
+HEDGE_MIN_DELAY: Final[float] = get_float("HEDGE_MIN_DELAY", 0.5, minimum=0.0, maximum=60.0)
+
+# --- CACHE DES SESSIONS (CONVERSATIONS 1MIN.AI RÉUTILISÉES ENTRE LES TOURS) ---
+SESSION_CACHE_ENABLED: Final[bool] = get_bool("SESSION_CACHE_ENABLED", "true")
+SESSION_CACHE_BACKEND: Final[str] = get_choice(
+    "SESSION_CACHE_BACKEND", "memory", {"memory", "memcached"}
+)
+SESSION_CACHE_TTL: Final[int] = get_int("SESSION_CACHE_TTL", 1800, minimum=1)
+SESSION_CACHE_MAX_ENTRIES: Final[int] = get_int("SESSION_CACHE_MAX_ENTRIES", 4096, minimum=1)
+
+# --- HISTORIQUE DES MESSAGES ---
+# conversation : seul le dernier message est envoyé, l'historique passe par une
+#                conversation 1min.ai (créée ou réutilisée)
+# pack         : l'historique est replié dans le prompt, dans le budget de tokens du
+#                modèle (tours les plus anciens retirés), sans conversation 1min.ai
+HISTORY_MODE: Final[str] = get_choice("HISTORY_MODE", "conversation", {"conversation", "pack"})
+# Tokens laissés à la réponse dans la fenêtre de contexte du modèle
+HISTORY_RESPONSE_RESERVE: Final[int] = get_int("HISTORY_RESPONSE_RESERVE", 4096)
+# Plafond du prompt replié, quel que soit le modèle (0 = fenêtre du modèle)
+HISTORY_MAX_TOKENS: Final[int] = get_int("HISTORY_MAX_TOKENS", 0)
+
+# --- CACHE DES ASSETS (IMAGES DÉJÀ UPLOADÉES SUR 1MIN.AI) ---
+ASSET_CACHE_ENABLED: Final[bool] = get_bool("ASSET_CACHE_ENABLED", "true")
+ASSET_CACHE_BACKEND: Final[str] = get_choice(
+    "ASSET_CACHE_BACKEND", "memory", {"memory", "memcached"}
+)
+ASSET_CACHE_TTL: Final[int] = get_int("ASSET_CACHE_TTL", 3600, minimum=1)
+ASSET_CACHE_MAX_ENTRIES: Final[int] = get_int("ASSET_CACHE_MAX_ENTRIES", 2048, minimum=1)
+
 # --- VARIABLES D'ENVIRONNEMENT POUR LES MODÈLES ---
 
 PERMIT_MODELS_FROM_SUBSET_ONLY: Final[bool] = get_bool("PERMIT_MODELS_FROM_SUBSET_ONLY", "false")
@@ -112,6 +310,24 @@ def load_available_models() -> List[str]:
 
 AVAILABLE_MODELS: Final[List[str]] = load_available_models()
 
+# --- COMPTAGE DES TOKENS (USAGE) ---
+# exact    : re-tokenisation complète de la réponse avant le bloc `usage`
+# deferred : comptage incrémental des chunks par un pool de workers en arrière-plan
+# estimate : estimation rapide (~4 caractères par token), sans tokenizer
+USAGE_ACCOUNTING_MODE: Final[str] = get_choice(
+    "USAGE_ACCOUNTING_MODE", "exact", {"exact", "deferred", "estimate"}
+)
+USAGE_WORKERS: Final[int] = get_int("USAGE_WORKERS", 2, minimum=1)
+
+# Mémo des comptes de tokens (encodage + empreinte du texte) : un prompt système ou un
+# historique renvoyé à chaque tour n'est tokenisé qu'une fois par processus
+TOKEN_CACHE_ENABLED: Final[bool] = get_bool("TOKEN_CACHE_ENABLED", "true")
+TOKEN_CACHE_MAX_ENTRIES: Final[int] = get_int("TOKEN_CACHE_MAX_ENTRIES", 16384, minimum=1)
+
+# Endpoint /v1/tokenize : éléments par requête et threads de tokenisation par lot
+TOKENIZE_MAX_ITEMS: Final[int] = get_int("TOKENIZE_MAX_ITEMS", 2048, minimum=1)
+TOKENIZE_THREADS: Final[int] = get_int("TOKENIZE_THREADS", 4, minimum=1)
+
 # --- VALIDATION FINALE DE COHÉRENCE ---
 
 
@@ -124,8 +340,6 @@ def check_config_safety() -> None:
         raise ValueError("Configuration des modèles vide.")
 
 
-check_config_safety()
-
 # --- RÉSUMÉ ---
 
 
@@ -136,13 +350,10 @@ def print_summary() -> None:
         "PORT": APP_PORT,
         "DEBUG": DEBUG,
         "MODELS": len(AVAILABLE_MODELS),
-        "LOG": os.getenv("LOG_LEVEL", Defaults.LOG_LEVEL).upper(),
+        "LOG": f"{LOG_LEVEL} ({LOG_FORMAT})",
     }
     logger.info("=" * 40)
     logger.info("🚀 GATEWAY CONFIG LOADED")
     for key, val in summary.items():
         logger.info("%-10s: %s", key, val)
     logger.info("=" * 40)
-
-
-print_summary()
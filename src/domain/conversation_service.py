@@ -2,6 +2,8 @@
 
 import logging
 
+from .models import DEFAULT_CONTEXT_WINDOW, MODEL_CONTEXT_WINDOWS
+
 # Using a generic name for the logger within the service
 logger = logging.getLogger("1min-gateway.conversation-service")
 
@@ -23,8 +25,135 @@ def format_conversation_history(messages, new_input):
 
     # Log pour debug
     logger.debug(
-        f"Service: Prompt envoyé. Longueur: {len(final_prompt)} chars. "
-        f"Historique ignoré (géré par 1min.ai via conversationId)."
+        "Service: Prompt envoyé. Longueur: %d chars. "
+        "Historique ignoré (géré par 1min.ai via conversationId).",
+        len(final_prompt),
     )
 
     return final_prompt
+
+
+# --- COMPACTAGE DE L'HISTORIQUE (HISTORY_MODE=pack) ---
+
+# Libellés des rôles dans un historique replié en un seul prompt
+ROLE_LABELS = {"system": "System", "user": "User", "assistant": "Assistant", "tool": "Tool"}
+OMITTED_TURNS_MARKER = "[{count} earlier message(s) omitted]"
+# Séparateur des lignes du prompt replié (compté dans le budget)
+HISTORY_SEPARATOR = "\n\n"
+
+
+class HistoryTooLong(ValueError):
+    """Messages système et dernier message seuls dépassent le budget du prompt replié."""
+
+    def __init__(self, tokens, budget):
+        super().__init__(f"Prompt of {tokens} tokens exceeds the {budget} token budget")
+        self.tokens = tokens
+        self.budget = budget
+
+
+def context_window(model):
+    """Fenêtre de contexte du modèle : clé exacte, sinon plus long préfixe connu."""
+    if model in MODEL_CONTEXT_WINDOWS:
+        return MODEL_CONTEXT_WINDOWS[model]
+    matches = [key for key in MODEL_CONTEXT_WINDOWS if model.startswith(key)]
+    return MODEL_CONTEXT_WINDOWS[max(matches, key=len)] if matches else DEFAULT_CONTEXT_WINDOW
+
+
+def message_text(content):
+    """Texte d'un contenu OpenAI (chaîne ou liste de parties, images ignorées)."""
+    if isinstance(content, list):
+        return " ".join(
+            part.get("text", "")
+            for part in content
+            if isinstance(part, dict) and part.get("type") == "text"
+        )
+    return "" if content is None else str(content)
+
+
+def format_history_line(message):
+    """Ligne "Rôle: texte" d'un message dans le prompt replié."""
+    role = message.get("role") or "user"
+    label = ROLE_LABELS.get(role, role.capitalize())
+    return f"{label}: {message_text(message.get('content'))}"
+
+
+def _omission_marker(kept, omitted, used, budget, separator, count_tokens):
+    """
+    Mention des tours retirés, qui doit elle aussi tenir dans le budget : sinon le plus
+    ancien tour gardé est retiré à son tour, et sans tour restant la mention est abandonnée.
+    Retourne (mention, tokens utilisés, tours retirés) ; `kept` est modifiée sur place.
+    """
+    marker = ""
+    while omitted:
+        marker = OMITTED_TURNS_MARKER.format(count=omitted)
+        marker_tokens = count_tokens(marker) + separator
+        if used + marker_tokens <= budget:
+            return marker, used + marker_tokens, omitted
+        if not kept:
+            return "", used, omitted
+        used -= kept.pop(0)[1]
+        omitted += 1
+    return marker, used, omitted
+
+
+def pack_conversation_history(messages, budget, count_tokens):
+    """
+    Replie un historique OpenAI en un seul prompt tenant dans `budget` tokens.
+
+    Les messages système et le dernier message sont toujours conservés ; les tours
+    les plus anciens sont retirés en premier et remplacés par la mention de leur nombre.
+    `count_tokens(text)` compte une ligne (l'appelant peut la mémoriser).
+
+    Returns:
+        (prompt, tokens, omitted) : prompt replié, tokens estimés (somme des lignes et
+        des séparateurs) et nombre de messages retirés.
+
+    Raises:
+        HistoryTooLong: si les messages système et le dernier message dépassent `budget`.
+    """
+    if not messages:
+        return "", 0, 0
+    if len(messages) == 1:
+        text = message_text(messages[0].get("content"))
+        tokens = count_tokens(text) if text else 0
+        if tokens > budget:
+            raise HistoryTooLong(tokens, budget)
+        return text, tokens, 0
+
+    history, last = messages[:-1], format_history_line(messages[-1])
+    system_lines = [format_history_line(m) for m in history if m.get("role") == "system"]
+    turns = [m for m in history if m.get("role") != "system"]
+
+    # Chaque ligne avant la dernière est suivie d'un séparateur
+    separator = count_tokens(HISTORY_SEPARATOR)
+    used = count_tokens(last) + sum(count_tokens(line) + separator for line in system_lines)
+    if used > budget:
+        raise HistoryTooLong(used, budget)
+
+    # Du plus récent au plus ancien : on s'arrête au premier tour qui ne tient plus,
+    # pour ne garder qu'une fenêtre continue de la fin du dialogue
+    kept = []
+    for message in reversed(turns):
+        line = format_history_line(message)
+        tokens = count_tokens(line) + separator
+        if used + tokens > budget:
+            break
+        kept.append((line, tokens))
+        used += tokens
+    kept.reverse()
+
+    marker, used, omitted = _omission_marker(
+        kept, len(turns) - len(kept), used, budget, separator, count_tokens
+    )
+
+    lines = list(system_lines)
+    if marker:
+        lines.append(marker)
+    lines.extend(line for line, _ in kept)
+    lines.append(last)
+
+    if omitted:
+        logger.debug(
+            "Service: %d message(s) retiré(s) de l'historique (budget %d).", omitted, budget
+        )
+    return HISTORY_SEPARATOR.join(lines), used, omitted
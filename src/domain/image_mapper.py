@@ -28,5 +28,5 @@ def format_image_generation_response(result_data):
         return {"created": int(time.time()), "data": [{"url": url} for url in image_urls]}
 
     except Exception as e:
-        logger.error(f"DOMAIN | Erreur de normalisation image : {str(e)}")
+        logger.error("DOMAIN | Erreur de normalisation image : %s", e)
         return {"created": int(time.time()), "data": []}
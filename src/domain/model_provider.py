@@ -1,6 +1,9 @@
 # domain/model_provider.py
 import logging
 
+from .conversation_service import context_window
+from .models import IMAGE_GENERATION_MODELS, VISION_SUPPORTED_MODELS
+
 # Standardized logger for the model management layer
 logger = logging.getLogger("1min-gateway.model-provider")
 
@@ -22,13 +25,35 @@ def get_formatted_models_list(all_models, permit_subset_only, subset_models):
 
     # Audit log to monitor which visibility mode is currently active
     mode = "RESTRICTED_SUBSET" if permit_subset_only else "FULL_CATALOG"
-    logger.info(f"Model list requested. Mode: {mode}. Returning {len(source_list)} models.")
+    logger.info("Model list requested. Mode: %s. Returning %d models.", mode, len(source_list))
 
     # Building the OpenAI structure for each model
     # Note: 'created' timestamp is a placeholder for standard compatibility
     models_data = [
-        {"id": model_name, "object": "model", "owned_by": "1min-gateway", "created": 1727389042}
+        {
+            "id": model_name,
+            "object": "model",
+            "owned_by": "1min-gateway",
+            "created": 1727389042,
+            **model_capabilities(model_name),
+        }
         for model_name in source_list
     ]
 
     return models_data
+
+
+def model_capabilities(model_name):
+    """
+    Capabilities of a model from the domain catalog: vision input, image generation
+    and context window (None for image generation models).
+    """
+    image_generation = model_name in IMAGE_GENERATION_MODELS
+    return {
+        "capabilities": {
+            "chat": not image_generation,
+            "vision": model_name in VISION_SUPPORTED_MODELS,
+            "image_generation": image_generation,
+        },
+        "context_window": None if image_generation else context_window(model_name),
+    }
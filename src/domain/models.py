@@ -82,6 +82,46 @@ AVAILABLE_MODELS = [
     "openai/gpt-oss-120b",
 ]
 
+# Context windows (tokens) used to budget packed prompt histories.
+# Keys are exact model names or family prefixes; the longest matching key wins.
+DEFAULT_CONTEXT_WINDOW = 8192
+MODEL_CONTEXT_WINDOWS = {
+    # alibaba
+    "qwen": 131072,
+    # Anthropic
+    "claude": 200000,
+    # Cohere
+    "command-r": 128000,
+    # DeepSeek
+    "deepseek": 128000,
+    # GoogleAI
+    "gemini": 1048576,
+    # Mistral
+    "magistral": 40000,
+    "ministral": 128000,
+    "open-mistral-nemo": 128000,
+    "mistral": 128000,
+    # OpenAI
+    "gpt-5": 400000,
+    "gpt-4.1": 1047576,
+    "gpt-4o": 128000,
+    "gpt-4-turbo": 128000,
+    "gpt-3.5-turbo": 16385,
+    "o3": 200000,
+    "o4": 200000,
+    # Perplexity
+    "sonar": 128000,
+    # xAI
+    "grok-4": 256000,
+    "grok-3": 131072,
+    # Extra
+    "meta/meta-llama-3.1": 128000,
+    "meta/meta-llama-3-": 8192,
+    "meta/llama-4": 128000,
+    "meta/llama-2": 4096,
+    "openai/gpt-oss": 131072,
+}
+
 # Models that support image input (Multimodal/Vision)
 # Based on common knowledge of 2026 model capabilities listed in doc
 VISION_SUPPORTED_MODELS = [
@@ -2,6 +2,7 @@
 
 import logging
 import os
+import threading
 import warnings
 from logging.handlers import RotatingFileHandler
 
@@ -11,59 +12,110 @@ from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 from pymemcache.client.base import Client
 
+from .config import (
+    LOG_FILE,
+    LOG_FORMAT,
+    LOG_LEVEL,
+    MEMCACHED_HOST,
+    MEMCACHED_PORT,
+    RATELIMIT_ENABLED,
+    check_config_safety,
+    print_summary,
+)
+from .infrastructure.logging_service import JsonFormatter, log_pipeline
+
 # Suppress flask_limiter warnings to keep the console clean from non-critical noise
 warnings.filterwarnings("ignore", category=UserWarning, module="flask_limiter.extension")
 
-def check_memcached_connection(host="memcached", port=11211):
+# Memcached timeouts for the limiter: an unreachable backend must cost a request
+# a fraction of a second at most before the in-memory fallback takes over
+LIMITER_STORAGE_TIMEOUT = 0.25
+
+def check_memcached_connection(host=MEMCACHED_HOST, port=MEMCACHED_PORT):
     """
     Attempts a quick connection to Memcached to validate availability.
     Essential for Docker environments to ensure the cache layer is ready.
     """
+    client = None
     try:
-        # Short 2s timeout to avoid hanging the entire API boot sequence
+        # Short 2s timeout: the probe runs off the boot path (see probe_limiter_backend)
         client = Client((host, port), connect_timeout=2, timeout=2)
         client.set("health_check", "ok")
         result = client.get("health_check")
         return result == b"ok"
     except Exception:
         return False
+    finally:
+        # Never leave the probe socket open (it would be inherited by forked workers)
+        if client is not None:
+            client.close()
 
 
-def create_app():
+def probe_limiter_backend(logger):
     """
-    Application Factory: Initializes Flask, Logging, and Rate Limiting.
+    Reports the limiter backend in the background, so that booting never waits
+    for Memcached. The limiter itself switches between backends on its own.
     """
-    app = Flask(__name__)
 
-    # --- LOGGER CONFIGURATION ---
+    def probe():
+        if check_memcached_connection():
+            logger.info("LIMITER | Backend: Memcached (Distributed persistence enabled).")
+        else:
+            logger.warning(
+                "LIMITER | Memcached unreachable. Backend: IN-MEMORY (Volatile) "
+                "until it becomes available."
+            )
+
+    thread = threading.Thread(target=probe, name="limiter-probe", daemon=True)
+    thread.start()
+    return thread
+
+
+def configure_logging():
+    """
+    Configures the '1min-gateway' logger at LOG_LEVEL. Records go through a bounded
+    queue to a background writer thread (console + rotating file), so request threads
+    never format messages nor touch the disk.
+    Shared by the WSGI factory and the ASGI entry point; safe to call twice.
+    """
     logger = logging.getLogger("1min-gateway")
-    logger.setLevel(logging.DEBUG)
+    if getattr(logger, "_gateway_configured", False):
+        return logger
+    logger._gateway_configured = True
+    logger.setLevel(LOG_LEVEL)
 
     # 1. Infrastructure: Ensure logs directory exists for persistence
-    if not os.path.exists("logs"):
-        os.makedirs("logs")
-
-    # 2. Console Handler: Real-time debugging with colored output for Docker/Local
-    coloredlogs.install(
-        level="DEBUG",
-        logger=logger,
-        fmt="%(asctime)s [%(levelname)s] %(message)s",
-        datefmt="%H:%M:%S",
-    )
+    log_dir = os.path.dirname(LOG_FILE)
+    if log_dir and not os.path.exists(log_dir):
+        os.makedirs(log_dir)
+
+    # 2. Console Handler: JSON lines for log collectors, or colored text for local dev
+    console_handler = logging.StreamHandler()
+    if LOG_FORMAT == "json":
+        console_handler.setFormatter(JsonFormatter())
+    else:
+        console_handler.setFormatter(
+            coloredlogs.ColoredFormatter(
+                fmt="%(asctime)s [%(levelname)s] %(message)s", datefmt="%H:%M:%S"
+            )
+        )
 
-    # 3. File Handler: Long-term audit trail with automatic rotation
+    # 3. File Handler: Long-term audit trail (JSON lines) with automatic rotation
     # Limits file size to 5MB and keeps 5 historical backups
     file_handler = RotatingFileHandler(
-        "logs/api.log", maxBytes=5 * 1024 * 1024, backupCount=5, encoding="utf-8"
+        LOG_FILE, maxBytes=5 * 1024 * 1024, backupCount=5, encoding="utf-8"
     )
-    file_formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
-    file_handler.setFormatter(file_formatter)
+    file_handler.setFormatter(JsonFormatter())
 
     # Restrict file output to INFO to prevent disk bloat from DEBUG/Stream chunks
     file_handler.setLevel(logging.INFO)
-    logger.addHandler(file_handler)
 
-    # 1min-Gateway Welcome Signature
+    # 4. Both handlers are fed by the background writer thread
+    log_pipeline.install(logger, [console_handler, file_handler])
+
+    # 1min-Gateway Welcome Signature (text console only: noise in JSON lines)
+    if LOG_FORMAT == "json":
+        return logger
     logger.info(
         r"""
 
@@ -77,24 +129,39 @@ def create_app():
     ======================== GATEWAY v1.0 ====================
     """
     )
+    return logger
+
+
+def create_app():
+    """
+    Application Factory: Initializes Flask, Logging, and Rate Limiting.
+    """
+    app = Flask(__name__)
+    app.config["RATELIMIT_ENABLED"] = RATELIMIT_ENABLED
+
+    # --- LOGGER CONFIGURATION ---
+    logger = configure_logging()
+
+    check_config_safety()
+    print_summary()
 
     # --- RATE LIMITER CONFIGURATION ---
-    # Hybrid Strategy: Uses Memcached if available, fallbacks to Memory if standalone
-    if check_memcached_connection():
-        limiter = Limiter(
-            get_remote_address,
-            app=app,
-            storage_uri="memcached://memcached:11211",
-            strategy="fixed-window",
-        )
-        logger.info("LIMITER | Backend: Memcached (Distributed persistence enabled).")
-    else:
-        limiter = Limiter(
-            get_remote_address,
-            app=app,
-            storage_uri="memory://",
-        )
-        logger.warning("LIMITER | Memcached unreachable. Backend: IN-MEMORY (Volatile).")
+    # Hybrid Strategy: Memcached when reachable, in-memory fallback otherwise.
+    # Nothing is probed at boot: a storage error switches to memory, and the
+    # backend is re-checked periodically so the limiter upgrades once it appears.
+    limiter = Limiter(
+        get_remote_address,
+        app=app,
+        storage_uri=f"memcached://{MEMCACHED_HOST}:{MEMCACHED_PORT}",
+        storage_options={
+            "connect_timeout": LIMITER_STORAGE_TIMEOUT,
+            "timeout": LIMITER_STORAGE_TIMEOUT,
+        },
+        strategy="fixed-window",
+        in_memory_fallback_enabled=True,
+    )
+    if RATELIMIT_ENABLED:
+        probe_limiter_backend(logger)
 
     from .routes import register_routes
 
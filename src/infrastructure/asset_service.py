@@ -5,16 +5,64 @@ Gère le téléchargement, le décodage et l'upload d'images.
 """
 
 import base64
+import binascii
+import hashlib
 import logging
+import time
 import uuid
 from io import BytesIO
+from tempfile import SpooledTemporaryFile
 
 import filetype
-import requests
+
+from ..config import (
+    ASSET_CACHE_BACKEND,
+    ASSET_CACHE_ENABLED,
+    ASSET_CACHE_MAX_ENTRIES,
+    ASSET_CACHE_TTL,
+    IMAGE_SPOOL_MEMORY_BYTES,
+)
+from .cache_service import build_cache
+from .metrics import ASSET_UPLOAD
+from .network_service import extract_api_key, hash_api_key
+from .upstream_client import upstream
 
 # Standardized logger
 logger = logging.getLogger("1min-gateway.asset-service")
 MAX_IMAGE_SIZE = 50 * 1024 * 1024  # 50 MB
+# Octets suffisants pour identifier le type de fichier (en-têtes magiques)
+MIME_SNIFF_BYTES = 261
+# Taille des blocs lus/écrits lors de l'ingestion et de l'upload
+IO_CHUNK_SIZE = 64 * 1024
+# Caractères base64 décodés par bloc (multiple de 4)
+BASE64_CHUNK_CHARS = 4 * IO_CHUNK_SIZE
+
+# Cache adressé par contenu : empreinte de l'image -> chemin de l'asset 1min.ai
+asset_cache = (
+    build_cache(
+        "assets",
+        backend=ASSET_CACHE_BACKEND,
+        max_entries=ASSET_CACHE_MAX_ENTRIES,
+        ttl=ASSET_CACHE_TTL,
+    )
+    if ASSET_CACHE_ENABLED
+    else None
+)
+
+
+def asset_cache_key(image_data, headers):
+    """Empreinte BLAKE2 de la source de l'image (data URI ou URL), propre à la clé API.
+
+    Les assets appartiennent au compte 1min.ai qui les a uploadés : deux clés API
+    ne partagent jamais une entrée.
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(hash_api_key(extract_api_key(headers) or "").encode("ascii"))
+    digest.update(b"\x1e")
+    # Hachage par tranches : pas de copie encodée complète d'une data URI volumineuse
+    for start in range(0, len(image_data), BASE64_CHUNK_CHARS):
+        digest.update(image_data[start : start + BASE64_CHUNK_CHARS].encode("utf-8"))
+    return digest.hexdigest()
 
 
 def _decode_base64_image(image_data):
@@ -37,22 +85,147 @@ def _decode_base64_image(image_data):
     return binary_data, mime_type
 
 
-def _download_external_image(url):
-    """Télécharge une image avec une limite de taille stricte."""
+def _spool_base64_image(image_data, sink):
+    """Décode une data URI base64 par blocs dans `sink` et retourne son type MIME.
+
+    Ni la charge base64 ni les octets décodés ne sont copiés en entier en mémoire.
+    """
+    comma = image_data.find(",")
+    if comma == -1 or comma == len(image_data) - 1:
+        raise ValueError("Invalid data URI")
+    header = image_data[:comma]
+
+    try:
+        for start in range(comma + 1, len(image_data), BASE64_CHUNK_CHARS):
+            chunk = image_data[start : start + BASE64_CHUNK_CHARS]
+            # Correction du padding (dernier bloc uniquement)
+            padding = len(chunk) % 4
+            if padding:
+                chunk += "=" * (4 - padding)
+            sink.write(base64.b64decode(chunk))
+    except (binascii.Error, ValueError):
+        # Variante urlsafe ou données mal alignées : décodage historique en un bloc
+        sink.seek(0)
+        sink.truncate()
+        binary_data, _ = _decode_base64_image(image_data)
+        sink.write(binary_data)
+
+    return header.split(":", 1)[1].split(";", 1)[0] if ";" in header else None
+
+
+def _download_external_image(url, sink):
+    """Télécharge une image dans `sink` avec une limite de taille stricte.
+
+    Retourne le Content-Type annoncé par le serveur.
+    """
     if not url.startswith(("http://", "https://")):
         url = "https://" + url
 
-    response = requests.get(url, timeout=20, stream=True)
-    response.raise_for_status()
+    response = upstream.get("downloads", url, stream=True)
+    try:
+        response.raise_for_status()
+
+        size = 0
+        for chunk in response.iter_content(chunk_size=IO_CHUNK_SIZE):
+            if chunk:
+                size += len(chunk)
+                if size > MAX_IMAGE_SIZE:
+                    raise ValueError("FILE_TOO_LARGE_413")
+                sink.write(chunk)
+
+        return response.headers.get("Content-Type")
+    finally:
+        # Rend la connexion au pool même si le téléchargement est interrompu
+        response.close()
+
+
+class MultipartFileStream:
+    """Corps multipart/form-data d'un fichier unique, lu par blocs depuis son support.
 
-    buf = bytearray()
-    for chunk in response.iter_content(chunk_size=8192):
-        if chunk:
-            buf.extend(chunk)
-            if len(buf) > MAX_IMAGE_SIZE:
-                raise ValueError("FILE_TOO_LARGE_413")
+    `requests` envoie ce type d'objet en streaming (read par blocs) avec un
+    Content-Length exact grâce à __len__, sans construire le corps en mémoire.
+    """
+
+    def __init__(self, field, filename, fileobj, content_type, size):
+        self.boundary = uuid.uuid4().hex
+        head = (
+            f"--{self.boundary}\r\n"
+            f'Content-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+            f"Content-Type: {content_type}\r\n\r\n"
+        ).encode("utf-8")
+        tail = f"\r\n--{self.boundary}--\r\n".encode("ascii")
+        self._parts = [BytesIO(head), fileobj, BytesIO(tail)]
+        self._length = len(head) + size + len(tail)
+
+    @property
+    def content_type(self):
+        return f"multipart/form-data; boundary={self.boundary}"
+
+    def __len__(self):
+        return self._length
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            return b"".join(part.read() for part in self._parts)
+
+        out = b""
+        while self._parts and len(out) < size:
+            data = self._parts[0].read(size - len(out))
+            if data:
+                out += data
+            else:
+                self._parts.pop(0)
+        return out
+
+    def __iter__(self):
+        while True:
+            data = self.read(IO_CHUNK_SIZE)
+            if not data:
+                return
+            yield data
+
+
+def _cached_asset(image_data, headers):
+    """Clé de cache de l'image et chemin de l'asset déjà uploadé (ou None)."""
+    if asset_cache is None:
+        return None, None
+    cache_key = asset_cache_key(image_data, headers)
+    return cache_key, asset_cache.get(cache_key)
+
+
+def _spool_image(image_data, source, spool):
+    """Écrit les octets de l'image dans `spool` ; retourne (type MIME, taille)."""
+    # 2. Acquisition des données binaires (par blocs)
+    if source == "base64":
+        mime_type = _spool_base64_image(image_data, spool)
+    else:
+        mime_type = _download_external_image(image_data, spool)
+    size = spool.tell()
+    spool.seek(0)
 
-    return bytes(buf), response.headers.get("Content-Type")
+    # 3. Détection du type de fichier si nécessaire (premiers octets uniquement)
+    if not mime_type:
+        kind = filetype.guess(spool.read(MIME_SNIFF_BYTES))
+        spool.seek(0)
+        mime_type = kind.mime if kind else "image/png"
+    return mime_type, size
+
+
+def _upload_spooled_image(spool, mime_type, size, headers, asset_url):
+    """Uploade l'image (corps multipart streamé depuis `spool`) ; retourne son chemin."""
+    # 4. Préparation du corps multipart (streamé depuis le fichier temporaire)
+    ext = mime_type.split("/")[-1].split("+")[0]
+    filename = f"gateway_{uuid.uuid4()}.{ext}"
+    multipart = MultipartFileStream("asset", filename, spool, mime_type, size)
+    upload_headers = dict(headers)
+    upload_headers["Content-Type"] = multipart.content_type
+
+    # 5. Upload final
+    asset_response = upstream.post("assets", asset_url, data=multipart, headers=upload_headers)
+    asset_response.raise_for_status()
+
+    body = asset_response.json()
+    return body["fileContent"]["path"]
 
 
 def upload_image_to_1min(item, headers, asset_url):
@@ -69,30 +242,27 @@ def upload_image_to_1min(item, headers, asset_url):
         raise ValueError("Missing or invalid Authorization header")
 
     image_data = item["image_url"]["url"]
+    started = time.perf_counter()
+    source = "base64" if image_data.startswith("data:image") else "url"
+    result = "error"
 
-    try:
-        # 2. Acquisition des données binaires
-        if image_data.startswith("data:image"):
-            binary_data, mime_type = _decode_base64_image(image_data)
-        else:
-            binary_data, mime_type = _download_external_image(image_data)
-
-        # 3. Détection du type de fichier si nécessaire
-        if not mime_type:
-            kind = filetype.guess(binary_data)
-            mime_type = kind.mime if kind else "image/png"
-
-        # 4. Préparation du fichier
-        ext = mime_type.split("/")[-1].split("+")[0]
-        filename = f"gateway_{uuid.uuid4()}.{ext}"
-        files = {"asset": (filename, BytesIO(binary_data), mime_type)}
+    # Image déjà uploadée (historique renvoyé à chaque tour) : ni téléchargement ni upload
+    cache_key, cached_path = _cached_asset(image_data, headers)
+    if cached_path:
+        logger.debug("ASSET | Cache hit: %s", cached_path)
+        ASSET_UPLOAD.observe(time.perf_counter() - started, source, "cached")
+        return cached_path
 
-        # 5. Upload final
-        asset_response = requests.post(asset_url, files=files, headers=headers, timeout=30)
-        asset_response.raise_for_status()
-
-        body = asset_response.json()
-        return body["fileContent"]["path"]
+    # Les octets de l'image restent en mémoire jusqu'à IMAGE_SPOOL_MEMORY_BYTES,
+    # au-delà ils sont déversés dans un fichier temporaire
+    spool = SpooledTemporaryFile(max_size=IMAGE_SPOOL_MEMORY_BYTES)
+    try:
+        mime_type, size = _spool_image(image_data, source, spool)
+        path = _upload_spooled_image(spool, mime_type, size, headers, asset_url)
+        if cache_key:
+            asset_cache.set(cache_key, path)
+        result = "uploaded"
+        return path
 
     except ValueError as e:
         if str(e) == "FILE_TOO_LARGE_413":
@@ -105,3 +275,6 @@ def upload_image_to_1min(item, headers, asset_url):
     except Exception as e:
         logger.error("Failed to process image: %s", str(e))
         raise
+    finally:
+        spool.close()
+        ASSET_UPLOAD.observe(time.perf_counter() - started, source, result)
@@ -0,0 +1,260 @@
+"""Caches clé/valeur partagés par les services de la Gateway.
+
+Ce module fournit :
+- Un cache LRU en mémoire, thread-safe, avec TTL et éviction par nombre d'entrées et par taille.
+- Un backend Memcached de même interface pour partager l'état entre workers et réplicas.
+- Des statistiques de hit-rate communes aux deux backends.
+
+Les valeurs stockées sont des chaînes (JSON sérialisé par l'appelant si besoin).
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from ..config import MEMCACHED_HOST, MEMCACHED_PORT, SERVER_THREADS
+
+logger = logging.getLogger("1min-gateway.cache-service")
+
+# Memcached refuse les items de plus de 1 Mo (configuration par défaut)
+MEMCACHED_MAX_ITEM_BYTES = 1000 * 1000
+# Intervalle minimal entre deux avertissements "Memcached indisponible"
+UNAVAILABLE_WARNING_INTERVAL = 60
+
+
+class CacheStats:
+    """Compteurs communs aux backends de cache."""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.sets = 0
+        self.evictions = 0
+        self.errors = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "sets": self.sets,
+            "evictions": self.evictions,
+            "errors": self.errors,
+        }
+
+
+class LRUCache:
+    """Cache LRU en mémoire avec TTL, plafonné en entrées et en taille cumulée."""
+
+    backend = "memory"
+
+    def __init__(
+        self,
+        name: str,
+        max_entries: int = 1024,
+        max_bytes: Optional[int] = None,
+        ttl: Optional[int] = None,
+    ):
+        """Initialise un cache vide.
+
+        Args:
+            name: Nom du cache (logs et statistiques).
+            max_entries: Nombre maximal d'entrées conservées.
+            max_bytes: Taille cumulée maximale des valeurs (None = illimitée).
+            ttl: Durée de vie par défaut des entrées en secondes (None = pas d'expiration).
+        """
+        self.name = name
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = CacheStats()
+
+    def get(self, key: str) -> Optional[str]:
+        """Retourne la valeur associée à la clé, ou None (absente ou expirée)."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self._stats.misses += 1
+                return None
+
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                self._remove(key)
+                self._stats.misses += 1
+                return None
+
+            self._data.move_to_end(key)
+            self._stats.hits += 1
+            return value
+
+    def set(self, key: str, value: str, ttl: Optional[int] = None) -> bool:
+        """Enregistre une valeur ; retourne False si elle dépasse la taille du cache."""
+        size = len(value)
+        if self.max_bytes is not None and size > self.max_bytes:
+            return False
+
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl else None
+
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            self._data[key] = (value, expires_at)
+            self._bytes += size
+            self._stats.sets += 1
+
+            # Éviction des entrées les moins récemment utilisées
+            while len(self._data) > self.max_entries or (
+                self.max_bytes is not None and self._bytes > self.max_bytes
+            ):
+                oldest = next(iter(self._data))
+                self._remove(oldest)
+                self._stats.evictions += 1
+        return True
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def _remove(self, key: str) -> None:
+        value, _ = self._data.pop(key)
+        self._bytes -= len(value)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = self._stats.as_dict()
+            stats.update(
+                {"backend": self.backend, "entries": len(self._data), "bytes": self._bytes}
+            )
+        return stats
+
+
+# --- MEMCACHED ---
+_memcached_client = None
+_memcached_lock = threading.Lock()
+
+
+def get_memcached_client():
+    """Client Memcached poolé (thread-safe), créé au premier usage."""
+    global _memcached_client
+    if _memcached_client is None:
+        with _memcached_lock:
+            if _memcached_client is None:
+                from pymemcache.client.base import PooledClient
+
+                _memcached_client = PooledClient(
+                    (MEMCACHED_HOST, MEMCACHED_PORT),
+                    connect_timeout=0.5,
+                    timeout=0.5,
+                    no_delay=True,
+                    max_pool_size=SERVER_THREADS * 2,
+                )
+    return _memcached_client
+
+
+class MemcachedCache:
+    """Cache partagé via Memcached, même interface que LRUCache.
+
+    Une panne Memcached n'interrompt jamais une requête : l'opération est
+    comptée comme une erreur et traitée comme un miss.
+    """
+
+    backend = "memcached"
+
+    def __init__(self, name: str, ttl: Optional[int] = None, client=None):
+        """
+        Args:
+            name: Nom du cache, utilisé comme préfixe des clés.
+            ttl: Durée de vie par défaut des entrées en secondes (None = pas d'expiration).
+            client: Client pymemcache (client partagé par défaut).
+        """
+        self.name = name
+        self.ttl = ttl
+        self._client = client
+        self._prefix = f"1mg:{name}:"
+        self._lock = threading.Lock()
+        self._stats = CacheStats()
+        self._last_warning = 0.0
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = get_memcached_client()
+        return self._client
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            setattr(self._stats, counter, getattr(self._stats, counter) + 1)
+
+    def _failed(self, operation: str, err: Exception) -> None:
+        self._count("errors")
+        now = time.monotonic()
+        if now - self._last_warning > UNAVAILABLE_WARNING_INTERVAL:
+            self._last_warning = now
+            logger.warning("CACHE | Memcached indisponible (%s/%s): %s", self.name, operation, err)
+
+    def get(self, key: str) -> Optional[str]:
+        try:
+            raw = self.client.get(self._prefix + key)
+        except Exception as err:
+            self._failed("get", err)
+            raw = None
+
+        if raw is None:
+            self._count("misses")
+            return None
+        self._count("hits")
+        return raw.decode("utf-8") if isinstance(raw, bytes) else raw
+
+    def set(self, key: str, value: str, ttl: Optional[int] = None) -> bool:
+        encoded = value.encode("utf-8")
+        if len(encoded) > MEMCACHED_MAX_ITEM_BYTES:
+            return False
+        ttl = self.ttl if ttl is None else ttl
+        try:
+            self.client.set(self._prefix + key, encoded, expire=ttl or 0, noreply=True)
+        except Exception as err:
+            self._failed("set", err)
+            return False
+        self._count("sets")
+        return True
+
+    def delete(self, key: str) -> None:
+        try:
+            self.client.delete(self._prefix + key, noreply=True)
+        except Exception as err:
+            self._failed("delete", err)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = self._stats.as_dict()
+        stats["backend"] = self.backend
+        return stats
+
+
+def build_cache(
+    name: str,
+    backend: str = "memory",
+    max_entries: int = 1024,
+    max_bytes: Optional[int] = None,
+    ttl: Optional[int] = None,
+):
+    """Construit un cache selon le backend configuré ("memory" ou "memcached")."""
+    if backend == "memcached":
+        return MemcachedCache(name, ttl=ttl)
+    return LRUCache(name, max_entries=max_entries, max_bytes=max_bytes, ttl=ttl)
@@ -0,0 +1,287 @@
+"""Circuit breaker partagé protégeant les appels vers l'API 1min.ai.
+
+Ce module gère :
+- Un état CLOSED / OPEN / HALF_OPEN protégé par un verrou (threads waitress).
+- Un taux d'échec calculé sur une fenêtre glissante plutôt qu'un compteur consécutif.
+- Un état semi-ouvert n'admettant qu'un nombre limité de requêtes sondes.
+- Un état optionnellement partagé via Memcached : tous les workers s'ouvrent ensemble.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+
+from ..config import (
+    BREAKER_BACKEND,
+    BREAKER_FAILURE_RATE,
+    BREAKER_FAILURE_THRESHOLD,
+    BREAKER_HALF_OPEN_PROBES,
+    BREAKER_OPEN_SECONDS,
+    BREAKER_WINDOW_SECONDS,
+)
+from .cache_service import MemcachedCache
+
+logger = logging.getLogger("1min-gateway.circuit-breaker")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Intervalle minimal entre deux lectures de l'état partagé (Memcached)
+SHARED_STATE_REFRESH = 1.0
+
+
+class CircuitOpenError(ConnectionError):
+    """Requête refusée localement : le circuit vers 1min.ai est ouvert."""
+
+    def __init__(self, name: str, retry_after: int):
+        super().__init__(f"Circuit breaker '{name}' is open - API 1min.ai unavailable")
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Implémentation d'un circuit breaker pour protéger l'infrastructure."""
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        timeout: int = 60,
+        failure_rate: float = 0.5,
+        window: int = 60,
+        half_open_probes: int = 1,
+        name: str = "1min-api",
+        shared_state: Optional[MemcachedCache] = None,
+    ):
+        """Initialise le circuit breaker avec les seuils configurés.
+
+        Args:
+            failure_threshold: Nombre minimal d'échecs dans la fenêtre avant ouverture
+            timeout: Durée (secondes) pendant laquelle le circuit reste ouvert
+            failure_rate: Taux d'échec (0-1) de la fenêtre déclenchant l'ouverture
+            window: Durée (secondes) de la fenêtre glissante
+            half_open_probes: Requêtes sondes admises simultanément en semi-ouvert
+            name: Nom du circuit (logs, clé partagée)
+            shared_state: Cache Memcached partageant l'ouverture entre workers
+        """
+        self.failure_threshold = failure_threshold
+        self.timeout = timeout
+        self.failure_rate = failure_rate
+        self.window = window
+        self.half_open_probes = half_open_probes
+        self.name = name
+        self.shared_state = shared_state
+
+        self.state = CLOSED
+        self.opened_at: Optional[float] = None
+        self._outcomes: deque = deque()
+        self._failures = 0
+        self._probes_in_flight = 0
+        self._last_shared_check = 0.0
+        self._lock = threading.Lock()
+
+    # --- FENÊTRE GLISSANTE ---
+
+    def _prune(self, now: float) -> None:
+        limit = now - self.window
+        while self._outcomes and self._outcomes[0][0] < limit:
+            _, ok = self._outcomes.popleft()
+            if not ok:
+                self._failures -= 1
+
+    def _reset_window(self) -> None:
+        self._outcomes.clear()
+        self._failures = 0
+
+    @property
+    def failures(self) -> int:
+        """Nombre d'échecs dans la fenêtre glissante."""
+        with self._lock:
+            self._prune(time.time())
+            return self._failures
+
+    # --- TRANSITIONS ---
+
+    def _open(self, now: float) -> None:
+        self.state = OPEN
+        self.opened_at = now
+        self._probes_in_flight = 0
+
+    def _close(self) -> bool:
+        """Referme le circuit ; True s'il était ouvert (fermeture à publier)."""
+        was_open = self.state != CLOSED
+        self.state = CLOSED
+        self.opened_at = None
+        self._probes_in_flight = 0
+        self._reset_window()
+        return was_open
+
+    # --- ÉTAT PARTAGÉ (MEMCACHED, TOUJOURS HORS VERROU) ---
+    # Un aller-retour réseau sous self._lock bloquerait tous les threads de requête
+
+    def _publish_open(self, opened_at: float) -> None:
+        if self.shared_state is not None:
+            self.shared_state.set(self.name, repr(opened_at), ttl=self.timeout)
+
+    def _publish_close(self) -> None:
+        if self.shared_state is not None:
+            self.shared_state.delete(self.name)
+
+    def _fetch_shared_opening(self) -> Optional[float]:
+        """Ouverture publiée par un autre worker (lecture limitée à 1/s, circuit fermé)."""
+        if self.shared_state is None:
+            return None
+        now = time.time()
+        with self._lock:
+            if self.state != CLOSED or now - self._last_shared_check < SHARED_STATE_REFRESH:
+                return None
+            self._last_shared_check = now
+        raw = self.shared_state.get(self.name)
+        if raw is None:
+            return None
+        try:
+            return float(raw)
+        except ValueError:
+            return None
+
+    def _adopt_shared_opening(self, opened_at: Optional[float], now: float) -> None:
+        """Adopte (sous verrou) une ouverture partagée encore en cours."""
+        if opened_at is None or self.state != CLOSED:
+            return
+        if now - opened_at <= self.timeout:
+            self.state = OPEN
+            self.opened_at = opened_at
+            logger.warning("⚠️ CIRCUIT BREAKER OUVERT | Ouverture partagée par un autre worker.")
+
+    def allow_request(self) -> bool:
+        """Indique si une requête peut partir (et réserve un créneau de sonde si besoin)."""
+        shared_opened_at = self._fetch_shared_opening()
+        with self._lock:
+            now = time.time()
+            self._adopt_shared_opening(shared_opened_at, now)
+
+            if self.state == OPEN:
+                if now - self.opened_at < self.timeout:
+                    return False
+                logger.info("🔄 Circuit Breaker: Tentative de réouverture (Half-Open)...")
+                self.state = HALF_OPEN
+                self._probes_in_flight = 0
+
+            if self.state == HALF_OPEN:
+                if self._probes_in_flight >= self.half_open_probes:
+                    # Sonde sans issue connue depuis un délai complet : on en admet une autre
+                    if now - self.opened_at < 2 * self.timeout:
+                        return False
+                    self.opened_at = now - self.timeout
+                    self._probes_in_flight = 0
+                self._probes_in_flight += 1
+            return True
+
+    def is_open(self) -> bool:
+        """Vérifie si le circuit refuse actuellement les requêtes (sans réserver de sonde)."""
+        shared_opened_at = self._fetch_shared_opening()
+        with self._lock:
+            now = time.time()
+            self._adopt_shared_opening(shared_opened_at, now)
+            if self.state == OPEN:
+                return now - self.opened_at < self.timeout
+            if self.state == HALF_OPEN:
+                return self._probes_in_flight >= self.half_open_probes
+            return False
+
+    def call_failed(self) -> None:
+        """Enregistre un échec et ouvre le circuit si le seuil est atteint."""
+        now = time.time()
+        if self._record_failure(now):
+            self._publish_open(now)
+
+    def _record_failure(self, now: float) -> bool:
+        """Compte un échec sous verrou ; True si le circuit vient de s'ouvrir."""
+        with self._lock:
+            if self.state == HALF_OPEN:
+                logger.error(
+                    "⚠️ CIRCUIT BREAKER OUVERT | Sonde en échec. Pause de %ds.", self.timeout
+                )
+                self._open(now)
+                return True
+            if self.state == OPEN:
+                return False
+
+            self._outcomes.append((now, False))
+            self._failures += 1
+            self._prune(now)
+
+            total = len(self._outcomes)
+            rate = self._failures / total if total else 0.0
+            if self._failures < self.failure_threshold or rate < self.failure_rate:
+                return False
+            logger.error(
+                "⚠️ CIRCUIT BREAKER OUVERT | %d échecs (%.0f%%) sur %ds. Pause de %ds.",
+                self._failures,
+                rate * 100,
+                self.window,
+                self.timeout,
+            )
+            self._open(now)
+            return True
+
+    def call_succeeded(self) -> None:
+        """Enregistre un succès ; referme le circuit s'il était ouvert ou semi-ouvert."""
+        with self._lock:
+            closed = self.state != CLOSED
+            if closed:
+                logger.info("✅ Circuit Breaker réinitialisé après succès.")
+                self._close()
+            else:
+                now = time.time()
+                self._outcomes.append((now, True))
+                self._prune(now)
+        if closed:
+            self._publish_close()
+
+    def reset(self) -> None:
+        """Referme le circuit et vide la fenêtre (tests, opérations manuelles)."""
+        with self._lock:
+            was_open = self._close()
+        if was_open:
+            self._publish_close()
+
+    def retry_after(self) -> int:
+        """Secondes restantes avant la prochaine tentative (en-tête Retry-After)."""
+        with self._lock:
+            if self.opened_at is None:
+                return 0
+            return max(1, int(self.opened_at + self.timeout - time.time()) + 1)
+
+    def guard(self) -> None:
+        """Lève CircuitOpenError si la requête doit être refusée."""
+        if not self.allow_request():
+            raise CircuitOpenError(self.name, self.retry_after())
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._prune(time.time())
+            total = len(self._outcomes)
+            return {
+                "state": self.state,
+                "window_requests": total,
+                "window_failures": self._failures,
+                "failure_rate": round(self._failures / total, 4) if total else 0.0,
+                "backend": "memcached" if self.shared_state is not None else "memory",
+            }
+
+
+# --- INSTANCE GLOBALE ---
+one_min_breaker = CircuitBreaker(
+    failure_threshold=BREAKER_FAILURE_THRESHOLD,
+    timeout=BREAKER_OPEN_SECONDS,
+    failure_rate=BREAKER_FAILURE_RATE,
+    window=BREAKER_WINDOW_SECONDS,
+    half_open_probes=BREAKER_HALF_OPEN_PROBES,
+    shared_state=(
+        MemcachedCache("breaker", ttl=BREAKER_OPEN_SECONDS)
+        if BREAKER_BACKEND == "memcached"
+        else None
+    ),
+)
@@ -0,0 +1,232 @@
+"""Limiteur de concurrence adaptatif devant les appels vers l'API 1min.ai.
+
+Ce module gère :
+- Une limite de requêtes simultanées ajustée en AIMD : +1/limite par réponse saine,
+  x BACKOFF sur 429, 5xx, erreur réseau ou dérive de latence (moyenne courte vs longue).
+- Une file d'attente FIFO bornée avec délai maximal : au-delà, la requête est délestée
+  immédiatement (503 + Retry-After) au lieu d'immobiliser un thread waitress.
+- Une voie prioritaire : les complétions n'occupent jamais plus de
+  SERVER_THREADS - UPSTREAM_PRIORITY_THREADS threads (en cours + en attente), les
+  threads restants servent toujours / (health), /v1/models et /metrics.
+"""
+
+import logging
+import math
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Optional
+
+from ..config import (
+    SERVER_THREADS,
+    UPSTREAM_CONCURRENCY_ENABLED,
+    UPSTREAM_CONCURRENCY_MIN,
+    UPSTREAM_LATENCY_TOLERANCE,
+    UPSTREAM_PRIORITY_THREADS,
+    UPSTREAM_QUEUE_SIZE,
+    UPSTREAM_QUEUE_TIMEOUT,
+)
+
+logger = logging.getLogger("1min-gateway.concurrency-limiter")
+
+# Facteur de réduction multiplicative de la limite sur signal de surcharge
+BACKOFF = 0.9
+# Intervalle minimal entre deux réductions (une rafale de 429 ne compte qu'une fois)
+DECREASE_COOLDOWN = 1.0
+# Lissage des latences : moyenne courte (tendance récente) et longue (référence)
+SHORT_EWMA_ALPHA = 0.2
+LONG_EWMA_ALPHA = 0.02
+
+
+class GatewayOverloaded(Exception):
+    """Requête délestée avant l'appel amont : file d'attente pleine ou délai dépassé."""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(f"Gateway overloaded ({reason})")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdaptiveConcurrencyLimiter:
+    """Concurrence vers 1min.ai ajustée selon les latences et erreurs observées."""
+
+    def __init__(
+        self,
+        max_limit: int,
+        min_limit: int = 1,
+        queue_size: int = 16,
+        queue_timeout: float = 10.0,
+        latency_tolerance: float = 2.0,
+        enabled: bool = True,
+    ):
+        """
+        Args:
+            max_limit: Requêtes en cours + en attente au plus (threads de la voie complétions)
+            min_limit: Plancher de la limite adaptative
+            queue_size: Requêtes en attente au plus (dans la place laissée par max_limit)
+            queue_timeout: Attente maximale (secondes) avant délestage
+            latency_tolerance: Ratio moyenne courte / longue au-delà duquel la limite baisse
+            enabled: Désactive la limitation (admission immédiate) si False
+        """
+        self.max_limit = max(1, max_limit)
+        self.min_limit = max(1, min(min_limit, self.max_limit))
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.latency_tolerance = latency_tolerance
+        self.enabled = enabled
+
+        self._limit = float(self.max_limit)
+        self._in_flight = 0
+        self._waiters: deque = deque()
+        self._short_latency: Optional[float] = None
+        self._long_latency: Optional[float] = None
+        self._last_decrease = 0.0
+        self._lock = threading.Lock()
+
+        self._admitted = 0
+        self._queued = 0
+        self._shed_queue_full = 0
+        self._shed_timeout = 0
+        self._decreases = 0
+
+    @property
+    def limit(self) -> int:
+        return max(self.min_limit, int(self._limit))
+
+    # --- ADMISSION ---
+
+    def _retry_after(self) -> int:
+        """Délai estimé avant qu'une place se libère (latence récente x rang dans la file)."""
+        latency = self._short_latency or 1.0
+        return max(1, math.ceil(latency * (len(self._waiters) + 1) / self.limit))
+
+    def _grant_waiters(self) -> None:
+        # Appelé verrou tenu : réveille les plus anciens tant que la limite le permet
+        while self._waiters and self._in_flight < self.limit:
+            self._in_flight += 1
+            self._waiters.popleft().set()
+
+    def acquire(self) -> Callable[[], None]:
+        """
+        Réserve une place pour un appel amont et retourne sa fonction de libération
+        (idempotente). Attend au plus queue_timeout dans la file, sinon lève
+        GatewayOverloaded.
+        """
+        if not self.enabled:
+            return lambda: None
+
+        with self._lock:
+            if self._in_flight < self.limit and not self._waiters:
+                self._in_flight += 1
+                self._admitted += 1
+                return self._releaser()
+            # La file ne déborde jamais sur les threads de la voie prioritaire
+            capacity = min(self.queue_size, self.max_limit - self._in_flight)
+            if len(self._waiters) >= capacity:
+                self._shed_queue_full += 1
+                raise GatewayOverloaded("queue full", self._retry_after())
+            granted = threading.Event()
+            self._waiters.append(granted)
+            self._queued += 1
+
+        if not granted.wait(self.queue_timeout):
+            with self._lock:
+                # La place a pu être accordée entre l'expiration et la prise du verrou
+                if not granted.is_set():
+                    self._waiters.remove(granted)
+                    self._shed_timeout += 1
+                    raise GatewayOverloaded("queue timeout", self._retry_after())
+
+        with self._lock:
+            self._admitted += 1
+        return self._releaser()
+
+    def try_acquire(self) -> Optional[Callable[[], None]]:
+        """
+        Réserve une place seulement si elle est libre immédiatement (ni attente ni
+        délestage compté) ; None sinon. Sert aux appels facultatifs (couverture).
+        """
+        if not self.enabled:
+            return lambda: None
+        with self._lock:
+            if self._in_flight >= self.limit or self._waiters:
+                return None
+            self._in_flight += 1
+            self._admitted += 1
+        return self._releaser()
+
+    def _releaser(self) -> Callable[[], None]:
+        released = threading.Event()
+
+        def release():
+            if released.is_set():
+                return
+            released.set()
+            with self._lock:
+                self._in_flight -= 1
+                self._grant_waiters()
+
+        return release
+
+    # --- ADAPTATION (AIMD) ---
+
+    def on_success(self, latency: float) -> None:
+        """Réponse saine : hausse additive, sauf si la latence récente dérive."""
+        if not self.enabled:
+            return
+        with self._lock:
+            if self._short_latency is None:
+                self._short_latency = self._long_latency = latency
+            else:
+                self._short_latency += SHORT_EWMA_ALPHA * (latency - self._short_latency)
+                self._long_latency += LONG_EWMA_ALPHA * (latency - self._long_latency)
+
+            if self._short_latency > self._long_latency * self.latency_tolerance:
+                self._decrease("latency")
+            else:
+                self._limit = min(float(self.max_limit), self._limit + 1 / self._limit)
+                self._grant_waiters()
+
+    def on_overload(self, reason: str = "error") -> None:
+        """429, 5xx ou erreur réseau de l'amont : baisse multiplicative."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._decrease(reason)
+
+    def _decrease(self, reason: str) -> None:
+        now = time.monotonic()
+        if now - self._last_decrease < DECREASE_COOLDOWN:
+            return
+        self._last_decrease = now
+        self._limit = max(float(self.min_limit), self._limit * BACKOFF)
+        self._decreases += 1
+        logger.info("CONCURRENCY | Limite amont réduite à %d (%s)", self.limit, reason)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "limit": self.limit,
+                "max_limit": self.max_limit,
+                "in_flight": self._in_flight,
+                "waiting": len(self._waiters),
+                "admitted": self._admitted,
+                "queued": self._queued,
+                "shed_queue_full": self._shed_queue_full,
+                "shed_timeout": self._shed_timeout,
+                "decreases": self._decreases,
+                "latency_short_s": round(self._short_latency or 0.0, 4),
+                "latency_long_s": round(self._long_latency or 0.0, 4),
+            }
+
+
+# --- INSTANCE GLOBALE ---
+upstream_limiter = AdaptiveConcurrencyLimiter(
+    max_limit=SERVER_THREADS - UPSTREAM_PRIORITY_THREADS,
+    min_limit=UPSTREAM_CONCURRENCY_MIN,
+    queue_size=UPSTREAM_QUEUE_SIZE,
+    queue_timeout=UPSTREAM_QUEUE_TIMEOUT,
+    latency_tolerance=UPSTREAM_LATENCY_TOLERANCE,
+    enabled=UPSTREAM_CONCURRENCY_ENABLED,
+)
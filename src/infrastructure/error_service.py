@@ -60,6 +60,45 @@ def get_error_response(code, model=None, key=None):
             "code": "invalid_request_error",
             "http_code": 400,
         },
+        1413: {
+            "message": "'input' must be a string, a message array, or an array of strings "
+            "and message arrays.",
+            "type": "invalid_request_error",
+            "param": "input",
+            "code": "invalid_request_error",
+            "http_code": 400,
+        },
+        1414: {
+            "message": "Too many items in 'input' for a single tokenize request.",
+            "type": "invalid_request_error",
+            "param": "input",
+            "code": "invalid_request_error",
+            "http_code": 400,
+        },
+        1415: {
+            "message": "The messages exceed the context length of the model, even with "
+            "the earlier turns removed. Please shorten the last message.",
+            "type": "invalid_request_error",
+            "param": "messages",
+            "code": "context_length_exceeded",
+            "http_code": 400,
+        },
+        1429: {
+            "message": "Rate limit reached for this API key. Please retry after the delay "
+            "given in the Retry-After header.",
+            "type": "requests",
+            "param": None,
+            "code": "rate_limit_exceeded",
+            "http_code": 429,
+        },
+        1430: {
+            "message": "1min.ai rate limit reached for this API key. Please retry after the "
+            "delay given in the Retry-After header.",
+            "type": "requests",
+            "param": None,
+            "code": "rate_limit_exceeded",
+            "http_code": 429,
+        },
         1405: {
             "message": "Method Not Allowed.",
             "type": "invalid_request_error",
@@ -74,6 +113,21 @@ def get_error_response(code, model=None, key=None):
             "code": "file_too_large",
             "http_code": 413,
         },
+        1503: {
+            "message": "The 1min.ai API is temporarily unavailable. Please retry later.",
+            "type": "api_error",
+            "param": None,
+            "code": "service_unavailable",
+            "http_code": 503,
+        },
+        1529: {
+            "message": "The gateway is overloaded. Please retry after the delay given in the "
+            "Retry-After header.",
+            "type": "api_error",
+            "param": None,
+            "code": "server_overloaded",
+            "http_code": 503,
+        },
         500: {
             "message": "Internal Server Error. Please check the 1min-Gateway logs.",
             "type": "api_error",
@@ -102,8 +156,11 @@ def get_error_response(code, model=None, key=None):
 
     # Audit Log: Providing context for quick debugging
     logger.error(
-        f"API_ERROR | Code: {code} | Status: {http_status} | "
-        f"Msg: {error_payload['message']} | Model: {model}"
+        "API_ERROR | Code: %s | Status: %s | Msg: %s | Model: %s",
+        code,
+        http_status,
+        error_payload["message"],
+        model,
     )
 
     # Retourne juste le payload et le status, pas jsonify
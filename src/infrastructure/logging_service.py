@@ -0,0 +1,203 @@
+"""Journalisation non bloquante de la Gateway (file d'attente + thread d'écriture).
+
+Ce module gère :
+- Un QueueHandler sur le logger '1min-gateway' : le thread de la requête dépose
+  l'enregistrement brut dans une file bornée, sans formatage ni E/S disque. File pleine,
+  l'enregistrement est perdu et compté plutôt que de bloquer la requête.
+- Un QueueListener (thread dédié) qui formate (JSON ou texte coloré) et écrit vers la
+  console et le fichier tournant.
+- Un échantillonnage par logger des lignes fréquentes (sous WARNING) : LOG_SAMPLING.
+- La reprise après fork : chaque worker pre-fork relance sa propre file et son thread.
+"""
+
+import atexit
+import itertools
+import json
+import logging
+import os
+import queue
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, List, Optional
+
+from ..config import LOG_QUEUE_SIZE, LOG_SAMPLING
+
+logger = logging.getLogger("1min-gateway.logging")
+
+# Attributs standard d'un LogRecord : tout le reste provient de `extra=` et est exporté
+_RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {
+    "message",
+    "asctime",
+}
+
+
+def parse_sample_rates(spec: str) -> Dict[str, float]:
+    """Lit "logger=taux,logger=taux" (taux entre 0 et 1) ; les entrées invalides sont ignorées."""
+    rates = {}
+    for entry in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, raw = entry.partition("=")
+        try:
+            rate = float(raw)
+        except ValueError:
+            rate = -1.0
+        if not name.strip() or not 0.0 <= rate <= 1.0:
+            logger.warning("LOG_SAMPLING invalide '%s' ignoré", entry)
+            continue
+        rates[name.strip()] = rate
+    return rates
+
+
+class JsonFormatter(logging.Formatter):
+    """Un objet JSON par ligne ; les champs passés via `extra=` sont ajoutés tels quels."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(
+                timespec="milliseconds"
+            ),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            "pid": record.process,
+            "thread": record.threadName,
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        if record.stack_info:
+            entry["stack"] = self.formatStack(record.stack_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Garde un enregistrement sur N (N = 1/taux) par logger, sous WARNING uniquement.
+    Un logger hérite du taux de son parent le plus proche ; les lignes gardées portent
+    `sampled=N` pour que les comptes puissent être extrapolés.
+    """
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        # 0 : tout est écarté sous WARNING ; 1 : aucun échantillonnage
+        self._every = {name: round(1 / rate) if rate else 0 for name, rate in rates.items()}
+        self._resolved: Dict[str, int] = {}
+        self._counters: Dict[str, Any] = {}
+
+    def _every_for(self, name: str) -> int:
+        every = self._resolved.get(name)
+        if every is None:
+            matches = [p for p in self._every if name == p or name.startswith(p + ".")]
+            every = self._every[max(matches, key=len)] if matches else 1
+            self._resolved[name] = every
+        return every
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        every = self._every_for(record.name)
+        if every == 1:
+            return True
+        if every == 0:
+            return False
+        # next() sur itertools.count est atomique sous le GIL
+        counter = self._counters.get(record.name) or self._counters.setdefault(
+            record.name, itertools.count()
+        )
+        if next(counter) % every:
+            return False
+        record.sampled = every
+        return True
+
+
+class _GatewayQueueHandler(QueueHandler):
+    """QueueHandler sans formatage dans le thread appelant et qui ne bloque jamais."""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Même processus : l'enregistrement part tel quel, la fusion des arguments %
+        # et la trace d'exception sont formatées dans le thread d'écriture
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class _GatewayQueueListener(QueueListener):
+    def enqueue_sentinel(self) -> None:
+        # File bornée : attend une place au lieu de lever queue.Full à l'arrêt
+        self.queue.put(self._sentinel)
+
+
+class LogPipeline:
+    """File bornée + thread d'écriture devant les handlers console et fichier."""
+
+    def __init__(self, queue_size: int = 10000, sample_rates: Optional[Dict[str, float]] = None):
+        """
+        Args:
+            queue_size: Enregistrements en attente d'écriture au plus
+            sample_rates: Taux de conservation par nom de logger (sous WARNING)
+        """
+        self.queue_size = queue_size
+        self.sample_rates = sample_rates or {}
+        self.handler = _GatewayQueueHandler(queue.Queue(queue_size))
+        if self.sample_rates:
+            self.handler.addFilter(SamplingFilter(self.sample_rates))
+        self._handlers: List[logging.Handler] = []
+        self._listener: Optional[QueueListener] = None
+        self._lock = threading.Lock()
+        self._installed = False
+
+    def install(self, target: logging.Logger, handlers: List[logging.Handler]) -> None:
+        """Branche la file sur `target` et démarre le thread d'écriture vers `handlers`."""
+        with self._lock:
+            self._handlers = list(handlers)
+            target.addHandler(self.handler)
+            self._start()
+            if not self._installed:
+                self._installed = True
+                atexit.register(self.stop)
+                if hasattr(os, "register_at_fork"):
+                    os.register_at_fork(after_in_child=self._after_fork_in_child)
+
+    def _start(self) -> None:
+        self._listener = _GatewayQueueListener(
+            self.handler.queue, *self._handlers, respect_handler_level=True
+        )
+        self._listener.start()
+
+    def stop(self) -> None:
+        """Écrit les enregistrements restants puis arrête le thread (idempotent)."""
+        listener, self._listener = self._listener, None
+        if listener is not None:
+            listener.stop()
+
+    def _after_fork_in_child(self) -> None:
+        # Le thread d'écriture n'existe pas dans l'enfant, et la file copiée a pu être
+        # verrouillée au moment du fork : nouvelle file, nouveau thread
+        self._lock = threading.Lock()
+        if self._listener is None:
+            return
+        self.handler.queue = queue.Queue(self.queue_size)
+        self._start()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self._listener is not None,
+            "queued": self.handler.queue.qsize(),
+            "queue_size": self.queue_size,
+            "dropped": self.handler.dropped,
+            "sampling": self.sample_rates,
+        }
+
+
+# --- INSTANCE GLOBALE ---
+log_pipeline = LogPipeline(queue_size=LOG_QUEUE_SIZE, sample_rates=parse_sample_rates(LOG_SAMPLING))
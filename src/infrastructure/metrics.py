@@ -0,0 +1,203 @@
+"""Métriques internes de la Gateway au format texte Prometheus.
+
+Ce module gère :
+- Des compteurs et histogrammes légers (un verrou et une recherche dichotomique
+  par observation), sans dépendance externe.
+- Des étiquettes bornées : un modèle inconnu du catalogue est agrégé sous "other".
+- Le rendu texte servi par GET /metrics.
+"""
+
+import threading
+from bisect import bisect_left
+from typing import Dict, List, Sequence, Tuple
+
+from ..domain.models import AVAILABLE_MODELS
+
+# Secondes : de la milliseconde (overhead) à plusieurs minutes (flux longs)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+# Chunks SSE par seconde sur la durée d'un flux
+RATE_BUCKETS = (1, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+_KNOWN_MODELS = frozenset(AVAILABLE_MODELS)
+
+
+def model_label(model: str) -> str:
+    """Étiquette de modèle bornée (les noms arbitraires des clients sont agrégés)."""
+    return model if model in _KNOWN_MODELS else "other"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Counter:
+    """Compteur monotone par combinaison d'étiquettes."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {value:g}"
+            for labels, value in items
+        ]
+
+
+class Histogram:
+    """Histogramme à buckets fixes par combinaison d'étiquettes."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Par série : un compteur par bucket (+Inf inclus) puis la somme des valeurs
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def count(self, *labels: str) -> int:
+        series = self._series.get(labels)
+        return int(sum(series[:-1])) if series else 0
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((labels, list(series)) for labels, series in self._series.items())
+
+        lines = []
+        for labels, series in items:
+            cumulative = 0
+            bounds = [f"{bound:g}" for bound in self.buckets] + ["+Inf"]
+            for bound, bucket_count in zip(bounds, series[:-1]):
+                cumulative += bucket_count
+                le = _format_labels(self.labelnames, labels, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{le} {int(cumulative)}")
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {series[-1]:.6g}")
+            lines.append(f"{self.name}_count{label_text} {int(cumulative)}")
+        return lines
+
+
+class MetricsRegistry:
+    """Ensemble des métriques exposées par /metrics."""
+
+    def __init__(self):
+        self._metrics = []
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        metric = Counter(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> Histogram:
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Exposition au format texte Prometheus 0.0.4."""
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# --- INSTANCE GLOBALE ---
+registry = MetricsRegistry()
+
+UPSTREAM_TTFB = registry.histogram(
+    "gateway_upstream_ttfb_seconds",
+    "Time to first byte of the 1min.ai feature call (response headers).",
+    ("model", "type", "mode"),
+)
+UPSTREAM_DURATION = registry.histogram(
+    "gateway_upstream_duration_seconds",
+    "Total duration of the 1min.ai feature call, until the last byte.",
+    ("model", "type", "mode"),
+)
+UPSTREAM_REQUESTS = registry.counter(
+    "gateway_upstream_requests_total",
+    "1min.ai feature calls by outcome (HTTP status class, error, circuit_open).",
+    ("model", "type", "outcome"),
+)
+GATEWAY_SHED = registry.counter(
+    "gateway_shed_requests_total",
+    "Completions rejected before the upstream call (queue full, queue timeout).",
+    ("reason",),
+)
+GATEWAY_OVERHEAD = registry.histogram(
+    "gateway_overhead_seconds",
+    "Time spent in the gateway itself (request handling minus upstream wait).",
+    ("model", "type", "mode"),
+)
+TOKENIZATION = registry.histogram(
+    "gateway_tokenization_seconds",
+    "Duration of a token count.",
+    ("model",),
+)
+ASSET_UPLOAD = registry.histogram(
+    "gateway_asset_upload_seconds",
+    "Duration of an image ingestion and upload to /api/assets.",
+    ("source", "result"),
+)
+STREAM_CHUNKS = registry.counter(
+    "gateway_stream_chunks_total",
+    "SSE chunks relayed to clients.",
+    ("model", "type"),
+)
+STREAM_CHUNK_RATE = registry.histogram(
+    "gateway_stream_chunk_rate",
+    "SSE chunks per second over a whole stream.",
+    ("model", "type"),
+    buckets=RATE_BUCKETS,
+)
+
+
+def render_metrics() -> str:
+    return registry.render()
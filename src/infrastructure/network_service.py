@@ -1,5 +1,6 @@
 # infrastructure/network_service.py
 
+import hashlib
 import uuid
 
 from flask import make_response
@@ -22,18 +23,48 @@ def handle_options_request():
     return response, 204
 
 
-def set_response_headers(response):
+def extract_api_key(headers):
     """
-    Applies standard security and tracking headers to JSON responses.
+    Hybrid authentication: reads the key from 'API-KEY' or from a Bearer 'Authorization'.
+    Works with any mapping of request headers (Flask or ASGI).
+    """
+    return headers.get("API-KEY") or (
+        headers.get("Authorization", "").replace("Bearer ", "")
+        if "Authorization" in headers
+        else None
+    )
+
+
+def hash_api_key(api_key):
+    """
+    Stable, non-reversible identifier of an API key for cache keys and quotas.
+    The raw key is never stored.
+    """
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:24]
+
+
+def build_response_headers():
     """
-    response.headers["Content-Type"] = "application/json"
-    response.headers["Access-Control-Allow-Origin"] = "*"
+    Returns the standard security and tracking headers applied to JSON responses.
+    """
+    return {
+        "Content-Type": "application/json",
+        "Access-Control-Allow-Origin": "*",
+        # Unique Request ID to correlate logs with client-side issues
+        "X-Request-ID": str(uuid.uuid4()),
+        # Allows client-side apps to read the X-Request-ID for debugging
+        "Access-Control-Expose-Headers": "X-Request-ID",
+    }
 
-    # Unique Request ID to correlate logs with client-side issues
-    request_id = str(uuid.uuid4())
-    response.headers["X-Request-ID"] = request_id
 
-    # Allows client-side apps to read the X-Request-ID for debugging
-    response.headers["Access-Control-Expose-Headers"] = "X-Request-ID"
+def set_response_headers(response):
+    """
+    Applies standard security and tracking headers to JSON responses.
+    """
+    for name, value in build_response_headers().items():
+        # SSE responses keep their text/event-stream content type
+        if name == "Content-Type" and response.mimetype == "text/event-stream":
+            continue
+        response.headers[name] = value
 
     return response
@@ -2,7 +2,7 @@
 
 Ce module gère :
 - La création de conversations avec l'API 1min.ai.
-- La résilience via un Circuit Breaker et des politiques de Retry.
+- La résilience via le Circuit Breaker et les pauses 429 du client amont.
 - La sécurité des logs (masquage des données sensibles).
 - La validation stricte des réponses (Content-Type et format JSON).
 """
@@ -12,82 +12,15 @@ import time
 from typing import Any, Dict, List, Optional
 
 import requests
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
+
+from ..config import ONE_MIN_CONVERSATION_API_URL, UPSTREAM_CONVERSATION_TIMEOUT
+from .circuit_breaker import CircuitOpenError
+from .upstream_client import upstream
+from .upstream_throttle import UpstreamThrottled
 
 # --- CONFIGURATION ---
 logger = logging.getLogger("1min-gateway.one-min-client")
-API_TIMEOUT = 20  # secondes
-
-
-def get_retry_session(
-    retries: int = 3,
-    backoff_factor: float = 0.5,
-    status_forcelist: tuple = (429, 500, 502, 503, 504),
-) -> requests.Session:
-    """Crée une session requests avec une stratégie de retry automatique."""
-    session = requests.Session()
-    retry_strategy = Retry(
-        total=retries,
-        backoff_factor=backoff_factor,
-        status_forcelist=status_forcelist,
-        allowed_methods=["POST", "GET"],
-        raise_on_status=False,
-    )
-    adapter = HTTPAdapter(max_retries=retry_strategy)
-    session.mount("http://", adapter)
-    session.mount("https://", adapter)
-    return session
-
-
-class CircuitBreaker:
-    """Implémentation d'un circuit breaker pour protéger l'infrastructure."""
-
-    def __init__(self, failure_threshold: int = 5, timeout: int = 60):
-        """Initialise le circuit breaker avec les seuils configurés.
-
-        Args:
-            failure_threshold: Nombre d'échecs consécutifs avant ouverture
-            timeout: Durée (secondes) pendant laquelle le circuit reste ouvert
-        """
-        self.failure_threshold = failure_threshold
-        self.timeout = timeout
-        self.failures = 0
-        self.opened_at: Optional[float] = None
-
-    def call_failed(self):
-        """Enregistre un échec et ouvre le circuit si le seuil est atteint."""
-        self.failures += 1
-        if self.failures >= self.failure_threshold:
-            self.opened_at = time.time()
-            logger.error(
-                "⚠️ CIRCUIT BREAKER OUVERT | %d échecs consécutifs. Pause de %ds.",
-                self.failures,
-                self.timeout,
-            )
-
-    def call_succeeded(self):
-        """Réinitialise les compteurs suite à un succès."""
-        if self.failures > 0:
-            logger.info("✅ Circuit Breaker réinitialisé après succès.")
-        self.failures = 0
-        self.opened_at = None
-
-    def is_open(self) -> bool:
-        """Vérifie si le circuit est actuellement ouvert."""
-        if self.opened_at is None:
-            return False
-        if time.time() - self.opened_at > self.timeout:
-            logger.info("🔄 Circuit Breaker: Tentative de réouverture (Half-Open)...")
-            self.opened_at = None
-            self.failures = 0
-            return False
-        return True
-
-
-# --- INSTANCES GLOBALES ---
-_session = get_retry_session()
-_circuit_breaker = CircuitBreaker()
+API_TIMEOUT = UPSTREAM_CONVERSATION_TIMEOUT  # secondes
 
 
 # --- HELPERS INTERNES ---
@@ -115,7 +48,7 @@ def _handle_response_errors(response: requests.Response) -> bool:
 
     msg = error_messages.get(response.status_code, f"Erreur API ({response.status_code})")
     logger.error("INFRA | %s", msg)
-    _circuit_breaker.call_failed()
+    # Les statuts 5xx sont déjà comptés par le circuit breaker du client amont
     return False
 
 
@@ -129,7 +62,7 @@ def _prepare_conversation_request(
     prompt_object: Optional[Dict[str, Any]],
 ) -> tuple[str, Dict[str, Any], Dict[str, str]]:
     """Prépare l'URL, les headers et le payload pour la requête."""
-    url = "https://api.1min.ai/api/conversations"
+    url = ONE_MIN_CONVERSATION_API_URL
 
     headers = {
         "API-KEY": api_key,
@@ -153,7 +86,11 @@ def _prepare_conversation_request(
 
 
 def _process_api_response(response: requests.Response, start_time: float) -> Optional[str]:
-    """Traite la réponse de l'API et extrait l'UUID."""
+    """Traite la réponse de l'API et extrait l'UUID.
+
+    L'issue de l'appel est déjà comptée par le circuit breaker du client amont :
+    une réponse inexploitable n'y est pas comptée une seconde fois.
+    """
 
     # 1. Validation HTTP de base
     if not _handle_response_errors(response):
@@ -163,7 +100,6 @@ def _process_api_response(response: requests.Response, start_time: float) -> Opt
     content_type = response.headers.get("Content-Type", "")
     if "application/json" not in content_type:
         logger.error("INFRA | Format de réponse invalide (non-JSON): %s", content_type)
-        _circuit_breaker.call_failed()
         return None
 
     # 3. Parsing JSON sécurisé
@@ -171,18 +107,15 @@ def _process_api_response(response: requests.Response, start_time: float) -> Opt
         data = response.json()
     except ValueError as parse_err:
         logger.error("INFRA | Échec du parsing JSON: %s", str(parse_err))
-        _circuit_breaker.call_failed()
         return None
 
     # 4. Extraction de l'UUID
     uuid = data.get("conversation", {}).get("uuid")
     if not uuid:
         logger.error("INFRA | UUID absent de la réponse réussie.")
-        _circuit_breaker.call_failed()
         return None
 
     # Succès
-    _circuit_breaker.call_succeeded()
     elapsed = time.time() - start_time
     logger.info("✅ INFRA | Conversation créée: %s (%.2fs)", uuid, elapsed)
 
@@ -216,11 +149,7 @@ def create_1min_conversation(
         L'UUID de la conversation créée ou None en cas d'erreur gérée.
     """
 
-    # 1. Vérification circuit breaker
-    if _circuit_breaker.is_open():
-        logger.error("❌ Circuit Breaker OUVERT. Requête annulée pour protéger le système.")
-        raise ConnectionError("Circuit breaker is open - API 1min.ai unavailable")
-
+    # 1. Le circuit breaker est vérifié par upstream.post (CircuitOpenError si ouvert)
     try:
         # 2. Préparation
         url, payload, headers = _prepare_conversation_request(
@@ -233,22 +162,27 @@ def create_1min_conversation(
 
         # 4. Envoi requête
         start_time = time.time()
-        response = _session.post(url, json=payload, headers=headers, timeout=API_TIMEOUT)
+        response = upstream.post("conversations", url, json=payload, headers=headers)
 
         # 5. Traitement réponse
         return _process_api_response(response, start_time)
 
+    except CircuitOpenError:
+        logger.error("❌ Circuit Breaker OUVERT. Requête annulée pour protéger le système.")
+        raise
+
+    except UpstreamThrottled as throttled:
+        logger.error("INFRA | Rate limit 1min.ai (429). Reprise dans %ss.", throttled.retry_after)
+        raise
+
     except requests.exceptions.Timeout:
         logger.error("TIMEOUT | L'API n'a pas répondu dans le délai de %ds.", API_TIMEOUT)
-        _circuit_breaker.call_failed()
         raise
 
     except requests.exceptions.RequestException as net_err:
         logger.error("NETWORK_ERROR | Erreur de connexion : %s", str(net_err))
-        _circuit_breaker.call_failed()
         return None
 
     except Exception as fatal_err:
         logger.error("FATAL_ERROR | Erreur inattendue : %s", str(fatal_err))
-        _circuit_breaker.call_failed()
         return None
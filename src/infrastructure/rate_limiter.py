@@ -0,0 +1,393 @@
+"""Limitation de débit par clé API, partagée entre workers et réplicas.
+
+Ce module gère :
+- Une identité client dérivée de la clé API (empreinte SHA-256, jamais la clé brute).
+- Deux stratégies : seau à jetons (GCRA) et fenêtre glissante (deux compteurs pondérés).
+- Un coût par requête proportionnel aux tokens estimés du prompt.
+- Un plafond de flux (stream) ouverts simultanément par clé.
+- Des opérations atomiques Memcached (add/incr/decr, gets/cas), avec repli en mémoire
+  tant que Memcached est injoignable : une panne ne bloque jamais le trafic.
+"""
+
+import logging
+import math
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from ..config import (
+    RATELIMIT_BACKEND,
+    RATELIMIT_ENABLED,
+    RATELIMIT_KEY_BURST,
+    RATELIMIT_KEY_RATE,
+    RATELIMIT_KEY_STRATEGY,
+    RATELIMIT_MAX_STREAMS_PER_KEY,
+    RATELIMIT_TOKENS_PER_REQUEST,
+    UPSTREAM_STREAM_TIMEOUT,
+)
+from .cache_service import UNAVAILABLE_WARNING_INTERVAL, get_memcached_client
+from .network_service import hash_api_key
+
+logger = logging.getLogger("1min-gateway.rate-limiter")
+
+TOKEN_BUCKET = "token-bucket"
+SLIDING_WINDOW = "sliding-window"
+
+# Période de référence des débits (RATELIMIT_KEY_RATE requêtes par minute)
+RATE_PERIOD = 60
+# Durée de vie d'un compteur de flux : un worker tué sans libérer ses créneaux
+# ne bloque la clé que jusqu'à expiration (rafraîchie à chaque ouverture)
+STREAM_SLOT_TTL = UPSTREAM_STREAM_TIMEOUT + 60
+# Durée pendant laquelle Memcached n'est plus sollicité après une erreur
+BACKEND_RETRY_SECONDS = 5
+# Tentatives de compare-and-swap avant d'abandonner une mise à jour disputée
+CAS_ATTEMPTS = 8
+# Taille du stockage mémoire au-delà de laquelle les entrées expirées sont purgées
+MEMORY_SWEEP_THRESHOLD = 10000
+
+
+class RateLimitExceeded(Exception):
+    """Requête refusée : quota de la clé API atteint (débit ou flux simultanés)."""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(f"Rate limit reached for this API key ({reason})")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+# --- STOCKAGES ---
+
+
+class MemoryQuotaStore:
+    """Compteurs et états en mémoire (un seul processus), protégés par un verrou."""
+
+    backend = "memory"
+    shared = False
+
+    def __init__(self):
+        self._data: Dict[str, Tuple[int, float]] = {}
+        self._lock = threading.Lock()
+
+    def _read(self, key: str, now: float) -> Optional[int]:
+        entry = self._data.get(key)
+        if entry is None or entry[1] <= now:
+            return None
+        return entry[0]
+
+    def _write(self, key: str, value: int, ttl: float, now: float) -> None:
+        if len(self._data) >= MEMORY_SWEEP_THRESHOLD:
+            for stale in [k for k, (_, expires) in self._data.items() if expires <= now]:
+                del self._data[stale]
+        self._data[key] = (value, now + ttl)
+
+    def get(self, key: str) -> Optional[int]:
+        with self._lock:
+            return self._read(key, time.monotonic())
+
+    def incr(self, key: str, amount: int, ttl: float) -> int:
+        """Ajoute amount au compteur (créé à 0) et rafraîchit son expiration."""
+        with self._lock:
+            now = time.monotonic()
+            value = (self._read(key, now) or 0) + amount
+            self._write(key, value, ttl, now)
+            return value
+
+    def decr(self, key: str, amount: int) -> None:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                self._data[key] = (max(0, entry[0] - amount), entry[1])
+
+    def update(self, key: str, apply: Callable[[Optional[int]], Optional[Tuple[int, float]]]):
+        """
+        Met à jour atomiquement une valeur : apply(courante) retourne (nouvelle, ttl),
+        ou None pour ne rien écrire. Retourne True si la valeur a été écrite.
+        """
+        with self._lock:
+            now = time.monotonic()
+            result = apply(self._read(key, now))
+            if result is None:
+                return False
+            self._write(key, result[0], result[1], now)
+            return True
+
+
+class MemcachedQuotaStore:
+    """Même interface via les opérations atomiques Memcached (état partagé entre réplicas).
+
+    incr/decr sont atomiques côté serveur ; les états composites (GCRA) passent par
+    gets/cas. Une panne bascule sur un stockage mémoire local pendant
+    BACKEND_RETRY_SECONDS, puis Memcached est de nouveau tenté.
+    """
+
+    backend = "memcached"
+
+    def __init__(self, client=None, prefix: str = "1mg:rl:"):
+        self._client = client
+        self._prefix = prefix
+        self._fallback = MemoryQuotaStore()
+        self._down_until = 0.0
+        self._last_warning = 0.0
+        self.errors = 0
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = get_memcached_client()
+        return self._client
+
+    @property
+    def shared(self) -> bool:
+        """Faux tant que les compteurs sont tenus localement (Memcached en panne)."""
+        return time.monotonic() >= self._down_until
+
+    def _call(self, operation: str, remote: Callable[[], Any], local: Callable[[], Any]):
+        if not self.shared:
+            return local()
+        try:
+            return remote()
+        except Exception as err:
+            self.errors += 1
+            now = time.monotonic()
+            self._down_until = now + BACKEND_RETRY_SECONDS
+            if now - self._last_warning > UNAVAILABLE_WARNING_INTERVAL:
+                self._last_warning = now
+                logger.warning(
+                    "RATE_LIMIT | Memcached indisponible (%s), repli en mémoire: %s",
+                    operation,
+                    err,
+                )
+            return local()
+
+    def get(self, key: str) -> Optional[int]:
+        def remote():
+            raw = self.client.get(self._prefix + key)
+            return int(raw) if raw is not None else None
+
+        return self._call("get", remote, lambda: self._fallback.get(key))
+
+    def incr(self, key: str, amount: int, ttl: float) -> int:
+        def remote():
+            full_key = self._prefix + key
+            expire = max(1, math.ceil(ttl))
+            for _ in range(CAS_ATTEMPTS):
+                value = self.client.incr(full_key, amount, noreply=False)
+                if value is not None:
+                    self.client.touch(full_key, expire, noreply=True)
+                    return int(value)
+                # Clé absente : add échoue si un autre worker l'a créée entre-temps
+                if self.client.add(full_key, str(amount), expire, noreply=False):
+                    return amount
+            raise RuntimeError(f"incr contention on {key}")
+
+        return self._call("incr", remote, lambda: self._fallback.incr(key, amount, ttl))
+
+    def decr(self, key: str, amount: int) -> None:
+        # Memcached borne decr à 0 ; une clé expirée est simplement ignorée
+        self._call(
+            "decr",
+            lambda: self.client.decr(self._prefix + key, amount, noreply=True),
+            lambda: self._fallback.decr(key, amount),
+        )
+
+    def update(self, key: str, apply: Callable[[Optional[int]], Optional[Tuple[int, float]]]):
+        def remote():
+            full_key = self._prefix + key
+            for _ in range(CAS_ATTEMPTS):
+                raw, cas_token = self.client.gets(full_key)
+                result = apply(int(raw) if raw is not None else None)
+                if result is None:
+                    return False
+                value, ttl = str(result[0]), max(1, math.ceil(result[1]))
+                if raw is None:
+                    stored = self.client.add(full_key, value, ttl, noreply=False)
+                else:
+                    stored = self.client.cas(full_key, value, cas_token, ttl, noreply=False)
+                if stored:
+                    return True
+            # Clé trop disputée : la requête est refusée plutôt que comptée deux fois
+            return False
+
+        return self._call("update", remote, lambda: self._fallback.update(key, apply))
+
+
+# --- LIMITEUR ---
+
+
+def _local_share(amount: int) -> int:
+    """Part d'un quota revenant à ce worker quand les compteurs ne sont pas partagés."""
+    from ..prefork import worker_count
+
+    workers = worker_count()
+    return amount if workers <= 1 else max(1, math.ceil(amount / workers))
+
+
+class ApiKeyRateLimiter:
+    """Quotas par clé API : débit pondéré par les tokens et flux simultanés."""
+
+    def __init__(
+        self,
+        store,
+        strategy: str = TOKEN_BUCKET,
+        rate: int = 180,
+        burst: int = 60,
+        tokens_per_request: int = 1000,
+        max_streams: int = 8,
+        enabled: bool = True,
+    ):
+        """
+        Args:
+            store: Stockage des compteurs (MemoryQuotaStore ou MemcachedQuotaStore)
+            strategy: "token-bucket" (rafales jusqu'à burst) ou "sliding-window"
+            rate: Unités de coût admises par minute et par clé
+            burst: Capacité du seau à jetons (rafale maximale)
+            tokens_per_request: Tokens de prompt estimés valant une unité (0 = coût fixe de 1)
+            max_streams: Flux ouverts simultanément par clé (0 = illimité)
+            enabled: Désactive toutes les vérifications si False
+        """
+        self.store = store
+        self.strategy = strategy
+        self.rate = rate
+        self.burst = burst
+        self.tokens_per_request = tokens_per_request
+        self.max_streams = max_streams
+        self.enabled = enabled
+
+        self._lock = threading.Lock()
+        self._allowed = 0
+        self._rejected = 0
+        self._streams_rejected = 0
+
+    def _quota(self, amount: int) -> int:
+        return amount if self.store.shared else _local_share(amount)
+
+    def request_cost(self, prompt_tokens: int) -> int:
+        """Unités consommées par une requête : 1 par tranche de tokens_per_request tokens."""
+        if self.tokens_per_request <= 0:
+            return 1
+        return max(1, math.ceil(prompt_tokens / self.tokens_per_request))
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    # --- DÉBIT ---
+
+    def acquire(self, api_key: str, cost: int = 1) -> None:
+        """Consomme cost unités du quota de la clé, ou lève RateLimitExceeded."""
+        if not self.enabled:
+            return
+        identity = hash_api_key(api_key)
+        if self.strategy == SLIDING_WINDOW:
+            retry_after = self._sliding_window(identity, cost)
+        else:
+            retry_after = self._token_bucket(identity, cost)
+
+        if retry_after is None:
+            self._count("_allowed")
+            return
+        self._count("_rejected")
+        raise RateLimitExceeded("requests", max(1, math.ceil(retry_after)))
+
+    def _token_bucket(self, identity: str, cost: int) -> Optional[float]:
+        """
+        GCRA : l'état est l'instant théorique d'arrivée (TAT, en ms) de la prochaine
+        unité. Une requête passe si TAT + coût ne dépasse pas maintenant + capacité.
+        """
+        rate, burst = self._quota(self.rate), self._quota(self.burst)
+        interval = RATE_PERIOD * 1000 / rate
+        # Une requête plus coûteuse que la capacité viderait le seau sans jamais passer
+        increment = interval * min(cost, burst)
+        tolerance = interval * burst
+        now = time.time() * 1000
+        denied = []
+
+        def apply(tat):
+            new_tat = max(tat or 0, now) + increment
+            if new_tat - now > tolerance:
+                denied.append((new_tat - now - tolerance) / 1000)
+                return None
+            return int(new_tat), (new_tat - now) / 1000 + 1
+
+        if self.store.update(f"tb:{identity}", apply):
+            return None
+        return denied[-1] if denied else 1.0
+
+    def _sliding_window(self, identity: str, cost: int) -> Optional[float]:
+        """
+        Fenêtre glissante approchée : compteur de la minute courante plus celui de la
+        précédente, pondéré par la part de celle-ci encore couverte par la fenêtre.
+        Le coût est ajouté atomiquement puis retiré si le quota est dépassé.
+        """
+        limit = self._quota(self.rate)
+        now = time.time()
+        window = int(now // RATE_PERIOD)
+        elapsed = now - window * RATE_PERIOD
+        previous = self.store.get(f"sw:{identity}:{window - 1}") or 0
+        current = self.store.incr(f"sw:{identity}:{window}", cost, 2 * RATE_PERIOD)
+        weight = 1 - elapsed / RATE_PERIOD
+        if previous * weight + current <= max(limit, cost):
+            return None
+
+        self.store.decr(f"sw:{identity}:{window}", cost)
+        current -= cost
+        if previous and current + cost <= limit:
+            # Instant où la part restante de la minute précédente laisse passer le coût
+            needed_weight = (limit - current - cost) / previous
+            return (1 - needed_weight) * RATE_PERIOD - elapsed
+        return RATE_PERIOD - elapsed
+
+    # --- FLUX SIMULTANÉS ---
+
+    def open_stream(self, api_key: str) -> Callable[[], None]:
+        """
+        Réserve un créneau de flux pour la clé et retourne sa fonction de libération
+        (idempotente), ou lève RateLimitExceeded si la clé a trop de flux ouverts.
+        """
+        if not self.enabled or self.max_streams <= 0:
+            return lambda: None
+        key = f"streams:{hash_api_key(api_key)}"
+        if self.store.incr(key, 1, STREAM_SLOT_TTL) > self._quota(self.max_streams):
+            self.store.decr(key, 1)
+            self._count("_streams_rejected")
+            raise RateLimitExceeded("concurrent streams", 1)
+
+        released = threading.Event()
+
+        def release():
+            if not released.is_set():
+                released.set()
+                self.store.decr(key, 1)
+
+        return release
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "strategy": self.strategy,
+                "backend": self.store.backend,
+                "shared": self.store.shared,
+                "allowed": self._allowed,
+                "rejected": self._rejected,
+                "streams_rejected": self._streams_rejected,
+                "backend_errors": getattr(self.store, "errors", 0),
+            }
+
+
+def build_rate_limiter():
+    """Construit le limiteur par clé API selon la configuration."""
+    store = MemcachedQuotaStore() if RATELIMIT_BACKEND == "memcached" else MemoryQuotaStore()
+    return ApiKeyRateLimiter(
+        store,
+        strategy=RATELIMIT_KEY_STRATEGY,
+        rate=RATELIMIT_KEY_RATE,
+        burst=RATELIMIT_KEY_BURST,
+        tokens_per_request=RATELIMIT_TOKENS_PER_REQUEST,
+        max_streams=RATELIMIT_MAX_STREAMS_PER_KEY,
+        enabled=RATELIMIT_ENABLED,
+    )
+
+
+# --- INSTANCE GLOBALE ---
+key_rate_limiter = build_rate_limiter()
@@ -1,15 +1,311 @@
 # infrastructure/token_service.py
 
+import hashlib
+import importlib
 import logging
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 
-import tiktoken
-from mistral_common.protocol.instruct.messages import UserMessage
-from mistral_common.protocol.instruct.request import ChatCompletionRequest
-from mistral_common.tokens.tokenizers.mistral import MistralTokenizer
+from ..config import TOKEN_CACHE_ENABLED, TOKEN_CACHE_MAX_ENTRIES, TOKENIZE_THREADS
+from ..domain.models import AVAILABLE_MODELS
+from .cache_service import LRUCache
+from .metrics import TOKENIZATION, model_label
 
 # Using a specific namespace for easier log filtering
 logger = logging.getLogger("1min-gateway.token-service")
 
+# Encoding identifiers understood by the registry
+MISTRAL_TARGET_MODEL = "open-mistral-nemo"
+MISTRAL_ENCODING = f"mistral:{MISTRAL_TARGET_MODEL}"
+DEFAULT_ENCODING = "cl100k_base"
+
+# Characters buffered before a deferred stream batch is handed to the workers
+USAGE_BATCH_CHARS = 2048
+# Last whitespace run and the word after it: deferred batches are cut before it
+_BATCH_TAIL = re.compile(r"\s+\S*\Z")
+# Shorter strings are tokenized directly: hashing them costs about as much
+TOKEN_CACHE_MIN_CHARS = 64
+
+# Heavy tokenizer libraries, imported on first use rather than at startup
+# (mistral_common alone takes most of the gateway's import time)
+_LAZY_IMPORTS = {
+    "tiktoken": ("tiktoken", None),
+    "MistralTokenizer": ("mistral_common.tokens.tokenizers.mistral", "MistralTokenizer"),
+    "ChatCompletionRequest": ("mistral_common.protocol.instruct.request", "ChatCompletionRequest"),
+    "UserMessage": ("mistral_common.protocol.instruct.messages", "UserMessage"),
+}
+
+
+def __getattr__(name):
+    """Resolves the lazily imported names (module attributes, PEP 562)."""
+    target = _LAZY_IMPORTS.get(name)
+    if target is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module_name, attribute = target
+    value = importlib.import_module(module_name)
+    if attribute:
+        value = getattr(value, attribute)
+    globals()[name] = value
+    return value
+
+
+def _lazy(name):
+    """Lazily imported name, as seen from inside this module."""
+    value = globals().get(name)
+    return value if value is not None else __getattr__(name)
+
+
+# Model families counted with tiktoken's model-specific encodings
+# Note: Claude 3 uses a tokenizer similar to cl100k_base or o200k_base.
+OPENAI_FAMILY_MARKERS = ("gpt-3.5", "gpt-4", "gpt-4o", "claude", "o1", "o3")
+
+
+@lru_cache(maxsize=256)
+def resolve_encoding_name(model):
+    """
+    Maps a model name to the encoding used to count its tokens.
+    Only string lookups happen here: no vocabulary is loaded.
+    """
+    model_lower = model.lower()
+
+    # --- MISTRAL FAMILY ---
+    # Mistral uses a specific tokenizer (Llama 3 based or Tekken)
+    if "mistral" in model_lower or "nemo" in model_lower:
+        return MISTRAL_ENCODING
+
+    # --- OPENAI & ANTHROPIC FAMILY ---
+    if any(marker in model_lower for marker in OPENAI_FAMILY_MARKERS):
+        try:
+            return _lazy("tiktoken").encoding_name_for_model(model)
+        except KeyError:
+            # Fallback to cl100k_base, the most common standard for modern LLMs
+            return DEFAULT_ENCODING
+
+    # --- DEFAULT FALLBACK ---
+    return DEFAULT_ENCODING
+
+
+def _load_mistral_counter():
+    """Loads the Mistral tokenizer once and returns a counting function."""
+    tokenizer = _lazy("MistralTokenizer").from_model(MISTRAL_TARGET_MODEL)
+    chat_request = _lazy("ChatCompletionRequest")
+    user_message = _lazy("UserMessage")
+
+    def count(text):
+        tokenized = tokenizer.encode_chat_completion(
+            chat_request(
+                messages=[user_message(content=text)],
+                model=MISTRAL_TARGET_MODEL,
+            )
+        )
+        return len(tokenized.tokens)
+
+    def count_batch(texts, num_threads=1):
+        # No batch API in mistral_common: texts are counted one after the other
+        return [count(text) for text in texts]
+
+    raw_tokenizer = tokenizer.instruct_tokenizer.tokenizer
+
+    def count_raw(text):
+        # Text alone, without the chat template (BOS, [INST]) added by `count`
+        return len(raw_tokenizer.encode(text, bos=False, eos=False))
+
+    count.batch = count_batch
+    count.raw = count_raw
+
+    return count
+
+
+def _load_tiktoken_counter(encoding_name):
+    """Loads a tiktoken encoding once and returns a counting function."""
+    encoding = _lazy("tiktoken").get_encoding(encoding_name)
+
+    def count(text):
+        return len(encoding.encode(text))
+
+    def count_batch(texts, num_threads=TOKENIZE_THREADS):
+        # encode_batch spreads the texts over a thread pool (the Rust core releases the GIL)
+        return [len(tokens) for tokens in encoding.encode_batch(texts, num_threads=num_threads)]
+
+    count.batch = count_batch
+    count.raw = count
+
+    return count
+
+
+class TokenizerRegistry:
+    """
+    Process-wide tokenizer cache shared by all waitress worker threads.
+    Each encoding is loaded at most once; model names resolve to encodings
+    through a table computed from the domain model catalog on first use.
+    """
+
+    def __init__(self, models=()):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._models = tuple(models)
+        self._model_table = None
+
+    @property
+    def model_table(self):
+        """Model -> encoding table of the catalog (built lazily: it imports tiktoken)."""
+        if self._model_table is None:
+            self._model_table = {model: resolve_encoding_name(model) for model in self._models}
+        return self._model_table
+
+    def encoding_name(self, model):
+        """Returns the encoding name for a model (precomputed table first)."""
+        name = self.model_table.get(model)
+        if name is None:
+            # Unknown models are resolved through the bounded lru_cache only,
+            # so arbitrary client input cannot grow the table.
+            name = resolve_encoding_name(model)
+        return name
+
+    def get_counter(self, encoding_name):
+        """Returns the counting function of an encoding, loading it on first use."""
+        counter = self._counters.get(encoding_name)
+        if counter is not None:
+            return counter
+
+        with self._lock:
+            # Double-checked: another thread may have loaded it while we waited
+            counter = self._counters.get(encoding_name)
+            if counter is None:
+                logger.info("TOKENIZER | Chargement de l'encodage '%s'", encoding_name)
+                if encoding_name == MISTRAL_ENCODING:
+                    counter = _load_mistral_counter()
+                else:
+                    counter = _load_tiktoken_counter(encoding_name)
+                self._counters[encoding_name] = counter
+        return counter
+
+    def count(self, text, model):
+        """Counts the tokens of a string for the given model."""
+        return self.get_counter(self.encoding_name(model))(text)
+
+    def preload(self):
+        """Loads every encoding of the model table (e.g. before forking workers)."""
+        for encoding_name in sorted(set(self.model_table.values())):
+            try:
+                self.get_counter(encoding_name)
+            except Exception as e:
+                logger.warning(
+                    "TOKENIZER | Préchargement de '%s' impossible: %s", encoding_name, str(e)[:100]
+                )
+        return self.loaded_encodings()
+
+    def loaded_encodings(self):
+        """Lists the encodings currently held in memory."""
+        return sorted(self._counters)
+
+    def clear(self):
+        """Drops every loaded tokenizer (mainly useful for tests)."""
+        with self._lock:
+            self._counters.clear()
+
+
+class TokenCountCache:
+    """
+    Bounded LRU memo of token counts keyed by (encoding, content hash).
+    Clients re-send the whole conversation every turn: shared system prompts and
+    past messages are then tokenized once per process instead of once per request.
+    """
+
+    def __init__(self, enabled=True, max_entries=16384, min_chars=TOKEN_CACHE_MIN_CHARS):
+        self.enabled = enabled
+        self.min_chars = min_chars
+        self._cache = LRUCache("token-counts", max_entries=max_entries) if enabled else None
+
+    @staticmethod
+    def _key(encoding_name, text):
+        digest = hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+        return f"{encoding_name}:{digest}"
+
+    def count(self, text, encoding_name, counter):
+        """Returns the memoised count of `text`, tokenizing it with `counter` on a miss."""
+        if not self.enabled or len(text) < self.min_chars:
+            return counter(text)
+        key = self._key(encoding_name, text)
+        cached = self._cache.get(key)
+        if cached is not None:
+            return int(cached)
+        count = counter(text)
+        self._cache.set(key, str(count))
+        return count
+
+    def count_many(self, texts, encoding_name, count_batch):
+        """
+        Counts several strings: memo hits are answered directly and the misses
+        (each distinct text once) are handed together to `count_batch`.
+        """
+        results = [None] * len(texts)
+        misses = {}
+        for index, text in enumerate(texts):
+            if not text:
+                results[index] = 0
+                continue
+            if self.enabled and len(text) >= self.min_chars:
+                cached = self._cache.get(self._key(encoding_name, text))
+                if cached is not None:
+                    results[index] = int(cached)
+                    continue
+            misses.setdefault(text, []).append(index)
+
+        if misses:
+            pending = list(misses)
+            for text, count in zip(pending, count_batch(pending)):
+                for index in misses[text]:
+                    results[index] = count
+                if self.enabled and len(text) >= self.min_chars:
+                    self._cache.set(self._key(encoding_name, text), str(count))
+        return results
+
+    def clear(self):
+        if self.enabled:
+            self._cache.clear()
+
+    def stats(self):
+        if not self.enabled:
+            return {"enabled": False}
+        stats = self._cache.stats()
+        stats["enabled"] = True
+        return stats
+
+
+# --- INSTANCE GLOBALE ---
+_registry = TokenizerRegistry(AVAILABLE_MODELS)
+token_count_cache = TokenCountCache(TOKEN_CACHE_ENABLED, TOKEN_CACHE_MAX_ENTRIES)
+_prewarm_thread = None
+
+
+def get_tokenizer_registry():
+    """Returns the process-wide tokenizer registry."""
+    return _registry
+
+
+def prewarm_tokenizers():
+    """
+    Loads the catalog tokenizers in a background thread, so that startup does
+    not wait for them and the first requests rarely do.
+    """
+    global _prewarm_thread
+    if _prewarm_thread is None:
+        _prewarm_thread = threading.Thread(
+            target=_registry.preload, name="tokenizer-prewarm", daemon=True
+        )
+        _prewarm_thread.start()
+    return _prewarm_thread
+
+
+def wait_for_prewarm(timeout=None):
+    """Waits for the background pre-warm, if any (e.g. before forking workers)."""
+    if _prewarm_thread is not None:
+        _prewarm_thread.join(timeout)
+
 
 def calculate_token(sentence, model="gpt-4o"):
     """
@@ -19,42 +315,154 @@ def calculate_token(sentence, model="gpt-4o"):
     if not sentence:
         return 0
 
+    started = time.perf_counter()
     try:
-        model_lower = model.lower()
-
-        # --- MISTRAL FAMILY ---
-        # Mistral uses a specific tokenizer (Llama 3 based or Tekken)
-        if "mistral" in model_lower or "nemo" in model_lower:
-            target_model = "open-mistral-nemo"
-            tokenizer = MistralTokenizer.from_model(target_model)
-            tokenized = tokenizer.encode_chat_completion(
-                ChatCompletionRequest(
-                    messages=[UserMessage(content=str(sentence))],
-                    model=target_model,
-                )
-            )
-            return len(tokenized.tokens)
+        encoding_name = _registry.encoding_name(model)
+        return token_count_cache.count(
+            str(sentence), encoding_name, _registry.get_counter(encoding_name)
+        )
 
-        # --- OPENAI & ANTHROPIC FAMILY ---
-        # Note: Claude 3 uses a tokenizer similar to cl100k_base or o200k_base.
-        # tiktoken is the most reliable tool for these estimates.
-        elif any(m in model_lower for m in ["gpt-3.5", "gpt-4", "gpt-4o", "claude", "o1", "o3"]):
-            try:
-                # Attempt to get the exact encoding for the model
-                encoding = tiktoken.encoding_for_model(model)
-            except KeyError:
-                # Fallback to cl100k_base, the most common standard for modern LLMs
-                encoding = tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        logger.error("TOKEN_CALC_ERROR | Model: %s | Error: %.100s", model, e)
+        # Fallback estimation: roughly 1 token per 4 characters
+        return max(1, len(str(sentence)) // 4)
 
-            return len(encoding.encode(str(sentence)))
+    finally:
+        TOKENIZATION.observe(time.perf_counter() - started, model_label(model))
 
-        # --- DEFAULT FALLBACK ---
-        # If the model is unknown, we use the standard cl100k_base encoder
-        else:
-            encoding = tiktoken.get_encoding("cl100k_base")
-            return len(encoding.encode(str(sentence)))
 
+def count_tokens_batch(texts, model="gpt-4o"):
+    """
+    Counts the tokens of many strings for one model (e.g. /v1/tokenize).
+    Memoised texts are not re-tokenized; the others go through the encoding's
+    batch API. On tokenizer failure each text falls back to `calculate_token`.
+    """
+    texts = [str(text) for text in texts]
+    try:
+        encoding_name = _registry.encoding_name(model)
+        counter = _registry.get_counter(encoding_name)
+        count_batch = getattr(counter, "batch", None) or (lambda items: [counter(t) for t in items])
+        return token_count_cache.count_many(texts, encoding_name, count_batch)
     except Exception as e:
-        logger.error(f"TOKEN_CALC_ERROR | Model: {model} | Error: {str(e)[:100]}")
-        # Fallback estimation: roughly 1 token per 4 characters
-        return max(1, len(str(sentence)) // 4)
+        logger.error("TOKEN_BATCH_ERROR | Model: %s | Error: %.100s", model, e)
+        return [calculate_token(text, model) for text in texts]
+
+
+def count_text_tokens(text, model="gpt-4o"):
+    """
+    Counts the tokens of a completion fragment with the raw tokenizer (no chat
+    template), so that the counts of consecutive fragments can be summed.
+    """
+    if not text:
+        return 0
+
+    started = time.perf_counter()
+    try:
+        counter = _registry.get_counter(_registry.encoding_name(model))
+        return getattr(counter, "raw", counter)(str(text))
+
+    except Exception as e:
+        logger.error("TOKEN_CALC_ERROR | Model: %s | Error: %.100s", model, e)
+        return estimate_token(text)
+
+    finally:
+        TOKENIZATION.observe(time.perf_counter() - started, model_label(model))
+
+
+def estimate_token(sentence):
+    """
+    Fast token estimate without any tokenizer: roughly 1 token per 4 characters.
+    """
+    if not sentence:
+        return 0
+    return max(1, len(str(sentence)) // 4)
+
+
+# --- COMPTAGE DIFFÉRÉ (USAGE) ---
+_usage_pool = None
+_usage_pool_lock = threading.Lock()
+
+
+def _get_usage_pool(max_workers):
+    """Creates the background tokenization pool on first use."""
+    global _usage_pool
+    if _usage_pool is None:
+        with _usage_pool_lock:
+            if _usage_pool is None:
+                _usage_pool = ThreadPoolExecutor(
+                    max_workers=max_workers, thread_name_prefix="usage-counter"
+                )
+    return _usage_pool
+
+
+class CompletionUsageCounter:
+    """
+    Accumulates completion text chunk by chunk and produces the completion token count.
+
+    Modes:
+        exact: counts the joined text once, at the end (historical behaviour).
+        deferred: hands batches of chunks to a background pool while the stream
+            runs, so the final usage block only sums already computed counts.
+            Batches end at whitespace.
+        estimate: keeps a character count and applies `estimate_token`.
+
+    exact and deferred both use `count_text_tokens` (no chat template), so they
+    report the same completion_tokens for a given text.
+    """
+
+    def __init__(self, model, mode="exact", workers=2, batch_chars=USAGE_BATCH_CHARS):
+        self.model = model
+        self.mode = mode
+        self._workers = workers
+        self._batch_chars = batch_chars
+        self._parts = []
+        self._pending_chars = 0
+        self._char_count = 0
+        self._futures = []
+
+    def add(self, text):
+        """Registers a completion chunk."""
+        if not text:
+            return
+        self._char_count += len(text)
+        if self.mode == "estimate":
+            return
+
+        self._parts.append(text)
+        if self.mode == "deferred":
+            self._pending_chars += len(text)
+            if self._pending_chars >= self._batch_chars:
+                self._flush()
+
+    def _flush(self, final=False):
+        """Submits the buffered chunks to the background pool."""
+        if not self._parts:
+            return
+        batch = "".join(self._parts)
+        rest = ""
+        if not final:
+            # Never split a word: the last word waits for the next batch
+            tail = _BATCH_TAIL.search(batch)
+            if tail is None or tail.start() == 0:
+                # No word boundary yet (long token run): look again one batch later
+                self._parts = [batch]
+                self._pending_chars = 0
+                return
+            cut = tail.start()
+            batch, rest = batch[:cut], batch[cut:]
+        self._parts = [rest] if rest else []
+        self._pending_chars = len(rest)
+        pool = _get_usage_pool(self._workers)
+        self._futures.append(pool.submit(count_text_tokens, batch, self.model))
+
+    def total(self):
+        """Returns the completion token count."""
+        if self.mode == "estimate":
+            return max(1, self._char_count // 4) if self._char_count else 0
+
+        if self.mode == "deferred":
+            # Only the last (small) batch may still be tokenizing here
+            self._flush(final=True)
+            return sum(future.result() for future in self._futures)
+
+        return count_text_tokens("".join(self._parts), self.model)
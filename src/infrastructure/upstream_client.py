@@ -0,0 +1,225 @@
+"""Client HTTP mutualisé pour tous les appels sortants de la Gateway.
+
+Ce module gère :
+- Une session `requests` unique avec des pools keep-alive dimensionnés sur waitress.
+- Des politiques de timeout et de retry propres à chaque endpoint 1min.ai.
+- Les statistiques de réutilisation des connexions (hits/misses du pool).
+- La protection des endpoints 1min.ai par le circuit breaker partagé.
+- Le respect des 429 de 1min.ai : pause partagée par clé API et endpoint (Retry-After).
+"""
+
+import logging
+from typing import Any, Dict, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from ..config import (
+    ONE_MIN_ASSET_API_URL,
+    ONE_MIN_CONVERSATION_API_URL,
+    ONE_MIN_FEATURE_API_URL,
+    UPSTREAM_ASSET_RETRIES,
+    UPSTREAM_ASSET_TIMEOUT,
+    UPSTREAM_CONNECT_TIMEOUT,
+    UPSTREAM_CONVERSATION_RETRIES,
+    UPSTREAM_CONVERSATION_TIMEOUT,
+    UPSTREAM_DOWNLOAD_TIMEOUT,
+    UPSTREAM_FEATURE_RETRIES,
+    UPSTREAM_FEATURE_TIMEOUT,
+    UPSTREAM_POOL_SIZE,
+    UPSTREAM_STREAM_TIMEOUT,
+    UPSTREAM_THROTTLE_DEFAULT_SECONDS,
+)
+from .circuit_breaker import CircuitBreaker, one_min_breaker
+from .upstream_throttle import UpstreamThrottle, UpstreamThrottled, upstream_throttle
+
+logger = logging.getLogger("1min-gateway.upstream-client")
+
+
+def connect_only_retry(retries: int) -> Retry:
+    """Retry limité aux échecs de connexion : sûr même pour un POST non idempotent."""
+    return Retry(total=retries, connect=retries, read=0, status=0, other=0, backoff_factor=0.2)
+
+
+def full_retry(
+    retries: int,
+    methods: Tuple[str, ...] = ("GET", "POST"),
+    statuses: Tuple[int, ...] = (429, 500, 502, 503, 504),
+) -> Retry:
+    """Retry sur erreurs réseau et statuts transitoires (429, 5xx par défaut)."""
+    return Retry(
+        total=retries,
+        backoff_factor=0.5,
+        status_forcelist=statuses,
+        allowed_methods=list(methods),
+        raise_on_status=False,
+    )
+
+
+# --- POLITIQUES PAR ENDPOINT ---
+# prefixes : préfixes d'URL montés sur l'adaptateur de l'endpoint
+# timeout  : (connexion, lecture) en secondes ; stream_timeout pour les flux SSE
+# guarded  : appels soumis au circuit breaker 1min.ai
+ENDPOINT_POLICIES: Dict[str, Dict[str, Any]] = {
+    "features": {
+        "guarded": True,
+        "prefixes": (ONE_MIN_FEATURE_API_URL,),
+        "timeout": (UPSTREAM_CONNECT_TIMEOUT, UPSTREAM_FEATURE_TIMEOUT),
+        "stream_timeout": (UPSTREAM_CONNECT_TIMEOUT, UPSTREAM_STREAM_TIMEOUT),
+        "retry": connect_only_retry(UPSTREAM_FEATURE_RETRIES),
+    },
+    "conversations": {
+        "guarded": True,
+        "prefixes": (ONE_MIN_CONVERSATION_API_URL,),
+        "timeout": (UPSTREAM_CONNECT_TIMEOUT, UPSTREAM_CONVERSATION_TIMEOUT),
+        # 429 exclu : la pause est gérée par upstream_throttle, pas par un retry qui dort
+        "retry": full_retry(UPSTREAM_CONVERSATION_RETRIES, statuses=(500, 502, 503, 504)),
+    },
+    "assets": {
+        "guarded": True,
+        "prefixes": (ONE_MIN_ASSET_API_URL,),
+        "timeout": (UPSTREAM_CONNECT_TIMEOUT, UPSTREAM_ASSET_TIMEOUT),
+        "retry": connect_only_retry(UPSTREAM_ASSET_RETRIES),
+    },
+    # Images externes fournies par les clients (toute autre URL)
+    "downloads": {
+        "prefixes": ("https://", "http://"),
+        "timeout": (UPSTREAM_CONNECT_TIMEOUT, UPSTREAM_DOWNLOAD_TIMEOUT),
+        "retry": full_retry(2, methods=("GET",)),
+    },
+}
+
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """Adaptateur HTTP exposant les compteurs de ses pools urllib3."""
+
+    def pool_stats(self) -> Dict[str, int]:
+        """Agrège requêtes et connexions ouvertes sur les pools de l'adaptateur."""
+        requests_count = 0
+        connections = 0
+        pools = self.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            requests_count += pool.num_requests
+            connections += pool.num_connections
+        return {"requests": requests_count, "connections": connections}
+
+
+class UpstreamClient:
+    """Point de passage unique des appels HTTP sortants (1min.ai et images externes)."""
+
+    def __init__(
+        self,
+        pool_size: int = UPSTREAM_POOL_SIZE,
+        policies: Optional[Dict[str, Dict[str, Any]]] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        throttle: Optional[UpstreamThrottle] = None,
+    ):
+        """Monte un adaptateur keep-alive par endpoint sur une session partagée.
+
+        Args:
+            pool_size: Connexions conservées par hôte (aligné sur les threads waitress).
+            policies: Politiques par endpoint (ENDPOINT_POLICIES par défaut).
+            breaker: Circuit breaker des endpoints "guarded" (one_min_breaker par défaut).
+            throttle: Pauses 429 des endpoints "guarded" (upstream_throttle par défaut).
+        """
+        self.pool_size = pool_size
+        self.policies = policies or ENDPOINT_POLICIES
+        self.breaker = breaker or one_min_breaker
+        self.throttle = throttle or upstream_throttle
+        self._session = requests.Session()
+        self._session.headers.update({"User-Agent": "1min-Gateway/1.0"})
+        self._adapters: Dict[str, PooledHTTPAdapter] = {}
+
+        for name, policy in self.policies.items():
+            adapter = PooledHTTPAdapter(
+                pool_connections=4,
+                pool_maxsize=pool_size,
+                max_retries=policy["retry"],
+            )
+            self._adapters[name] = adapter
+            for prefix in policy["prefixes"]:
+                self._session.mount(prefix, adapter)
+
+    def _timeout(self, endpoint: str, stream: bool) -> Tuple[int, int]:
+        """Timeout (connexion, lecture) applicable à l'endpoint."""
+        policy = self.policies[endpoint]
+        if stream:
+            return policy.get("stream_timeout", policy["timeout"])
+        return policy["timeout"]
+
+    def _send(self, method: str, endpoint: str, url: str, **kwargs: Any) -> requests.Response:
+        """Envoie la requête ; les endpoints 1min.ai passent par le circuit breaker.
+
+        Lève CircuitOpenError sans appel réseau si le circuit est ouvert, et
+        UpstreamThrottled si la clé API est en pause sur l'endpoint ou si 1min.ai
+        répond 429. Les erreurs réseau et les statuts 5xx comptent comme échecs ;
+        429 et 4xx non.
+        """
+        kwargs.setdefault("timeout", self._timeout(endpoint, kwargs.get("stream", False)))
+        send = self._session.post if method == "POST" else self._session.get
+        if not self.policies[endpoint].get("guarded"):
+            return send(url, **kwargs)
+
+        api_key = (kwargs.get("headers") or {}).get("API-KEY")
+        if api_key:
+            self.throttle.check(api_key, endpoint)
+        self.breaker.guard()
+        try:
+            response = send(url, **kwargs)
+        except requests.exceptions.RequestException:
+            self.breaker.call_failed()
+            raise
+
+        if response.status_code >= 500:
+            self.breaker.call_failed()
+        else:
+            self.breaker.call_succeeded()
+
+        if api_key:
+            retry_after = self.throttle.observe(
+                api_key, endpoint, response.status_code, response.headers
+            )
+            if response.status_code == 429:
+                response.close()
+                raise UpstreamThrottled(
+                    endpoint, retry_after or UPSTREAM_THROTTLE_DEFAULT_SECONDS, True
+                )
+        return response
+
+    def post(self, endpoint: str, url: str, **kwargs: Any) -> requests.Response:
+        """POST via le pool de l'endpoint avec son timeout par défaut."""
+        return self._send("POST", endpoint, url, **kwargs)
+
+    def get(self, endpoint: str, url: str, **kwargs: Any) -> requests.Response:
+        """GET via le pool de l'endpoint avec son timeout par défaut."""
+        return self._send("GET", endpoint, url, **kwargs)
+
+    def stats(self) -> Dict[str, Any]:
+        """Statistiques du pool : un hit est une requête servie sur un socket réutilisé."""
+        endpoints = {}
+        for name, adapter in self._adapters.items():
+            raw = adapter.pool_stats()
+            endpoints[name] = {
+                "requests": raw["requests"],
+                "hits": max(0, raw["requests"] - raw["connections"]),
+                "misses": raw["connections"],
+            }
+
+        total_requests = sum(e["requests"] for e in endpoints.values())
+        total_hits = sum(e["hits"] for e in endpoints.values())
+        return {
+            "pool_size": self.pool_size,
+            "requests": total_requests,
+            "hits": total_hits,
+            "misses": total_requests - total_hits,
+            "hit_rate": round(total_hits / total_requests, 4) if total_requests else 0.0,
+            "endpoints": endpoints,
+        }
+
+
+# --- INSTANCE GLOBALE ---
+upstream = UpstreamClient()
@@ -0,0 +1,204 @@
+"""Respect des limitations de débit imposées par 1min.ai (429, en-têtes de quota).
+
+Ce module gère :
+- La lecture de Retry-After (secondes ou date HTTP) et des en-têtes RateLimit-* /
+  X-RateLimit-* (quota restant, instant de réouverture).
+- Une pause par clé API (empreinte) et par endpoint : tant que la fenêtre n'est pas
+  rouverte, les appels sont refusés localement au lieu de relancer 1min.ai.
+- Un état optionnellement partagé via Memcached : tous les workers et réplicas
+  s'arrêtent ensemble, puis reprennent à l'instant annoncé par 1min.ai.
+"""
+
+import logging
+import math
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional, Tuple
+
+from ..config import (
+    UPSTREAM_THROTTLE_BACKEND,
+    UPSTREAM_THROTTLE_DEFAULT_SECONDS,
+    UPSTREAM_THROTTLE_MAX_SECONDS,
+)
+from .cache_service import MemcachedCache
+from .network_service import hash_api_key
+
+logger = logging.getLogger("1min-gateway.upstream-throttle")
+
+# Intervalle minimal entre deux lectures de l'état partagé pour une même clé
+SHARED_STATE_REFRESH = 1.0
+# Nombre de pauses suivies au-delà duquel les pauses terminées sont purgées
+SWEEP_THRESHOLD = 1024
+# Au-delà, une valeur de Reset est un timestamp Unix et non un délai
+EPOCH_THRESHOLD = 10**9
+
+REMAINING_HEADERS = ("RateLimit-Remaining", "X-RateLimit-Remaining")
+RESET_HEADERS = ("RateLimit-Reset", "X-RateLimit-Reset")
+
+
+class UpstreamThrottled(Exception):
+    """Appel vers 1min.ai refusé : la clé API est limitée sur cet endpoint."""
+
+    def __init__(self, endpoint: str, retry_after: int, from_upstream: bool = False):
+        super().__init__(f"1min.ai rate limit on '{endpoint}', retry in {retry_after}s")
+        self.endpoint = endpoint
+        self.retry_after = retry_after
+        # True si 1min.ai vient de répondre 429, False si la pause connue a évité l'appel
+        self.from_upstream = from_upstream
+
+
+def _header(headers: Any, names: Tuple[str, ...]) -> Optional[str]:
+    for name in names:
+        value = headers.get(name)
+        if isinstance(value, str) and value.strip():
+            return value.strip()
+    return None
+
+
+def _seconds_until_reset(value: str, now: float) -> Optional[float]:
+    """Délai avant réouverture : secondes, timestamp Unix (s ou ms) ou date HTTP."""
+    try:
+        number = float(value)
+    except ValueError:
+        try:
+            return parsedate_to_datetime(value).timestamp() - now
+        except (TypeError, ValueError):
+            return None
+    if number > EPOCH_THRESHOLD * 1000:
+        number /= 1000
+    return number - now if number > EPOCH_THRESHOLD else number
+
+
+def parse_retry_delay(status: Any, headers: Any, now: Optional[float] = None) -> Optional[float]:
+    """
+    Pause demandée par une réponse 1min.ai, en secondes ; None si l'endpoint reste ouvert.
+
+    Un 429 pause toujours (Retry-After, sinon Reset, sinon délai par défaut) ; une réponse
+    réussie pause seulement si elle annonce un quota restant nul.
+    """
+    now = time.time() if now is None else now
+    if headers is None or not hasattr(headers, "get"):
+        headers = {}
+
+    if status == 429:
+        for value in (_header(headers, ("Retry-After",)), _header(headers, RESET_HEADERS)):
+            if value is not None:
+                delay = _seconds_until_reset(value, now)
+                if delay is not None:
+                    return max(0.0, delay)
+        return float(UPSTREAM_THROTTLE_DEFAULT_SECONDS)
+
+    remaining = _header(headers, REMAINING_HEADERS)
+    reset = _header(headers, RESET_HEADERS)
+    if remaining is None or reset is None:
+        return None
+    try:
+        exhausted = float(remaining) <= 0
+    except ValueError:
+        return None
+    delay = _seconds_until_reset(reset, now) if exhausted else None
+    return delay if delay and delay > 0 else None
+
+
+class UpstreamThrottle:
+    """Pauses par (clé API, endpoint) annoncées par 1min.ai, partagées entre workers."""
+
+    def __init__(
+        self,
+        max_delay: float = 300,
+        shared_state: Optional[MemcachedCache] = None,
+    ):
+        """
+        Args:
+            max_delay: Pause maximale (secondes), garde-fou contre un en-tête aberrant
+            shared_state: Cache Memcached partageant les pauses entre workers et réplicas
+        """
+        self.max_delay = max_delay
+        self.shared_state = shared_state
+        self._paused_until: Dict[Tuple[str, str], float] = {}
+        self._last_sync: Dict[Tuple[str, str], float] = {}
+        self._lock = threading.Lock()
+        self._throttled = 0
+        self._avoided = 0
+
+    def _fetch_shared_pause(self, key: Tuple[str, str], now: float) -> Optional[float]:
+        """
+        Pause enregistrée par un autre worker (lecture limitée à 1/s par clé). La
+        lecture Memcached se fait hors verrou : une clé en pause ne bloque pas les autres.
+        """
+        if self.shared_state is None:
+            return None
+        with self._lock:
+            if now - self._last_sync.get(key, 0.0) < SHARED_STATE_REFRESH:
+                return None
+            self._last_sync[key] = now
+        raw = self.shared_state.get(":".join(key))
+        if raw is None:
+            return None
+        try:
+            return float(raw)
+        except ValueError:
+            return None
+
+    def check(self, api_key: str, endpoint: str) -> None:
+        """Lève UpstreamThrottled si la clé est en pause sur cet endpoint."""
+        key = (hash_api_key(api_key), endpoint)
+        now = time.time()
+        shared_until = self._fetch_shared_pause(key, now)
+        with self._lock:
+            until = self._paused_until.get(key, 0.0)
+            if shared_until is not None and shared_until > until:
+                until = self._paused_until[key] = shared_until
+            if until <= now:
+                return
+            self._avoided += 1
+        raise UpstreamThrottled(endpoint, max(1, math.ceil(until - now)))
+
+    def observe(self, api_key: str, endpoint: str, status: Any, headers: Any) -> Optional[int]:
+        """
+        Enregistre la pause annoncée par une réponse ; retourne le délai (secondes
+        entières) à transmettre au client, ou None si l'endpoint reste ouvert.
+        """
+        now = time.time()
+        delay = parse_retry_delay(status, headers, now)
+        if delay is None:
+            return None
+        delay = min(delay, self.max_delay)
+        key = (hash_api_key(api_key), endpoint)
+        until = now + delay
+
+        with self._lock:
+            if len(self._paused_until) >= SWEEP_THRESHOLD:
+                for stale in [k for k, v in self._paused_until.items() if v <= now]:
+                    del self._paused_until[stale]
+                    self._last_sync.pop(stale, None)
+            if until > self._paused_until.get(key, 0.0):
+                self._paused_until[key] = until
+            if status == 429:
+                self._throttled += 1
+
+        retry_after = max(1, math.ceil(delay))
+        if self.shared_state is not None:
+            self.shared_state.set(":".join(key), repr(until), ttl=retry_after)
+        logger.warning("THROTTLE | 1min.ai limite %s : pause de %ss", endpoint, retry_after)
+        return retry_after
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.time()
+        with self._lock:
+            return {
+                "backend": "memcached" if self.shared_state is not None else "memory",
+                "paused_keys": sum(1 for until in self._paused_until.values() if until > now),
+                "throttled": self._throttled,
+                "avoided_calls": self._avoided,
+            }
+
+
+# --- INSTANCE GLOBALE ---
+upstream_throttle = UpstreamThrottle(
+    max_delay=UPSTREAM_THROTTLE_MAX_SECONDS,
+    shared_state=(
+        MemcachedCache("upstream-throttle") if UPSTREAM_THROTTLE_BACKEND == "memcached" else None
+    ),
+)
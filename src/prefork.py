@@ -0,0 +1,236 @@
+# src/prefork.py
+
+"""
+Mode multi-processus (pre-fork) de la Gateway sur waitress.
+
+Le processus maître ouvre le socket d'écoute et préchauffe les tokenizers avant
+de forker : les workers partagent cette mémoire en copy-on-write. Il relance les
+workers morts, les remplace un à un sur SIGHUP et les arrête proprement sur
+SIGTERM / SIGINT. Chaque worker sert le socket hérité avec ses threads waitress.
+"""
+
+import gc
+import logging
+import math
+import os
+import signal
+import socket
+import threading
+import time
+
+from waitress import create_server
+
+from .config import WORKER_GRACEFUL_TIMEOUT
+from .infrastructure.logging_service import log_pipeline
+
+logger = logging.getLogger("1min-gateway.prefork")
+
+# File d'attente des connexions non encore acceptées, partagée par les workers
+LISTEN_BACKLOG = 1024
+# Intervalle de surveillance des workers par le maître
+SUPERVISE_INTERVAL = 0.5
+
+# Nombre de processus servant le socket (1 hors mode pre-fork)
+_worker_count = 1
+
+
+def worker_count():
+    """Nombre de workers servant la Gateway."""
+    return _worker_count
+
+
+def per_worker_limit(limit):
+    """
+    Part d'une limite ("180 per minute") revenant à un worker.
+    Sans stockage partagé, chaque worker compte seul : la limite globale est répartie.
+    """
+    if _worker_count <= 1:
+        return limit
+    amount, _, period = limit.partition(" per ")
+    return f"{max(1, math.ceil(int(amount) / _worker_count))} per {period}"
+
+
+def warm_up():
+    """
+    Charge avant le fork ce que tous les workers utiliseront (tokenizers),
+    puis gèle le tas pour que le ramasse-miettes ne duplique pas ces pages.
+    """
+    from .infrastructure.token_service import get_tokenizer_registry, wait_for_prewarm
+
+    started = time.perf_counter()
+    # Un préchauffage en tâche de fond ne doit pas tenir le verrou du registre au fork
+    wait_for_prewarm()
+    encodings = get_tokenizer_registry().preload()
+    gc.collect()
+    gc.freeze()
+    logger.info(
+        "PREFORK | Préchauffage en %.2fs (encodages: %s)",
+        time.perf_counter() - started,
+        ", ".join(encodings) or "aucun",
+    )
+
+
+def _is_busy(channel):
+    """Une connexion a une requête en cours ou des octets à envoyer."""
+    return bool(channel.requests) or channel.total_outbufs_len > 0
+
+
+def _drain_and_exit(server, timeout):
+    """Attend la fin des requêtes en cours (au plus `timeout` s) puis quitte le worker."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if not any(_is_busy(channel) for channel in list(server.active_channels.values())):
+            break
+        time.sleep(0.1)
+    else:
+        logger.warning("PREFORK | Worker %d arrêté avec des requêtes en cours", os.getpid())
+    # os._exit saute atexit : les journaux en file sont écrits avant de quitter
+    log_pipeline.stop()
+    logging.shutdown()
+    os._exit(0)
+
+
+def _run_worker(app, sock, threads, graceful_timeout):
+    """Boucle d'un worker : sert le socket hérité jusqu'à SIGTERM."""
+    # Ctrl+C et SIGHUP sont gérés par le maître, qui relaie un SIGTERM
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGHUP, signal.SIG_IGN)
+
+    server = create_server(app, sockets=[sock], threads=threads)
+
+    def stop(signum, frame):
+        if not server.accepting:
+            return
+        # Plus de nouvelles connexions : les autres workers prennent le relais
+        server.accepting = False
+        threading.Thread(
+            target=_drain_and_exit, args=(server, graceful_timeout), daemon=True
+        ).start()
+
+    signal.signal(signal.SIGTERM, stop)
+    logger.info("PREFORK | Worker %d prêt", os.getpid())
+    server.run()
+
+
+class PreforkServer:
+    """Processus maître : socket d'écoute, préchauffage et supervision des workers."""
+
+    def __init__(self, app, host, port, workers, threads, graceful_timeout=WORKER_GRACEFUL_TIMEOUT):
+        """
+        Args:
+            app: Application WSGI déjà construite (partagée par les workers).
+            host: Adresse d'écoute.
+            port: Port d'écoute.
+            workers: Nombre de processus waitress.
+            threads: Threads waitress par worker.
+            graceful_timeout: Délai laissé aux requêtes en cours à l'arrêt d'un worker.
+        """
+        self.app = app
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.threads = threads
+        self.graceful_timeout = graceful_timeout
+        self.sock = None
+        self._pids = set()
+        self._retiring = set()
+        self._stopping = False
+        self._restart_requested = False
+
+    def bind(self):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.host, self.port))
+        sock.listen(LISTEN_BACKLOG)
+        return sock
+
+    def spawn(self):
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                _run_worker(self.app, self.sock, self.threads, self.graceful_timeout)
+            except Exception:
+                logger.exception("PREFORK | Worker %d en erreur", os.getpid())
+                code = 1
+            finally:
+                log_pipeline.stop()
+                os._exit(code)
+        self._pids.add(pid)
+        return pid
+
+    def run(self):
+        global _worker_count
+        _worker_count = self.workers
+
+        self.sock = self.bind()
+        warm_up()
+
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGINT, self._handle_stop)
+        signal.signal(signal.SIGHUP, self._handle_restart)
+
+        for _ in range(self.workers):
+            self.spawn()
+        logger.info("PREFORK | Maître %d : %d workers démarrés", os.getpid(), self.workers)
+
+        stop_deadline = None
+        while self._pids:
+            if self._restart_requested and not self._stopping:
+                self._restart_requested = False
+                self._rolling_restart()
+            if self._stopping and stop_deadline is None:
+                stop_deadline = time.monotonic() + self.graceful_timeout + 5
+                self._signal_all(signal.SIGTERM)
+            if stop_deadline is not None and time.monotonic() > stop_deadline:
+                self._signal_all(signal.SIGKILL)
+            self._reap()
+            time.sleep(SUPERVISE_INTERVAL)
+
+        self.sock.close()
+        logger.info("PREFORK | Arrêt terminé")
+
+    def _handle_stop(self, signum, frame):
+        self._stopping = True
+
+    def _handle_restart(self, signum, frame):
+        self._restart_requested = True
+
+    def _signal_all(self, signum):
+        for pid in list(self._pids):
+            try:
+                os.kill(pid, signum)
+            except ProcessLookupError:
+                pass
+
+    def _rolling_restart(self):
+        """Remplace chaque worker : le nouveau accepte pendant que l'ancien termine ses requêtes."""
+        logger.info("PREFORK | Redémarrage progressif de %d workers", len(self._pids))
+        for pid in list(self._pids - self._retiring):
+            self.spawn()
+            self._retiring.add(pid)
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def _reap(self):
+        """Récupère les workers terminés et relance ceux morts inopinément."""
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            self._pids.discard(pid)
+            if pid in self._retiring:
+                self._retiring.discard(pid)
+                continue
+            if not self._stopping:
+                logger.warning(
+                    "PREFORK | Worker %d terminé (code %d), relance",
+                    pid,
+                    os.waitstatus_to_exitcode(status),
+                )
+                self.spawn()
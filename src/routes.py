@@ -1,154 +1,564 @@
 # src/routes.py - CRÉEZ ce fichier :
 
 import logging
+import time
+from datetime import timedelta
+from functools import partial
 
 import requests
 from flask import Response, jsonify, make_response, request
+from limits.storage import MemoryStorage
 
-from .adapters.openai_adapter import stream_response, transform_response
-from .application.orchestrator import resolve_conversation_context
+from .adapters.openai_adapter import (
+    build_chat_completion,
+    extract_result_content,
+    iter_upstream_contents,
+    replay_stream,
+    stream_contents,
+    transform_response,
+)
+from .application.completion_cache import completion_cache, completion_request_key, is_cacheable
+from .application.hedging import hedged_requests, is_hedgeable
+from .application.model_catalog import model_catalog
+from .application.orchestrator import (
+    build_feature_request,
+    estimate_request_tokens,
+    resolve_conversation_context,
+)
+from .application.session_cache import session_cache
+from .application.single_flight import single_flight
 
 # Import direct depuis les sous-modules
-from .config import (
-    AVAILABLE_MODELS,
-    ONE_MIN_FEATURE_API_URL,
-    PERMIT_MODELS_FROM_SUBSET_ONLY,
-    SUBSET_OF_ONE_MIN_PERMITTED_MODELS,
-)
-from .domain.model_provider import get_formatted_models_list
+from .config import MODELS_CACHE_MAX_AGE, ONE_MIN_FEATURE_API_URL, TOKENIZE_MAX_ITEMS
+from .domain.conversation_service import HistoryTooLong, format_history_line
+from .infrastructure.asset_service import asset_cache
+from .infrastructure.circuit_breaker import CircuitOpenError, one_min_breaker
+from .infrastructure.concurrency_limiter import GatewayOverloaded, upstream_limiter
 from .infrastructure.error_service import get_error_response
-from .infrastructure.network_service import handle_options_request, set_response_headers
-from .infrastructure.token_service import calculate_token
+from .infrastructure.logging_service import log_pipeline
+from .infrastructure.metrics import (
+    GATEWAY_OVERHEAD,
+    GATEWAY_SHED,
+    STREAM_CHUNK_RATE,
+    STREAM_CHUNKS,
+    UPSTREAM_DURATION,
+    UPSTREAM_REQUESTS,
+    UPSTREAM_TTFB,
+    model_label,
+    render_metrics,
+)
+from .infrastructure.network_service import (
+    extract_api_key,
+    handle_options_request,
+    set_response_headers,
+)
+from .infrastructure.rate_limiter import RateLimitExceeded, key_rate_limiter
+from .infrastructure.token_service import (
+    calculate_token,
+    count_tokens_batch,
+    get_tokenizer_registry,
+    token_count_cache,
+)
+from .infrastructure.upstream_client import upstream
+from .infrastructure.upstream_throttle import UpstreamThrottled, upstream_throttle
+from .prefork import per_worker_limit
 
 logger = logging.getLogger("1min-gateway.routes")
 
 
-def register_routes(app, limiter):
+def _cached_completion_response(cached, model_name, prompt_token_count, is_stream):
     """
-    Enregistre toutes les routes Flask avec rate limiting.
+    Sert une complétion depuis le cache (JSON ou flux SSE synthétique).
     """
-
-    @app.route("/v1/models", methods=["GET"])
-    @limiter.limit("20 per minute")
-    def list_models():
-        """
-        Expose la liste des modèles disponibles au format OpenAI.
-        """
-        models = get_formatted_models_list(
-            all_models=AVAILABLE_MODELS,
-            permit_subset_only=PERMIT_MODELS_FROM_SUBSET_ONLY,
-            subset_models=SUBSET_OF_ONE_MIN_PERMITTED_MODELS,
+    content = cached["content"]
+    completion_tokens = cached.get("completion_tokens", 0)
+    if is_stream:
+        response = Response(
+            replay_stream(content, model_name, int(prompt_token_count), completion_tokens),
+            content_type="text/event-stream",
         )
-        return jsonify({"object": "list", "data": models}), 200
+    else:
+        response = make_response(
+            jsonify(
+                build_chat_completion(content, model_name, prompt_token_count, completion_tokens)
+            )
+        )
+    response = set_response_headers(response)
+    response.headers["X-Cache"] = "HIT"
+    return response
 
-    @app.route("/v1/chat/completions", methods=["POST", "OPTIONS"])
-    @limiter.limit("180 per minute")
-    def conversation():
-        """
-        Endpoint principal compatible OpenAI Chat Completions.
-        """
-        if request.method == "OPTIONS":
-            return handle_options_request()
 
-        # --- 1. Authentification Hybride (Bearer + API-KEY) ---
-        api_key = request.headers.get("API-KEY") or (
-            request.headers.get("Authorization", "").replace("Bearer ", "")
-            if "Authorization" in request.headers
-            else None
-        )
+def _timed_feature_call(send, labels, mode):
+    """
+    Exécute un appel /api/features et alimente les métriques (TTFB, issue de l'appel)
+    ainsi que le limiteur de concurrence adaptatif. Les erreurs sont comptées puis
+    relancées telles quelles.
+    """
+    try:
+        response = send()
+    except CircuitOpenError:
+        UPSTREAM_REQUESTS.inc(*labels, "circuit_open")
+        raise
+    except UpstreamThrottled as throttled:
+        UPSTREAM_REQUESTS.inc(*labels, "throttled")
+        if throttled.from_upstream:
+            upstream_limiter.on_overload("429")
+        raise
+    except requests.exceptions.RequestException:
+        UPSTREAM_REQUESTS.inc(*labels, "error")
+        upstream_limiter.on_overload("error")
+        raise
 
-        if not api_key:
-            logger.warning("AUTH | Tentative d'accès sans clé API valide.")
-            error_payload, status = get_error_response(1021)
-            return jsonify({"error": error_payload}), status
+    status = response.status_code
+    UPSTREAM_REQUESTS.inc(*labels, f"{status // 100}xx" if isinstance(status, int) else "unknown")
+    if isinstance(status, int) and status >= 500:
+        upstream_limiter.on_overload(str(status))
+    # requests mesure le délai jusqu'à la réception des en-têtes de réponse
+    elapsed = getattr(response, "elapsed", None)
+    if isinstance(elapsed, timedelta):
+        UPSTREAM_TTFB.observe(elapsed.total_seconds(), *labels, mode)
+        if isinstance(status, int) and status < 400:
+            upstream_limiter.on_success(elapsed.total_seconds())
+    return response
 
-        # --- 2. Extraction des données ---
-        request_data = request.get_json(silent=True) or {}
-        messages = request_data.get("messages", [])
-        model_name = request_data.get("model", "gpt-4o")
-        is_stream = request_data.get("stream", False)
 
-        logger.debug(f"REQUEST_DATA | Keys: {list(request_data.keys())}")
+def _record_stream_end(labels, upstream_started, releases, chunk_count, duration):
+    """
+    Fin de flux : libère les places réservées (flux de la clé API, concurrence amont),
+    puis métriques (durée totale de l'appel amont et débit de chunks).
+    """
+    for release in releases:
+        release()
+    UPSTREAM_DURATION.observe(time.perf_counter() - upstream_started, *labels, "stream")
+    STREAM_CHUNKS.inc(*labels, amount=chunk_count)
+    if duration > 0:
+        STREAM_CHUNK_RATE.observe(chunk_count / duration, *labels)
 
-        if not messages:
-            error_payload, status = get_error_response(1412)
-            return jsonify({"error": error_payload}), status
 
-        try:
-            # --- 3. Orchestration & Résolution du Contexte ---
-            context = resolve_conversation_context(api_key, model_name, messages, request_data)
+def _rate_limited_response(exc):
+    """Réponse 429 d'un quota de clé API atteint, avec le délai d'attente (Retry-After)."""
+    logger.warning("RATE_LIMIT | Quota de la clé API atteint (%s)", exc.reason)
+    error_payload, status = get_error_response(1429)
+    response = make_response(jsonify({"error": error_payload}), status)
+    response.headers["Retry-After"] = str(exc.retry_after)
+    return response
 
-            if not context or not context.get("session_id") or "prompt_object" not in context:
-                logger.error(f"ORCHESTRATOR | Contexte invalide pour {model_name}")
-                error_payload, status = get_error_response(500, model=model_name)
-                return jsonify({"error": error_payload}), status
 
-            # --- 4. Gestion de l'Historique ---
-            last_prompt_content = context.get("prompt_object", {}).get("prompt", "")
-            history_text = last_prompt_content
-            prompt_token_count = calculate_token(history_text, model_name)
+def _throttled_response(exc):
+    """
+    Réponse 429 quand 1min.ai limite la clé API : le client reçoit le délai annoncé
+    par 1min.ai (Retry-After) au lieu d'une erreur 500.
+    """
+    logger.warning("THROTTLE | Clé API limitée par 1min.ai (%s)", exc.endpoint)
+    error_payload, status = get_error_response(1430)
+    response = make_response(jsonify({"error": error_payload}), status)
+    response.headers["Retry-After"] = str(exc.retry_after)
+    return response
 
-            logger.debug(
-                f"HISTORY | Envoi de {prompt_token_count} tokens (uniquement dernier message)"
-            )
 
-            # --- 5. Préparation du Payload ---
-            payload = {
+def _overloaded_response(exc):
+    """Réponse 503 d'une complétion délestée (file d'attente pleine ou délai dépassé)."""
+    logger.warning("OVERLOAD | Requête délestée (%s)", exc.reason)
+    GATEWAY_SHED.inc(exc.reason.replace(" ", "_"))
+    error_payload, status = get_error_response(1529)
+    response = make_response(jsonify({"error": error_payload}), status)
+    response.headers["Retry-After"] = str(exc.retry_after)
+    return response
+
+
+def _catalog_response(body, etag):
+    """
+    Réponse du catalogue des modèles : corps pré-sérialisé, ETag et Cache-Control ;
+    304 Not Modified si le client présente déjà cet ETag (If-None-Match).
+    """
+    response = Response(body, content_type="application/json")
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = f"public, max-age={MODELS_CACHE_MAX_AGE}"
+    return response.make_conditional(request)
+
+
+def _is_message_array(item):
+    return isinstance(item, list) and bool(item) and all(isinstance(m, dict) for m in item)
+
+
+def _tokenize_items(raw_input):
+    """
+    Normalise l'entrée de /v1/tokenize en éléments, chacun une liste de textes :
+    une chaîne, ou les lignes "Rôle: texte" d'un tableau de messages (comptées comme
+    en HISTORY_MODE=pack). Retourne None si l'entrée est invalide.
+    """
+    if isinstance(raw_input, str) or _is_message_array(raw_input):
+        raw_input = [raw_input]
+    if not isinstance(raw_input, list) or not raw_input:
+        return None
+
+    items = []
+    for item in raw_input:
+        if isinstance(item, str):
+            items.append([item])
+        elif _is_message_array(item):
+            items.append([format_history_line(message) for message in item])
+        else:
+            return None
+    return items
+
+
+def _tokenize():
+    """Comptes de tokens de /v1/tokenize (clé API requise, nombre d'éléments borné)."""
+    api_key = extract_api_key(request.headers)
+    if not api_key:
+        error_payload, status = get_error_response(1021)
+        return jsonify({"error": error_payload}), status
+
+    request_data = request.get_json(silent=True) or {}
+    model_name = request_data.get("model", "gpt-4o")
+    items = _tokenize_items(request_data.get("input", request_data.get("messages")))
+    if items is None:
+        error_payload, status = get_error_response(1413, model=model_name)
+        return jsonify({"error": error_payload}), status
+    if len(items) > TOKENIZE_MAX_ITEMS:
+        error_payload, status = get_error_response(1414, model=model_name)
+        return jsonify({"error": error_payload}), status
+
+    # Un seul lot pour toute la requête, puis somme par élément
+    counts = iter(count_tokens_batch([text for texts in items for text in texts], model_name))
+    data = [
+        {"object": "tokens", "index": index, "tokens": sum(next(counts) for _ in texts)}
+        for index, texts in enumerate(items)
+    ]
+    total = sum(entry["tokens"] for entry in data)
+    return (
+        jsonify(
+            {
+                "object": "list",
                 "model": model_name,
-                "type": context["type"],
-                "conversationId": context["session_id"],
-                "promptObject": context["prompt_object"],
+                "encoding": get_tokenizer_registry().encoding_name(model_name),
+                "data": data,
+                "usage": {"prompt_tokens": total, "total_tokens": total},
             }
-            payload["promptObject"]["prompt"] = history_text
+        ),
+        200,
+    )
 
-            # --- 6. Headers avec API-KEY obligatoire pour 1min.ai ---
-            headers = {
-                "API-KEY": api_key,
-                "Authorization": f"Bearer {api_key}",
-                "Content-Type": "application/json",
-            }
 
-            # --- 7. Exécution de l'appel ---
-            if not is_stream:
-                logger.info(
-                    f"API_CALL | Mode: Normal | Model: {model_name} | Conv: {context['type']}"
-                )
-                res = requests.post(
-                    ONE_MIN_FEATURE_API_URL, json=payload, headers=headers, timeout=60
-                )
-                res.raise_for_status()
-
-                transformed = transform_response(res.json(), model_name, prompt_token_count)
-                return set_response_headers(make_response(jsonify(transformed))), 200
-
-            else:
-                logger.info(
-                    f"API_CALL | Mode: Stream | Model: {model_name} | Conv: {context['type']}"
-                )
-                res_stream = requests.post(
-                    f"{ONE_MIN_FEATURE_API_URL}?isStreaming=true",
-                    json=payload,
-                    headers=headers,
-                    stream=True,
-                )
-                res_stream.raise_for_status()
-
-                return set_response_headers(
-                    Response(
-                        stream_response(res_stream, model_name, int(prompt_token_count)),
-                        content_type="text/event-stream",
-                    )
-                )
-
-        except requests.exceptions.RequestException as re:
-            logger.error(f"UPSTREAM_ERROR | Erreur API 1min.ai: {str(re)}")
+def _rate_limit(limiter, limit):
+    """
+    Limite évaluée à chaque requête : répartie entre les workers tant que
+    le limiteur compte en mémoire (chaque processus ne voit que ses requêtes).
+    """
+
+    def value():
+        # limiter.limiter : stockage de repli en mémoire tant que Memcached est injoignable
+        if isinstance(limiter.limiter.storage, MemoryStorage):
+            return per_worker_limit(limit)
+        return limit
+
+    return value
+
+
+def _circuit_open_response(exc, model_name):
+    """Réponse 503 quand le disjoncteur 1min.ai est ouvert, avec le délai avant réessai."""
+    logger.error("CIRCUIT_OPEN | Requête refusée: %s", exc)
+    error_payload, status = get_error_response(1503, model=model_name)
+    response = make_response(jsonify({"error": error_payload}), status)
+    response.headers["Retry-After"] = str(exc.retry_after)
+    return response
+
+
+def _error_response(exc, model_name):
+    """
+    Réponse d'une complétion interrompue : quota de la clé, délestage, limitation par
+    1min.ai, disjoncteur ouvert, prompt trop long ; toute autre erreur devient une 500.
+    """
+    if isinstance(exc, RateLimitExceeded):
+        return _rate_limited_response(exc)
+    if isinstance(exc, GatewayOverloaded):
+        return _overloaded_response(exc)
+    if isinstance(exc, UpstreamThrottled):
+        return _throttled_response(exc)
+    if isinstance(exc, CircuitOpenError):
+        return _circuit_open_response(exc, model_name)
+    if isinstance(exc, HistoryTooLong):
+        logger.warning("HISTORY | %s", exc)
+        error_payload, status = get_error_response(1415, model=model_name)
+        return jsonify({"error": error_payload}), status
+    if isinstance(exc, requests.exceptions.RequestException):
+        logger.error("UPSTREAM_ERROR | Erreur API 1min.ai: %s", exc)
+    else:
+        logger.error("FATAL_ERROR | Type: %s | Msg: %s", type(exc).__name__, exc)
+    error_payload, status = get_error_response(500, model=model_name)
+    return jsonify({"error": error_payload}), status
+
+
+def _complete_chat(request_key, context, payload, headers, model_name, prompt_token_count, started):
+    """
+    Complétion non-streaming : un seul appel pour les requêtes identiques en vol,
+    couvert s'il est lent, puis mise en cache de la réponse.
+    """
+    labels = (model_label(model_name), context["type"])
+    logger.info("API_CALL | Mode: Normal | Model: %s | Conv: %s", model_name, context["type"])
+
+    def fetch_completion():
+        call_started = time.perf_counter()
+        res = _timed_feature_call(
+            lambda: upstream.post(
+                "features", ONE_MIN_FEATURE_API_URL, json=payload, headers=headers
+            ),
+            labels,
+            "normal",
+        )
+        res.raise_for_status()
+        data = res.json()
+        UPSTREAM_DURATION.observe(time.perf_counter() - call_started, *labels, "normal")
+        return data
+
+    # Couverture des appels lents (opt-in), seulement sans effet de bord amont
+    call = fetch_completion
+    if is_hedgeable(context):
+        call = partial(
+            hedged_requests.run,
+            model_name,
+            fetch_completion,
+            upstream_limiter.try_acquire,
+        )
+
+    wait_started = time.perf_counter()
+    one_min_response = single_flight.do(request_key, call)
+    upstream_wait = time.perf_counter() - wait_started
+    transformed = transform_response(one_min_response, model_name, prompt_token_count)
+    if request_key and extract_result_content(one_min_response) is not None:
+        completion_cache.store(
+            request_key,
+            transformed["choices"][0]["message"]["content"],
+            transformed["usage"]["completion_tokens"],
+        )
+    response = set_response_headers(make_response(jsonify(transformed)))
+    GATEWAY_OVERHEAD.observe(time.perf_counter() - started - upstream_wait, *labels, "normal")
+    return response, 200
+
+
+def _stream_chat(
+    request_key,
+    context,
+    payload,
+    headers,
+    model_name,
+    prompt_token_count,
+    started,
+    releases,
+):
+    """
+    Complétion en flux SSE, diffusée aux requêtes identiques en vol. En cas de succès,
+    les places réservées (`releases` : flux de la clé, concurrence amont) sont rendues
+    par la fin du flux ; en cas d'échec, par l'appelant.
+    """
+    labels = (model_label(model_name), context["type"])
+    logger.info("API_CALL | Mode: Stream | Model: %s | Conv: %s", model_name, context["type"])
+
+    def open_stream():
+        res_stream = _timed_feature_call(
+            lambda: upstream.post(
+                "features",
+                f"{ONE_MIN_FEATURE_API_URL}?isStreaming=true",
+                json=payload,
+                headers=headers,
+                stream=True,
+            ),
+            labels,
+            "stream",
+        )
+        res_stream.raise_for_status()
+        return iter_upstream_contents(res_stream)
+
+    # En streaming, le surcoût mesuré est la préparation avant l'appel amont
+    upstream_started = time.perf_counter()
+    GATEWAY_OVERHEAD.observe(upstream_started - started, *labels, "stream")
+    contents = single_flight.stream(request_key, open_stream)
+
+    on_complete = None
+    if request_key and completion_cache.enabled:
+        on_complete = partial(completion_cache.store, request_key)
+
+    return set_response_headers(
+        Response(
+            stream_contents(
+                contents,
+                model_name,
+                int(prompt_token_count),
+                on_complete=on_complete,
+                on_stream_end=partial(_record_stream_end, labels, upstream_started, releases),
+            ),
+            content_type="text/event-stream",
+        )
+    )
+
+
+def _chat_completion(started):
+    """
+    Authentification, quota de la clé, place amont, résolution du contexte puis
+    complétion (cache, appel normal ou flux). Les erreurs deviennent des réponses OpenAI.
+    """
+    # --- 1. Authentification Hybride (Bearer + API-KEY) ---
+    api_key = extract_api_key(request.headers)
+
+    if not api_key:
+        logger.warning("AUTH | Tentative d'accès sans clé API valide.")
+        error_payload, status = get_error_response(1021)
+        return jsonify({"error": error_payload}), status
+
+    # --- 2. Extraction des données ---
+    request_data = request.get_json(silent=True) or {}
+    messages = request_data.get("messages", [])
+    model_name = request_data.get("model", "gpt-4o")
+
+    logger.debug("REQUEST_DATA | Keys: %s", list(request_data))
+
+    if not messages:
+        error_payload, status = get_error_response(1412)
+        return jsonify({"error": error_payload}), status
+
+    is_stream = request_data.get("stream", False)
+    # Places réservées, rendues en sortie sauf si le flux en prend la charge
+    releases = []
+    try:
+        # --- 2bis. Quota de la clé API (coût pondéré par les tokens estimés) ---
+        key_rate_limiter.acquire(
+            api_key, key_rate_limiter.request_cost(estimate_request_tokens(messages))
+        )
+        if is_stream:
+            # Créneau de flux de la clé, réservé avant l'orchestration : une clé au-delà
+            # de son plafond n'a créé ni conversation ni upload chez 1min.ai
+            releases.append(key_rate_limiter.open_stream(api_key))
+
+        # --- 2ter. Place dans la concurrence amont (attente bornée, sinon délestage) ---
+        # Prise avant l'orchestration, qui appelle elle aussi 1min.ai
+        releases.append(upstream_limiter.acquire())
+
+        # --- 3. Orchestration & Résolution du Contexte ---
+        context = resolve_conversation_context(api_key, model_name, messages, request_data)
+
+        if not context or not context.get("session_id") or "prompt_object" not in context:
+            logger.error("ORCHESTRATOR | Contexte invalide pour %s", model_name)
             error_payload, status = get_error_response(500, model=model_name)
             return jsonify({"error": error_payload}), status
-        except Exception as e:
-            logger.error(f"FATAL_ERROR | Type: {type(e).__name__} | Msg: {str(e)}")
-            error_payload, status = get_error_response(500, model=model_name)
+
+        # --- 4. Gestion de l'Historique ---
+        history_text = context.get("prompt_object", {}).get("prompt", "")
+        prompt_token_count = context.get("prompt_tokens")
+        if prompt_token_count is None:
+            prompt_token_count = calculate_token(history_text, model_name)
+
+        logger.debug("HISTORY | Envoi de %s tokens", prompt_token_count)
+
+        # --- 5. Préparation du Payload et des headers (API-KEY obligatoire) ---
+        payload, headers = build_feature_request(api_key, model_name, context)
+
+        # --- 6. Cache des complétions déterministes (opt-in) ---
+        # Empreinte partagée par le cache et la coalescence des requêtes en vol
+        request_key = (
+            completion_request_key(api_key, model_name, context, request_data)
+            if is_cacheable(context)
+            else None
+        )
+        cached = completion_cache.lookup(request_key)
+        if cached:
+            logger.info("CACHE | HIT | Model: %s | Conv: %s", model_name, context["type"])
+            return _cached_completion_response(cached, model_name, prompt_token_count, is_stream)
+
+        # --- 7. Exécution de l'appel (une seule fois pour les requêtes identiques en vol) ---
+        completion = (request_key, context, payload, headers, model_name, prompt_token_count)
+        if not is_stream:
+            return _complete_chat(*completion, started)
+
+        response = _stream_chat(*completion, started, tuple(releases))
+        # Les places sont désormais rendues par la fin du flux
+        releases = []
+        return response
+
+    except Exception as e:
+        return _error_response(e, model_name)
+    finally:
+        for release in releases:
+            release()
+
+
+def register_routes(app, limiter):
+    """
+    Enregistre toutes les routes Flask avec rate limiting.
+    """
+
+    @app.route("/v1/models", methods=["GET"])
+    @limiter.limit(_rate_limit(limiter, "20 per minute"))
+    def list_models():
+        """
+        Expose la liste des modèles disponibles au format OpenAI (corps précalculé).
+        """
+        return _catalog_response(*model_catalog.listing())
+
+    @app.route("/v1/models/<path:model_id>", methods=["GET"])
+    @limiter.limit(_rate_limit(limiter, "20 per minute"))
+    def retrieve_model(model_id):
+        """
+        Détail d'un modèle (capacités, fenêtre de contexte), servi depuis l'index.
+        """
+        found = model_catalog.get(model_id)
+        if found is None:
+            error_payload, status = get_error_response(1002, model=model_id)
             return jsonify({"error": error_payload}), status
+        return _catalog_response(*found)
+
+    @app.route("/v1/chat/completions", methods=["POST", "OPTIONS"])
+    def conversation():
+        """
+        Endpoint principal compatible OpenAI Chat Completions.
+        Limité par clé API (key_rate_limiter) et non par adresse IP.
+        """
+        if request.method == "OPTIONS":
+            return handle_options_request()
+
+        return _chat_completion(time.perf_counter())
+
+    @app.route("/v1/tokenize", methods=["POST"])
+    @limiter.limit(_rate_limit(limiter, "600 per minute"))
+    def tokenize():
+        """
+        Compte les tokens de textes ou de tableaux de messages pour un modèle,
+        par lots et sans appel à 1min.ai (budgétisation côté client).
+        """
+        return _tokenize()
 
     @app.route("/")
     def health():
         return "1min-Gateway is running", 200
+
+    @app.route("/metrics", methods=["GET"])
+    def metrics():
+        """
+        Métriques au format texte Prometheus (latences amont par modèle, surcoût Gateway).
+        """
+        return Response(render_metrics(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+    @app.route("/stats", methods=["GET"])
+    def stats():
+        """
+        Statistiques internes de la Gateway (pool HTTP amont, caches).
+        """
+        return (
+            jsonify(
+                {
+                    "upstream_pool": upstream.stats(),
+                    "completion_cache": completion_cache.stats(),
+                    "session_cache": session_cache.stats(),
+                    "asset_cache": asset_cache.stats() if asset_cache else {"enabled": False},
+                    "single_flight": single_flight.stats(),
+                    "hedging": hedged_requests.stats(),
+                    "circuit_breaker": one_min_breaker.stats(),
+                    "upstream_throttle": upstream_throttle.stats(),
+                    "token_cache": token_count_cache.stats(),
+                    "key_rate_limiter": key_rate_limiter.stats(),
+                    "upstream_concurrency": upstream_limiter.stats(),
+                    "logging": log_pipeline.stats(),
+                }
+            ),
+            200,
+        )
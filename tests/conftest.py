@@ -66,8 +66,8 @@ def mock_1min_response():
 @pytest.fixture(autouse=True)
 def mock_external_calls():
     """Mock automatique des appels externes pour tous les tests."""
-    # Mock requests.post pour éviter les appels réels
-    with patch("requests.post") as mock_post:
+    # Mock requests.post et la session du client amont mutualisé pour éviter les appels réels
+    with patch("requests.post") as mock_post, patch("requests.Session.request") as mock_request:
         # Configurer le mock par défaut
         mock_response = MagicMock()
         mock_response.status_code = 200
@@ -76,9 +76,15 @@ def mock_external_calls():
         }
         mock_response.iter_lines.return_value = [b'data: {"result": "test"}', b"data: [DONE]"]
         mock_post.return_value = mock_response
+        mock_request.return_value = mock_response
 
         yield mock_post
 
+    # Un test simulant des pannes ne doit pas laisser le circuit 1min.ai ouvert
+    from src.infrastructure.circuit_breaker import one_min_breaker
+
+    one_min_breaker.reset()
+
 
 @pytest.fixture
 def mock_orchestrator():
@@ -95,6 +101,6 @@ def mock_orchestrator():
 @pytest.fixture
 def mock_token_calculation():
     """Mock le calcul de tokens."""
-    with patch("src.adapters.openai_adapter.calculate_token") as mock:
+    with patch("src.adapters.openai_adapter.count_text_tokens") as mock:
         mock.return_value = 10
         yield mock
@@ -0,0 +1,4 @@
+# tests/test_adapters/__init__.py
+"""
+Tests pour la couche adapters.
+"""
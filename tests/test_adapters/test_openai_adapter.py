@@ -0,0 +1,137 @@
+# tests/test_adapters/test_openai_adapter.py
+"""
+Tests pour l'adaptateur OpenAI (relais SSE).
+"""
+
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+
+def _events(chunks):
+    """Découpe la sortie SSE en événements JSON (hors [DONE])."""
+    raw = b"".join(chunks).decode("utf-8")
+    return [e[6:] for e in raw.split("\n\n") if e.startswith("data: ")]
+
+
+class TestParseUpstreamLine:
+    """Tests pour l'extraction du texte des lignes 1min.ai."""
+
+    @pytest.mark.parametrize(
+        "line, expected",
+        [
+            (b'data: {"result": "Bonjour"}', "Bonjour"),
+            (b'{"content": "Salut"}', "Salut"),
+            (b"data: texte brut", "texte brut"),
+            (b"  data: 42  ", "42"),
+            (b"", ""),
+        ],
+    )
+    def test_formats(self, line, expected):
+        from src.adapters.openai_adapter import parse_upstream_line
+
+        assert parse_upstream_line(line) == expected
+
+    def test_done_marker(self):
+        from src.adapters.openai_adapter import STREAM_DONE, parse_upstream_line
+
+        assert parse_upstream_line(b"data: [DONE]") is STREAM_DONE
+
+
+class TestStreamEnvelope:
+    """Tests pour l'enveloppe SSE pré-sérialisée."""
+
+    def test_chunk_matches_json_dumps(self):
+        """Le gabarit produit exactement la sérialisation json.dumps d'origine."""
+        from src.adapters.openai_adapter import StreamEnvelope
+
+        envelope = StreamEnvelope("chatcmpl-1", "gpt-4o", created=1700000000)
+        content = 'Ligne "citée"\n\tet accents é — 🚀'
+
+        expected = {
+            "id": "chatcmpl-1",
+            "object": "chat.completion.chunk",
+            "created": 1700000000,
+            "model": "gpt-4o",
+            "choices": [{"index": 0, "delta": {"content": content}, "finish_reason": None}],
+        }
+        assert envelope.chunk(content) == f"data: {json.dumps(expected)}\n\n".encode()
+
+
+class TestStreamResponse:
+    """Tests pour le relais du flux 1min.ai."""
+
+    @patch("src.adapters.openai_adapter.USAGE_ACCOUNTING_MODE", "estimate")
+    def test_stream_yields_bytes_and_usage(self):
+        from src.adapters.openai_adapter import stream_response
+
+        upstream = MagicMock()
+        upstream.iter_lines.return_value = [
+            b'data: {"result": "Bon"}',
+            b"",
+            b"data: jour",
+            b"data: [DONE]",
+            b'data: {"result": "ignored"}',
+        ]
+
+        chunks = list(stream_response(upstream, "gpt-4o", 5))
+
+        assert all(isinstance(chunk, bytes) for chunk in chunks)
+        events = _events(chunks)
+        assert events[-1] == "[DONE]"
+        deltas = [json.loads(e)["choices"][0]["delta"].get("content") for e in events[:-2]]
+        assert deltas == ["Bon", "jour"]
+        assert json.loads(events[-2])["usage"]["prompt_tokens"] == 5
+        upstream.close.assert_called_once()
+
+    def test_stream_closes_upstream_on_client_disconnect(self):
+        from src.adapters.openai_adapter import stream_response
+
+        upstream = MagicMock()
+        upstream.iter_lines.return_value = [b"data: un", b"data: deux"]
+
+        generator = stream_response(upstream, "gpt-4o", 0)
+        next(generator)
+        generator.close()
+
+        upstream.close.assert_called_once()
+
+    @patch("src.adapters.openai_adapter.USAGE_ACCOUNTING_MODE", "estimate")
+    def test_on_complete_receives_full_text(self):
+        from src.adapters.openai_adapter import stream_response
+
+        upstream = MagicMock()
+        upstream.iter_lines.return_value = [b"data: Bon", b"data: jour", b"data: [DONE]"]
+        on_complete = MagicMock()
+
+        list(stream_response(upstream, "gpt-4o", 0, on_complete=on_complete))
+
+        on_complete.assert_called_once_with("Bonjour", 1)
+
+    def test_on_complete_skipped_on_client_disconnect(self):
+        from src.adapters.openai_adapter import stream_response
+
+        upstream = MagicMock()
+        upstream.iter_lines.return_value = [b"data: un", b"data: deux"]
+        on_complete = MagicMock()
+
+        generator = stream_response(upstream, "gpt-4o", 0, on_complete=on_complete)
+        next(generator)
+        generator.close()
+
+        on_complete.assert_not_called()
+
+
+class TestReplayStream:
+    """Tests pour le flux SSE synthétique servi depuis le cache."""
+
+    def test_replay_splits_content_and_ends_with_usage(self):
+        from src.adapters.openai_adapter import replay_stream
+
+        events = _events(replay_stream("abcdefghij", "gpt-4o", 4, 3, chunk_chars=4))
+
+        deltas = [json.loads(e)["choices"][0]["delta"].get("content") for e in events[:-2]]
+        assert deltas == ["abcd", "efgh", "ij"]
+        assert json.loads(events[-2])["usage"]["total_tokens"] == 7
+        assert events[-1] == "[DONE]"
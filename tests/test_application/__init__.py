@@ -0,0 +1,4 @@
+# tests/test_application/__init__.py
+"""
+Tests pour la couche application.
+"""
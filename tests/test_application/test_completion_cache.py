@@ -0,0 +1,68 @@
+# tests/test_application/test_completion_cache.py
+"""
+Tests pour le cache des complétions déterministes.
+"""
+
+CONTEXT = {
+    "type": "CHAT_WITH_AI",
+    "session_id": "CHAT_WITH_AI",
+    "prompt_object": {"prompt": "Bonjour", "isMixed": False, "webSearch": False},
+}
+
+
+class TestCompletionRequestKey:
+    """Tests pour l'empreinte des requêtes."""
+
+    def test_key_is_stable_and_order_independent(self):
+        from src.application.completion_cache import completion_request_key
+
+        reordered = dict(
+            CONTEXT, prompt_object={"webSearch": False, "isMixed": False, "prompt": "Bonjour"}
+        )
+
+        assert completion_request_key("k", "gpt-4o", CONTEXT, {"temperature": 0}) == (
+            completion_request_key("k", "gpt-4o", reordered, {"temperature": 0, "stream": True})
+        )
+
+    def test_key_depends_on_model_params_and_api_key(self):
+        from src.application.completion_cache import completion_request_key
+
+        base = completion_request_key("k", "gpt-4o", CONTEXT, {})
+
+        assert base != completion_request_key("k", "gpt-4o-mini", CONTEXT, {})
+        assert base != completion_request_key("k", "gpt-4o", CONTEXT, {"temperature": 0.7})
+        assert base != completion_request_key("other", "gpt-4o", CONTEXT, {})
+
+
+class TestCompletionCache:
+    """Tests pour l'éligibilité et le stockage."""
+
+    def test_disabled_cache_never_builds_keys(self):
+        from src.application.completion_cache import CompletionCache
+
+        cache = CompletionCache(enabled=False)
+
+        assert cache.key_for("k", "gpt-4o", CONTEXT) is None
+        assert cache.lookup(None) is None
+        assert cache.stats() == {"enabled": False}
+
+    def test_stateful_and_web_search_requests_are_not_cached(self):
+        from src.application.completion_cache import CompletionCache
+
+        cache = CompletionCache(enabled=True)
+        with_conversation = dict(CONTEXT, session_id="conv-uuid")
+        with_search = dict(CONTEXT, prompt_object={"prompt": "Bonjour", "webSearch": True})
+
+        assert cache.key_for("k", "gpt-4o", with_conversation) is None
+        assert cache.key_for("k", "gpt-4o", with_search) is None
+        assert cache.key_for("k", "gpt-4o", CONTEXT) is not None
+
+    def test_store_then_lookup(self):
+        from src.application.completion_cache import CompletionCache
+
+        cache = CompletionCache(enabled=True, max_entries=8)
+        key = cache.key_for("k", "gpt-4o", CONTEXT)
+        cache.store(key, "Réponse", 3)
+
+        assert cache.lookup(key) == {"content": "Réponse", "completion_tokens": 3}
+        assert cache.stats()["hits"] == 1
@@ -0,0 +1,137 @@
+# tests/test_application/test_hedging.py
+"""
+Tests pour les requêtes de couverture (seuil p95 par modèle, budget, premier gagnant).
+"""
+
+import threading
+
+import pytest
+
+
+def _slow_then_fast(release):
+    """Premier appel bloqué jusqu'à `release`, appels suivants immédiats."""
+    calls = []
+
+    def call():
+        calls.append(threading.current_thread().name)
+        if len(calls) == 1:
+            release.wait(5)
+            return "slow"
+        return "fast"
+
+    return call, calls
+
+
+class TestHedgedRequests:
+    """Tests pour le déclenchement et l'issue des appels doublés."""
+
+    def _hedger(self, **kwargs):
+        from src.application.hedging import HedgedRequests
+
+        options = {"enabled": True, "budget_percent": 100, "min_samples": 3, "min_delay": 0.01}
+        options.update(kwargs)
+        hedger = HedgedRequests(**options)
+        for _ in range(3):
+            hedger.observe("gpt-4o", 0.01)
+        return hedger
+
+    def test_threshold_is_learned_per_model(self):
+        from src.application.hedging import HedgedRequests
+
+        hedger = HedgedRequests(enabled=True, min_samples=20, min_delay=0.5)
+        for latency in range(1, 20):
+            hedger.observe("gpt-4o", float(latency))
+        assert hedger.threshold("gpt-4o") is None
+
+        hedger.observe("gpt-4o", 20.0)
+        assert hedger.threshold("gpt-4o") == 20.0
+        assert hedger.threshold("claude-3-haiku") is None
+
+        # Le seuil ne descend jamais sous le délai minimal
+        fast = HedgedRequests(enabled=True, min_samples=1, min_delay=0.5)
+        fast.observe("gpt-4o", 0.01)
+        assert fast.threshold("gpt-4o") == 0.5
+
+    def test_slow_call_is_hedged_and_first_answer_wins(self):
+        hedger = self._hedger()
+        release = threading.Event()
+        call, calls = _slow_then_fast(release)
+
+        assert hedger.run("gpt-4o", call, lambda: lambda: None) == "fast"
+        release.set()
+        assert len(calls) == 2
+        stats = hedger.stats()
+        assert stats["hedged"] == 1
+        assert stats["hedge_wins"] == 1
+
+    def test_failed_hedge_falls_back_to_first_call(self):
+        hedger = self._hedger()
+        release = threading.Event()
+        calls = []
+
+        def call():
+            calls.append(1)
+            if len(calls) == 1:
+                release.wait(5)
+                return "primary"
+            release.set()
+            raise ConnectionError("upstream reset")
+
+        assert hedger.run("gpt-4o", call, lambda: lambda: None) == "primary"
+        assert len(calls) == 2
+        assert hedger.stats()["hedge_wins"] == 0
+
+    def test_no_hedge_without_budget_or_capacity(self):
+        hedger = self._hedger(budget_percent=0)
+        release = threading.Event()
+        call, calls = _slow_then_fast(release)
+        threading.Timer(0.05, release.set).start()
+        assert hedger.run("gpt-4o", call, lambda: lambda: None) == "slow"
+        assert len(calls) == 1
+        assert hedger.stats()["skipped_budget"] == 1
+
+        hedger = self._hedger()
+        release = threading.Event()
+        call, calls = _slow_then_fast(release)
+        threading.Timer(0.05, release.set).start()
+        # Limiteur amont saturé : aucune place immédiate pour l'appel supplémentaire
+        assert hedger.run("gpt-4o", call, lambda: None) == "slow"
+        assert len(calls) == 1
+        assert hedger.stats()["skipped_capacity"] == 1
+
+    def test_extra_slot_is_released_when_both_calls_finish(self):
+        hedger = self._hedger()
+        release = threading.Event()
+        call, _ = _slow_then_fast(release)
+        released = threading.Event()
+
+        assert hedger.run("gpt-4o", call, lambda: released.set) == "fast"
+        # L'appel perdant occupe toujours 1min.ai : la place reste prise
+        assert not released.is_set()
+        release.set()
+        assert released.wait(5)
+
+    def test_errors_propagate_and_warmup_runs_inline(self):
+        from src.application.hedging import HedgedRequests
+
+        hedger = HedgedRequests(enabled=True, min_samples=5)
+        caller = threading.current_thread().name
+        assert hedger.run("gpt-4o", lambda: threading.current_thread().name) == caller
+        assert hedger.stats()["hedged"] == 0
+
+        def failing():
+            raise ConnectionError("upstream reset")
+
+        with pytest.raises(ConnectionError):
+            self._hedger().run("gpt-4o", failing, lambda: lambda: None)
+
+    def test_only_stateless_chat_is_hedgeable(self):
+        from src.application.hedging import is_hedgeable
+
+        stateless = {"type": "CHAT_WITH_AI", "session_id": "CHAT_WITH_AI", "prompt_object": {}}
+        assert is_hedgeable(stateless)
+        assert not is_hedgeable(dict(stateless, session_id="conv-123"))
+        assert not is_hedgeable(dict(stateless, prompt_object={"webSearch": True}))
+        assert not is_hedgeable(
+            {"type": "IMAGE_GENERATOR", "session_id": "gen-1", "prompt_object": {}}
+        )
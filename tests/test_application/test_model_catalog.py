@@ -0,0 +1,52 @@
+# tests/test_application/test_model_catalog.py
+"""
+Tests pour le catalogue des modèles pré-sérialisé (/v1/models).
+"""
+
+import json
+
+
+class TestModelCatalog:
+    """Tests pour la liste et l'index précalculés."""
+
+    def test_bodies_are_built_once_with_capabilities(self):
+        from src.application.model_catalog import ModelCatalog
+
+        catalog = ModelCatalog(["gpt-4o", "open-mistral-nemo", "magic-art"])
+        body, etag = catalog.listing()
+        data = json.loads(body)
+
+        assert [entry["id"] for entry in data["data"]] == [
+            "gpt-4o",
+            "open-mistral-nemo",
+            "magic-art",
+        ]
+        gpt = json.loads(catalog.get("gpt-4o")[0])
+        assert gpt["capabilities"] == {"chat": True, "vision": True, "image_generation": False}
+        assert gpt["context_window"] == 128000
+        art = json.loads(catalog.get("magic-art")[0])
+        assert art["capabilities"]["image_generation"] is True
+        assert art["context_window"] is None
+        assert catalog.get("unknown") is None
+        assert etag
+
+    def test_rebuild_changes_the_etag(self):
+        from src.application.model_catalog import ModelCatalog
+
+        catalog = ModelCatalog(["gpt-4o"])
+        _, before = catalog.listing()
+        catalog.rebuild(["gpt-4o", "deepseek-chat"])
+        _, after = catalog.listing()
+
+        assert before != after
+        assert "deepseek-chat" in catalog
+
+    def test_catalog_follows_the_domain_models(self):
+        """config et domaine partagent désormais un seul catalogue."""
+        from src.application.model_catalog import model_catalog
+        from src.config import Defaults
+        from src.domain.models import AVAILABLE_MODELS, IMAGE_GENERATION_MODELS
+
+        assert Defaults.SUPPORTED_MODELS == AVAILABLE_MODELS + IMAGE_GENERATION_MODELS
+        assert all(model in Defaults.SUPPORTED_MODELS for model in Defaults.MODELS)
+        assert len(model_catalog) > 0
@@ -0,0 +1,141 @@
+# tests/test_application/test_orchestrator.py
+"""
+Tests pour l'orchestrateur (uploads d'images parallèles).
+"""
+
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+
+def _image(url):
+    return {"type": "image_url", "image_url": {"url": url}}
+
+
+class TestImageUploads:
+    """Tests pour le pipeline d'upload des images d'un message."""
+
+    @patch("src.application.orchestrator.upload_image_to_1min")
+    def test_uploads_run_concurrently_and_keep_order(self, mock_upload):
+        from src.application.orchestrator import resolve_conversation_context
+
+        running = []
+        peak = []
+        lock = threading.Lock()
+
+        def fake_upload(part, headers, asset_url):
+            with lock:
+                running.append(1)
+                peak.append(len(running))
+            # La première image finit en dernier
+            time.sleep(0.05 if part["image_url"]["url"] == "a" else 0.01)
+            with lock:
+                running.pop()
+            return f"images/{part['image_url']['url']}.png"
+
+        mock_upload.side_effect = fake_upload
+        content = [{"type": "text", "text": "Compare"}] + [_image(u) for u in ("a", "b", "c")]
+
+        context = resolve_conversation_context(
+            "k", "gpt-4o", [{"role": "user", "content": content}]
+        )
+
+        assert context["type"] == "CHAT_WITH_IMAGE"
+        assert context["prompt_object"]["imageList"] == [
+            "images/a.png",
+            "images/b.png",
+            "images/c.png",
+        ]
+        assert max(peak) > 1
+
+    @patch("src.application.orchestrator.upload_image_to_1min")
+    def test_failed_upload_is_skipped(self, mock_upload):
+        from src.application.orchestrator import resolve_conversation_context
+
+        def fake_upload(part, headers, asset_url):
+            url = part["image_url"]["url"]
+            if url == "b":
+                raise ValueError("boom")
+            return f"images/{url}.png"
+
+        mock_upload.side_effect = fake_upload
+        content = [_image(u) for u in ("a", "b", "c")]
+
+        context = resolve_conversation_context(
+            "k", "gpt-4o", [{"role": "user", "content": content}]
+        )
+
+        assert context["prompt_object"]["imageList"] == ["images/a.png", "images/c.png"]
+
+    @patch("src.application.orchestrator.upload_image_to_1min")
+    def test_all_uploads_failed_stays_text_chat(self, mock_upload):
+        from src.application.orchestrator import resolve_conversation_context
+
+        mock_upload.side_effect = ValueError("boom")
+        content = [{"type": "text", "text": "Décris"}, _image("a")]
+
+        context = resolve_conversation_context(
+            "k", "gpt-4o", [{"role": "user", "content": content}]
+        )
+
+        assert context["type"] == "CHAT_WITH_AI"
+        assert "imageList" not in context["prompt_object"]
+
+
+def _tokenized_messages(counter):
+    """Textes réellement tokenisés, hors séparateur de lignes (trop court pour le mémo)."""
+    return [call.args[0] for call in counter.call_args_list if call.args[0] != "\n\n"]
+
+
+class TestHistoryPackMode:
+    """Tests pour HISTORY_MODE=pack (historique replié dans le prompt)."""
+
+    TURN = [
+        {"role": "user", "content": "Bonjour"},
+        {"role": "assistant", "content": "Salut !"},
+        {"role": "user", "content": "Quel temps fait-il ?"},
+    ]
+
+    @patch("src.application.orchestrator.create_1min_conversation")
+    @patch(
+        "src.application.orchestrator.calculate_token",
+        side_effect=lambda text, model: 1 if text == "\n\n" else 3,
+    )
+    def test_pack_mode_builds_prompt_without_conversation(self, mock_calc, mock_create):
+        from src.application import orchestrator
+
+        with patch.object(orchestrator, "HISTORY_MODE", "pack"):
+            context = orchestrator.resolve_conversation_context("k", "gpt-4o", self.TURN)
+
+        mock_create.assert_not_called()
+        assert context["session_id"] == "CHAT_WITH_AI"
+        assert context["prompt_object"]["prompt"] == (
+            "User: Bonjour\n\nAssistant: Salut !\n\nUser: Quel temps fait-il ?"
+        )
+        # Trois lignes et les deux séparateurs qui les joignent
+        assert context["prompt_tokens"] == 11
+
+    def test_unchanged_messages_are_not_tokenized_again(self):
+        from src.application import orchestrator
+        from src.infrastructure import token_service
+
+        # Messages assez longs pour passer par le mémo des comptes de tokens
+        turn = [{"role": m["role"], "content": m["content"] * 10} for m in self.TURN]
+        next_turn = turn + [
+            {"role": "assistant", "content": "Ensoleillé. " * 10},
+            {"role": "user", "content": "Et demain ? " * 10},
+        ]
+        counter = MagicMock(return_value=3)
+        with (
+            patch.object(orchestrator, "HISTORY_MODE", "pack"),
+            patch.object(
+                token_service.get_tokenizer_registry(), "get_counter", return_value=counter
+            ),
+        ):
+            token_service.token_count_cache.clear()
+            orchestrator.resolve_conversation_context("k", "gpt-4o", turn)
+            assert len(_tokenized_messages(counter)) == 3
+            orchestrator.resolve_conversation_context("k", "gpt-4o", next_turn)
+
+        # Seuls les deux nouveaux messages sont tokenisés au second tour
+        assert len(_tokenized_messages(counter)) == 5
@@ -0,0 +1,71 @@
+# tests/test_application/test_session_cache.py
+"""
+Tests pour la réutilisation des conversations 1min.ai entre les tours.
+"""
+
+from unittest.mock import patch
+
+TURN_1 = [
+    {"role": "system", "content": "Tu es un assistant."},
+    {"role": "user", "content": "Bonjour"},
+]
+TURN_2 = TURN_1 + [
+    {"role": "assistant", "content": "Salut !"},
+    {"role": "user", "content": "Comment ça va ?"},
+]
+TURN_3 = TURN_2 + [
+    {"role": "assistant", "content": "Bien."},
+    {"role": "user", "content": "Tant mieux."},
+]
+
+
+class TestSessionCache:
+    """Tests pour l'association historique -> conversation."""
+
+    def test_fingerprint_depends_on_order_and_content(self):
+        from src.application.session_cache import messages_fingerprint
+
+        assert messages_fingerprint(TURN_1) == messages_fingerprint(list(TURN_1))
+        assert messages_fingerprint(TURN_1) != messages_fingerprint(TURN_1[::-1])
+
+    def test_lookup_is_scoped_by_api_key_and_model(self):
+        from src.application.session_cache import SessionCache
+
+        cache = SessionCache(enabled=True)
+        cache.remember("k", "gpt-4o", "CHAT_WITH_AI", TURN_2, "conv-1")
+
+        assert cache.lookup("k", "gpt-4o", "CHAT_WITH_AI", TURN_2) == "conv-1"
+        assert cache.lookup("other", "gpt-4o", "CHAT_WITH_AI", TURN_2) is None
+        assert cache.lookup("k", "gpt-4o-mini", "CHAT_WITH_AI", TURN_2) is None
+        assert cache.lookup("k", "gpt-4o", "CHAT_WITH_AI", []) is None
+
+
+class TestConversationReuse:
+    """Tests de l'orchestrateur : une conversation par dialogue, pas par tour."""
+
+    @patch("src.application.orchestrator.create_1min_conversation")
+    def test_later_turns_reuse_the_conversation(self, mock_create):
+        from src.application import orchestrator
+        from src.application.session_cache import SessionCache
+
+        mock_create.side_effect = ["conv-1", "conv-2"]
+        with patch.object(orchestrator, "session_cache", SessionCache(enabled=True)):
+            second = orchestrator.resolve_conversation_context("k", "gpt-4o", TURN_2)
+            third = orchestrator.resolve_conversation_context("k", "gpt-4o", TURN_3)
+
+        assert second["session_id"] == "conv-1"
+        assert third["session_id"] == "conv-1"
+        mock_create.assert_called_once()
+
+    @patch("src.application.orchestrator.create_1min_conversation")
+    def test_disabled_cache_creates_one_conversation_per_turn(self, mock_create):
+        from src.application import orchestrator
+        from src.application.session_cache import SessionCache
+
+        mock_create.side_effect = ["conv-1", "conv-2"]
+        with patch.object(orchestrator, "session_cache", SessionCache(enabled=False)):
+            orchestrator.resolve_conversation_context("k", "gpt-4o", TURN_2)
+            third = orchestrator.resolve_conversation_context("k", "gpt-4o", TURN_3)
+
+        assert third["session_id"] == "conv-2"
+        assert mock_create.call_count == 2
@@ -0,0 +1,161 @@
+# tests/test_application/test_single_flight.py
+"""
+Tests pour la coalescence des requêtes identiques en vol.
+"""
+
+import threading
+import time
+
+import pytest
+
+
+def _wait_until(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition non atteinte")
+        time.sleep(0.005)
+
+
+class TestSingleFlightCalls:
+    """Tests pour les requêtes non-streaming."""
+
+    def test_concurrent_identical_calls_share_one_upstream_call(self):
+        from src.application.single_flight import SingleFlight
+
+        flight = SingleFlight()
+        release = threading.Event()
+        calls = []
+        results = []
+
+        def fetch():
+            calls.append(1)
+            release.wait(2)
+            return {"answer": 42}
+
+        threads = [
+            threading.Thread(target=lambda: results.append(flight.do("k", fetch))) for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        _wait_until(lambda: flight.stats()["coalesced"] == 4)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        assert len(calls) == 1
+        assert results == [{"answer": 42}] * 5
+        stats = flight.stats()
+        assert stats["coalescing_ratio"] == 0.8
+        assert stats["in_flight"] == 0
+
+    def test_error_is_shared_and_next_call_retries(self):
+        from src.application.single_flight import SingleFlight
+
+        flight = SingleFlight()
+
+        def failing():
+            raise ConnectionError("upstream down")
+
+        with pytest.raises(ConnectionError):
+            flight.do("k", failing)
+        assert flight.do("k", lambda: "ok") == "ok"
+
+    def test_no_key_or_disabled_runs_directly(self):
+        from src.application.single_flight import SingleFlight
+
+        assert SingleFlight().do(None, lambda: "direct") == "direct"
+        assert SingleFlight(enabled=False).do("k", lambda: "direct") == "direct"
+
+
+class TestStreamFanout:
+    """Tests pour la diffusion d'un flux SSE à plusieurs abonnés."""
+
+    def test_subscribers_receive_the_whole_stream(self):
+        from src.application.single_flight import SingleFlight
+
+        flight = SingleFlight()
+        opened = []
+
+        def open_stream():
+            opened.append(1)
+            return iter(["Bon", "jour", " !"])
+
+        first = flight.stream("k", open_stream)
+        assert next(first) == "Bon"
+        # Un abonné arrivant en cours de flux relit le début depuis le tampon
+        second = flight.stream("k", open_stream)
+
+        assert ["Bon"] + list(first) == ["Bon", "jour", " !"]
+        assert list(second) == ["Bon", "jour", " !"]
+        assert len(opened) == 1
+        assert flight.stats()["stream_coalescing_ratio"] == 0.5
+
+    def test_finished_stream_is_not_joined(self):
+        from src.application.single_flight import SingleFlight
+
+        flight = SingleFlight()
+        list(flight.stream("k", lambda: iter(["a"])))
+
+        assert list(flight.stream("k", lambda: iter(["b"]))) == ["b"]
+
+    def test_upstream_closed_only_when_last_subscriber_leaves(self):
+        from src.application.single_flight import SingleFlight
+
+        closed = []
+
+        def source():
+            try:
+                yield "un"
+                yield "deux"
+                yield "trois"
+            finally:
+                closed.append(1)
+
+        flight = SingleFlight()
+        first = flight.stream("k", source)
+        second = flight.stream("k", source)
+        next(first)
+        first.close()
+
+        assert closed == []
+        assert next(second) == "un"
+        assert next(second) == "deux"
+        second.close()
+        assert closed == [1]
+
+    def test_open_failure_reaches_the_caller(self):
+        from src.application.single_flight import SingleFlight
+
+        flight = SingleFlight()
+
+        def refused():
+            raise ConnectionError("503")
+
+        with pytest.raises(ConnectionError):
+            flight.stream("k", refused)
+        assert list(flight.stream("k", lambda: iter(["ok"]))) == ["ok"]
+
+    def test_abandoned_stream_is_never_joined(self):
+        from src.application.single_flight import SingleFlight
+
+        flight = SingleFlight()
+        late = []
+
+        def source():
+            try:
+                yield "un"
+                yield "deux"
+            finally:
+                # Requête identique arrivée pendant la fermeture du flux abandonné
+                if not late:
+                    late.append(flight.stream("k", lambda: iter(["un", "deux"])))
+
+        first = flight.stream("k", source)
+        assert next(first) == "un"
+        fanout = flight._streams["k"]
+        first.close()
+
+        assert fanout.subscribe() is None
+        assert list(late[0]) == ["un", "deux"]
+        assert flight.stats()["streams"] == 2
@@ -0,0 +1,318 @@
+# tests/test_asgi.py
+"""
+Tests pour le point d'entrée ASGI (mode asyncio).
+"""
+
+import asyncio
+import json
+from unittest.mock import patch
+
+import httpx
+
+CONTEXT = {
+    "type": "CHAT_WITH_AI",
+    "session_id": "CHAT_WITH_AI",
+    "prompt_object": {"prompt": "Hello"},
+}
+
+
+def _call(upstream_handler, method, path, **kwargs):
+    """Exécute une requête contre l'app ASGI avec un 1min.ai simulé."""
+    from src.asgi import GatewayASGI
+
+    async def run():
+        upstream_client = httpx.AsyncClient(transport=httpx.MockTransport(upstream_handler))
+        app = GatewayASGI(http_client=upstream_client)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://gateway") as client:
+            response = await client.request(method, path, **kwargs)
+        await upstream_client.aclose()
+        return response
+
+    return asyncio.run(run())
+
+
+def _unused_upstream(request):
+    raise AssertionError(f"Appel amont inattendu: {request.url}")
+
+
+def test_health_check():
+    response = _call(_unused_upstream, "GET", "/")
+    assert response.status_code == 200
+
+
+def test_list_models():
+    response = _call(_unused_upstream, "GET", "/v1/models")
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["object"] == "list"
+    assert len(data["data"]) > 0
+
+
+def test_chat_completion_unauthorized():
+    payload = {"model": "gpt-4o", "messages": [{"role": "user", "content": "Hello"}]}
+    response = _call(_unused_upstream, "POST", "/v1/chat/completions", json=payload)
+
+    assert response.status_code == 401
+    assert response.json()["error"]["type"] == "invalid_request_error"
+
+
+@patch("src.asgi.resolve_conversation_context", return_value=CONTEXT)
+def test_chat_completion_normal_mode(mock_context, auth_headers):
+    def upstream(request):
+        assert request.url.path == "/api/features"
+        assert request.headers["API-KEY"] == "test-api-key-123"
+        return httpx.Response(
+            200, json={"aiRecord": {"aiRecordDetail": {"resultObject": ["Bonjour !"]}}}
+        )
+
+    payload = {"model": "gpt-4o", "messages": [{"role": "user", "content": "Hello"}]}
+    response = _call(upstream, "POST", "/v1/chat/completions", json=payload, headers=auth_headers)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["choices"][0]["message"]["content"] == "Bonjour !"
+    assert "X-Request-ID" in response.headers
+
+
+@patch("src.asgi.resolve_conversation_context", return_value=CONTEXT)
+def test_chat_completion_stream_mode(mock_context, auth_headers):
+    def upstream(request):
+        assert request.url.params["isStreaming"] == "true"
+        body = b'data: {"result": "Bon"}\n\ndata: {"result": "jour"}\n\ndata: [DONE]\n\n'
+        return httpx.Response(200, content=body, headers={"Content-Type": "text/event-stream"})
+
+    payload = {
+        "model": "gpt-4o",
+        "messages": [{"role": "user", "content": "Hello"}],
+        "stream": True,
+    }
+    response = _call(upstream, "POST", "/v1/chat/completions", json=payload, headers=auth_headers)
+
+    assert response.status_code == 200
+    assert response.headers["Content-Type"] == "text/event-stream"
+    events = [line[6:] for line in response.text.split("\n\n") if line.startswith("data: ")]
+    assert events[-1] == "[DONE]"
+    deltas = [json.loads(e)["choices"][0]["delta"].get("content", "") for e in events[:-1]]
+    assert "".join(deltas) == "Bonjour"
+    assert "usage" in json.loads(events[-2])
+
+
+@patch("src.asgi.resolve_conversation_context", return_value=CONTEXT)
+def test_chat_completion_upstream_error(mock_context, auth_headers):
+    def upstream(request):
+        return httpx.Response(502, text="Bad Gateway")
+
+    payload = {"model": "gpt-4o", "messages": [{"role": "user", "content": "Hello"}]}
+    response = _call(upstream, "POST", "/v1/chat/completions", json=payload, headers=auth_headers)
+
+    assert response.status_code == 500
+    assert response.json()["error"]["type"] == "api_error"
+
+
+def test_models_etag_and_retrieve():
+    first = _call(_unused_upstream, "GET", "/v1/models")
+    etag = first.headers["etag"]
+    model_id = first.json()["data"][0]["id"]
+
+    assert (
+        _call(_unused_upstream, "GET", "/v1/models", headers={"If-None-Match": etag}).status_code
+        == 304
+    )
+    detail = _call(_unused_upstream, "GET", f"/v1/models/{model_id}")
+    assert detail.status_code == 200
+    assert detail.json()["id"] == model_id
+    assert _call(_unused_upstream, "GET", "/v1/models/not-a-model").status_code == 404
+
+
+def test_chat_completion_key_quota_exhausted(auth_headers):
+    from src.infrastructure.rate_limiter import RateLimitExceeded
+
+    payload = {"model": "gpt-4o", "messages": [{"role": "user", "content": "Hello"}]}
+    with patch("src.asgi.key_rate_limiter.acquire", side_effect=RateLimitExceeded("requests", 4)):
+        response = _call(
+            _unused_upstream, "POST", "/v1/chat/completions", json=payload, headers=auth_headers
+        )
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "4"
+    assert response.json()["error"]["code"] == "rate_limit_exceeded"
+
+
+@patch("src.asgi.resolve_conversation_context", return_value=CONTEXT)
+def test_key_quota_calls_run_off_the_event_loop(mock_context, auth_headers):
+    """Quotas (Memcached bloquant) appelés hors du thread de la boucle d'événements."""
+    import threading
+
+    loop_thread = threading.get_ident()
+    seen = []
+
+    def record(name, result=None):
+        def side_effect(*args, **kwargs):
+            seen.append((name, threading.get_ident() != loop_thread))
+            return result
+
+        return side_effect
+
+    def upstream(request):
+        return httpx.Response(200, content=b'data: {"result": "Ok"}\n\ndata: [DONE]\n\n')
+
+    payload = {"model": "gpt-4o", "messages": [{"role": "user", "content": "Hi"}], "stream": True}
+    with (
+        patch("src.asgi.key_rate_limiter.acquire", side_effect=record("acquire")),
+        patch(
+            "src.asgi.key_rate_limiter.open_stream",
+            side_effect=record("open_stream", record("release")),
+        ),
+    ):
+        response = _call(
+            upstream, "POST", "/v1/chat/completions", json=payload, headers=auth_headers
+        )
+
+    assert response.status_code == 200
+    assert seen == [("acquire", True), ("open_stream", True), ("release", True)]
+
+
+def test_stream_cap_is_checked_before_orchestration(auth_headers):
+    """Clé au plafond de flux : 429 sans conversation ni upload chez 1min.ai."""
+    from src.infrastructure.rate_limiter import RateLimitExceeded
+
+    payload = {"model": "gpt-4o", "messages": [{"role": "user", "content": "Hi"}], "stream": True}
+    with (
+        patch(
+            "src.asgi.key_rate_limiter.open_stream",
+            side_effect=RateLimitExceeded("concurrent streams", 1),
+        ),
+        patch("src.asgi.resolve_conversation_context") as mock_resolve,
+    ):
+        response = _call(
+            _unused_upstream, "POST", "/v1/chat/completions", json=payload, headers=auth_headers
+        )
+
+    assert response.status_code == 429
+    mock_resolve.assert_not_called()
+
+
+@patch("src.asgi.resolve_conversation_context", return_value=CONTEXT)
+def test_completion_cache_runs_off_the_event_loop(mock_context, auth_headers):
+    """Lecture et écriture du cache (backend memcached bloquant) hors de la boucle."""
+    import threading
+
+    from src.application.completion_cache import CompletionCache
+
+    loop_thread = threading.get_ident()
+    cache = CompletionCache(enabled=True)
+    seen = []
+
+    def off_loop(method):
+        def wrapper(*args):
+            seen.append((method.__name__, threading.get_ident() != loop_thread))
+            return method(*args)
+
+        return wrapper
+
+    cache.lookup = off_loop(cache.lookup)
+    cache.store = off_loop(cache.store)
+
+    def upstream(request):
+        return httpx.Response(200, json={"aiRecord": {"aiRecordDetail": {"resultObject": ["Ok"]}}})
+
+    payload = {"model": "gpt-4o", "messages": [{"role": "user", "content": "Cache me"}]}
+    with patch("src.asgi.completion_cache", cache):
+        first = _call(upstream, "POST", "/v1/chat/completions", json=payload, headers=auth_headers)
+        second = _call(
+            _unused_upstream, "POST", "/v1/chat/completions", json=payload, headers=auth_headers
+        )
+
+    assert first.status_code == 200
+    assert second.headers["X-Cache"] == "HIT"
+    assert seen == [("lookup", True), ("store", True), ("lookup", True)]
+
+
+@patch("src.asgi.resolve_conversation_context", return_value=CONTEXT)
+def test_breaker_and_throttle_state_is_read_off_the_event_loop(mock_context, auth_headers):
+    """Pause 429 et circuit breaker (état Memcached bloquant) consultés hors de la boucle."""
+    import threading
+
+    from src.infrastructure.circuit_breaker import one_min_breaker
+    from src.infrastructure.upstream_throttle import upstream_throttle
+
+    loop_thread = threading.get_ident()
+    seen = []
+
+    def spy(target, name):
+        method = getattr(target, name)
+
+        def wrapper(*args, **kwargs):
+            seen.append((name, threading.get_ident() != loop_thread))
+            return method(*args, **kwargs)
+
+        return patch.object(target, name, side_effect=wrapper)
+
+    def upstream(request):
+        return httpx.Response(200, json={"aiRecord": {"aiRecordDetail": {"resultObject": ["Ok"]}}})
+
+    payload = {"model": "gpt-4o", "messages": [{"role": "user", "content": "Hello"}]}
+    with (
+        spy(upstream_throttle, "check"),
+        spy(one_min_breaker, "guard"),
+        spy(one_min_breaker, "call_succeeded"),
+        spy(upstream_throttle, "observe"),
+    ):
+        response = _call(
+            upstream, "POST", "/v1/chat/completions", json=payload, headers=auth_headers
+        )
+
+    assert response.status_code == 200
+    assert seen == [
+        ("check", True),
+        ("guard", True),
+        ("call_succeeded", True),
+        ("observe", True),
+    ]
+
+
+@patch("src.asgi.resolve_conversation_context", return_value=CONTEXT)
+def test_upstream_concurrency_sheds_and_releases_slots(mock_context, auth_headers):
+    """Concurrence amont en ASGI : délestage 503 + Retry-After, places rendues après l'appel."""
+    from src.infrastructure.concurrency_limiter import AdaptiveConcurrencyLimiter
+
+    limiter = AdaptiveConcurrencyLimiter(max_limit=1, queue_size=0)
+
+    def upstream(request):
+        assert limiter.stats()["in_flight"] == 1
+        return httpx.Response(200, json={"aiRecord": {"aiRecordDetail": {"resultObject": ["Ok"]}}})
+
+    payload = {"model": "gpt-4o", "messages": [{"role": "user", "content": "Hello"}]}
+    with patch("src.asgi.async_upstream_limiter", limiter):
+        served = _call(upstream, "POST", "/v1/chat/completions", json=payload, headers=auth_headers)
+        assert limiter.stats()["in_flight"] == 0
+
+        held = limiter.acquire()
+        shed = _call(
+            _unused_upstream, "POST", "/v1/chat/completions", json=payload, headers=auth_headers
+        )
+        held()
+
+    assert served.status_code == 200
+    assert shed.status_code == 503
+    assert int(shed.headers["Retry-After"]) >= 1
+    assert shed.json()["error"]["code"] == "server_overloaded"
+    assert limiter.stats()["shed_queue_full"] == 1
+
+
+def test_import_builds_nothing_until_the_factory_runs():
+    """Importer le module ne configure ni logging ni app : uvicorn appelle la fabrique."""
+    import subprocess
+    import sys
+
+    code = (
+        "import logging, src.asgi as asgi;"
+        "print(hasattr(asgi, 'app'),"
+        " getattr(logging.getLogger('1min-gateway'), '_gateway_configured', False))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    assert result.stdout.split() == ["False", "False"]
@@ -102,3 +102,123 @@ class TestConversationService:
 
         # Note: Le service ignore les messages passés, prend seulement new_input
         assert result == "Nouveau message"
+
+
+def _count_words(text):
+    return len(text.split())
+
+
+DIALOGUE = [
+    {"role": "system", "content": "Tu es concis."},
+    {"role": "user", "content": "un deux trois quatre"},
+    {"role": "assistant", "content": "cinq six sept huit"},
+    {"role": "user", "content": [{"type": "text", "text": "neuf dix"}]},
+    {"role": "assistant", "content": "onze douze"},
+    {"role": "user", "content": "Et ensuite ?"},
+]
+
+
+class TestHistoryPacking:
+    """Tests pour le compactage de l'historique dans un budget de tokens."""
+
+    def test_context_window_uses_longest_prefix(self):
+        from src.domain.conversation_service import context_window
+        from src.domain.models import DEFAULT_CONTEXT_WINDOW
+
+        assert context_window("gpt-4o-mini") == 128000
+        assert context_window("gpt-4.1-nano") == 1047576
+        assert context_window("meta/meta-llama-3.1-405b-instruct") == 128000
+        assert context_window("meta/meta-llama-3-70b-instruct") == 8192
+        assert context_window("unknown-model") == DEFAULT_CONTEXT_WINDOW
+
+    def test_history_within_budget_is_kept_in_order(self):
+        from src.domain.conversation_service import pack_conversation_history
+
+        prompt, tokens, omitted = pack_conversation_history(DIALOGUE, 1000, _count_words)
+
+        assert omitted == 0
+        assert prompt.split("\n\n") == [
+            "System: Tu es concis.",
+            "User: un deux trois quatre",
+            "Assistant: cinq six sept huit",
+            "User: neuf dix",
+            "Assistant: onze douze",
+            "User: Et ensuite ?",
+        ]
+        assert tokens == _count_words(prompt)
+
+    def test_oldest_turns_are_dropped_first(self):
+        """Système et dernier message toujours gardés, les plus anciens tours retirés."""
+        from src.domain.conversation_service import pack_conversation_history
+
+        prompt, tokens, omitted = pack_conversation_history(DIALOGUE, 18, _count_words)
+
+        assert omitted == 2
+        assert prompt.split("\n\n") == [
+            "System: Tu es concis.",
+            "[2 earlier message(s) omitted]",
+            "User: neuf dix",
+            "Assistant: onze douze",
+            "User: Et ensuite ?",
+        ]
+        assert tokens == _count_words(prompt) == 18
+
+    def test_omission_marker_fits_in_budget(self):
+        """Si la mention des tours retirés déborde, un tour de plus est retiré."""
+        from src.domain.conversation_service import pack_conversation_history
+
+        prompt, tokens, omitted = pack_conversation_history(DIALOGUE, 16, _count_words)
+
+        assert omitted == 3
+        assert "[3 earlier message(s) omitted]" in prompt
+        assert tokens == _count_words(prompt) <= 16
+
+    def test_single_message_is_sent_as_is(self):
+        from src.domain.conversation_service import pack_conversation_history
+
+        prompt, tokens, omitted = pack_conversation_history(
+            [{"role": "user", "content": "Bonjour"}], 10, _count_words
+        )
+
+        assert (prompt, tokens, omitted) == ("Bonjour", 1, 0)
+
+    def test_separators_are_counted_in_the_budget(self):
+        """Les séparateurs entre lignes comptent : le total est celui du prompt envoyé."""
+        from src.domain.conversation_service import pack_conversation_history
+
+        def count(text):
+            return len(text.split()) + text.count("\n\n")
+
+        prompt, tokens, omitted = pack_conversation_history(DIALOGUE, 1000, count)
+        assert omitted == 0
+        assert tokens == count(prompt)
+
+        prompt, tokens, omitted = pack_conversation_history(DIALOGUE, 20, count)
+        assert omitted > 0
+        assert tokens == count(prompt) <= 20
+
+    def test_last_message_over_budget_is_refused(self):
+        """Système + dernier message au-delà du budget : erreur explicite, jamais tronqué."""
+        from src.domain.conversation_service import HistoryTooLong, pack_conversation_history
+
+        with pytest.raises(HistoryTooLong) as exc:
+            pack_conversation_history(DIALOGUE, 5, _count_words)
+        assert exc.value.budget == 5
+        assert exc.value.tokens == _count_words("System: Tu es concis.") + _count_words(
+            "User: Et ensuite ?"
+        )
+
+        with pytest.raises(HistoryTooLong):
+            pack_conversation_history(
+                [{"role": "user", "content": "un deux trois"}], 2, _count_words
+            )
+
+    def test_marker_is_dropped_when_no_turn_fits(self):
+        """Sans aucun tour conservé, la mention est abandonnée plutôt que de déborder."""
+        from src.domain.conversation_service import pack_conversation_history
+
+        prompt, tokens, omitted = pack_conversation_history(DIALOGUE, 8, _count_words)
+
+        assert omitted == 4
+        assert prompt.split("\n\n") == ["System: Tu es concis.", "User: Et ensuite ?"]
+        assert tokens == _count_words(prompt) <= 8
@@ -4,6 +4,7 @@ Tests pour le service de gestion des assets (images).
 """
 import base64
 import json
+from io import BytesIO
 from unittest.mock import MagicMock, patch
 
 import pytest
@@ -33,7 +34,7 @@ class TestAssetService:
         with pytest.raises(ValueError, match="Invalid data URI"):
             _decode_base64_image("invalid-data")
 
-    @patch("src.infrastructure.asset_service.requests.get")
+    @patch("src.infrastructure.asset_service.upstream.get")
     def test_download_external_image_success(self, mock_get):
         """Test le téléchargement d'une image externe."""
         from src.infrastructure.asset_service import _download_external_image
@@ -45,14 +46,14 @@ class TestAssetService:
         mock_response.headers = {"Content-Type": "image/jpeg"}
         mock_get.return_value = mock_response
 
-        binary_data, mime_type = _download_external_image(SAMPLE_IMAGE_URL)
+        sink = BytesIO()
+        mime_type = _download_external_image(SAMPLE_IMAGE_URL, sink)
 
-        assert isinstance(binary_data, bytes)
-        assert binary_data == b"fake-image-data"
+        assert sink.getvalue() == b"fake-image-data"
         assert mime_type == "image/jpeg"
         mock_get.assert_called_once()
 
-    @patch("src.infrastructure.asset_service.requests.get")
+    @patch("src.infrastructure.asset_service.upstream.get")
     def test_download_external_image_too_large(self, mock_get):
         """Test le rejet d'une image trop volumineuse."""
         from src.infrastructure.asset_service import MAX_IMAGE_SIZE, _download_external_image
@@ -65,9 +66,9 @@ class TestAssetService:
         mock_get.return_value = mock_response
 
         with pytest.raises(ValueError, match="FILE_TOO_LARGE_413"):
-            _download_external_image(SAMPLE_IMAGE_URL)
+            _download_external_image(SAMPLE_IMAGE_URL, BytesIO())
 
-    @patch("src.infrastructure.asset_service.requests.post")
+    @patch("src.infrastructure.asset_service.upstream.post")
     @patch("src.infrastructure.asset_service.filetype.guess")
     def test_upload_image_to_1min_base64(self, mock_guess, mock_post):
         """Test l'upload d'une image base64 vers 1min.ai."""
@@ -108,3 +109,85 @@ class TestAssetService:
 
         with pytest.raises(ValueError, match="Missing or invalid Authorization header"):
             upload_image_to_1min(item, {}, "https://api.example.com/assets")
+
+
+class TestAssetCache:
+    """Tests pour le cache adressé par contenu des assets uploadés."""
+
+    @patch("src.infrastructure.asset_service.upstream.get")
+    @patch("src.infrastructure.asset_service.upstream.post")
+    def test_repeated_image_skips_download_and_upload(self, mock_post, mock_get):
+        from src.infrastructure.asset_service import upload_image_to_1min
+        from src.infrastructure.cache_service import LRUCache
+
+        download = MagicMock()
+        download.iter_content.return_value = [b"fake-image-data"]
+        download.headers = {"Content-Type": "image/jpeg"}
+        mock_get.return_value = download
+        mock_post.return_value.json.return_value = {"fileContent": {"path": "/uploads/a.jpg"}}
+
+        item = {"image_url": {"url": SAMPLE_IMAGE_URL}}
+        headers = {"API-KEY": "test-key", "Authorization": "Bearer test-key"}
+
+        with patch("src.infrastructure.asset_service.asset_cache", LRUCache("assets")):
+            first = upload_image_to_1min(item, headers, "https://api.example.com/assets")
+            second = upload_image_to_1min(item, headers, "https://api.example.com/assets")
+
+        assert first == second == "/uploads/a.jpg"
+        mock_get.assert_called_once()
+        mock_post.assert_called_once()
+
+    def test_cache_key_is_scoped_by_api_key(self):
+        from src.infrastructure.asset_service import asset_cache_key
+
+        first = asset_cache_key(SAMPLE_IMAGE_URL, {"API-KEY": "key-1"})
+
+        assert first == asset_cache_key(SAMPLE_IMAGE_URL, {"API-KEY": "key-1"})
+        assert first != asset_cache_key(SAMPLE_IMAGE_URL, {"API-KEY": "key-2"})
+        assert first != asset_cache_key(SAMPLE_IMAGE_BASE64, {"API-KEY": "key-1"})
+
+
+class TestStreamedIngestion:
+    """Tests pour l'ingestion par blocs et l'upload multipart streamé."""
+
+    def test_spool_base64_matches_one_shot_decoding(self):
+        from src.infrastructure.asset_service import _decode_base64_image, _spool_base64_image
+
+        payload = bytes(range(256)) * 3000
+        data_uri = "data:image/png;base64," + base64.b64encode(payload).decode().rstrip("=")
+
+        sink = BytesIO()
+        mime_type = _spool_base64_image(data_uri, sink)
+
+        assert sink.getvalue() == payload == _decode_base64_image(data_uri)[0]
+        assert mime_type == "image/png"
+
+    def test_multipart_stream_matches_declared_length(self):
+        from src.infrastructure.asset_service import MultipartFileStream
+
+        content = b"\x89PNG" + b"x" * 200_000
+        stream = MultipartFileStream("asset", "a.png", BytesIO(content), "image/png", len(content))
+
+        body = b"".join(stream)
+
+        assert len(body) == len(stream)
+        assert body.startswith(f"--{stream.boundary}\r\n".encode())
+        assert b'name="asset"; filename="a.png"' in body
+        assert content in body
+        assert body.endswith(f"\r\n--{stream.boundary}--\r\n".encode())
+
+    @patch("src.infrastructure.asset_service.upstream.post")
+    def test_upload_streams_multipart_body(self, mock_post):
+        from src.infrastructure.asset_service import MultipartFileStream, upload_image_to_1min
+
+        mock_post.return_value.json.return_value = {"fileContent": {"path": "/uploads/x.png"}}
+        item = {"image_url": {"url": SAMPLE_IMAGE_BASE64}}
+        headers = {"API-KEY": "stream-key", "Authorization": "Bearer stream-key"}
+
+        with patch("src.infrastructure.asset_service.asset_cache", None):
+            upload_image_to_1min(item, headers, "https://api.example.com/assets")
+
+        kwargs = mock_post.call_args.kwargs
+        assert isinstance(kwargs["data"], MultipartFileStream)
+        assert kwargs["headers"]["Content-Type"].startswith("multipart/form-data; boundary=")
+        assert "files" not in kwargs
@@ -0,0 +1,86 @@
+# tests/test_infrastructure/test_cache_service.py
+"""
+Tests pour les caches clé/valeur (LRU mémoire et Memcached).
+"""
+
+from unittest.mock import MagicMock, patch
+
+
+class TestLRUCache:
+    """Tests pour le cache LRU en mémoire."""
+
+    def test_get_set_and_hit_rate(self):
+        from src.infrastructure.cache_service import LRUCache
+
+        cache = LRUCache("test", max_entries=4)
+        assert cache.get("a") is None
+        cache.set("a", "1")
+
+        assert cache.get("a") == "1"
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == 0.5
+        assert stats["entries"] == 1
+
+    def test_evicts_least_recently_used_entry(self):
+        from src.infrastructure.cache_service import LRUCache
+
+        cache = LRUCache("test", max_entries=2)
+        cache.set("a", "1")
+        cache.set("b", "2")
+        cache.get("a")
+        cache.set("c", "3")
+
+        assert cache.get("b") is None
+        assert cache.get("a") == "1"
+        assert cache.stats()["evictions"] == 1
+
+    def test_evicts_on_total_size(self):
+        from src.infrastructure.cache_service import LRUCache
+
+        cache = LRUCache("test", max_entries=10, max_bytes=10)
+        cache.set("a", "x" * 6)
+        cache.set("b", "y" * 6)
+
+        assert cache.get("a") is None
+        assert cache.stats()["bytes"] == 6
+        # Une valeur plus grande que le cache entier n'est jamais stockée
+        assert cache.set("c", "z" * 11) is False
+
+    def test_entries_expire_after_ttl(self):
+        from src.infrastructure.cache_service import LRUCache
+
+        cache = LRUCache("test", ttl=10)
+        with patch("src.infrastructure.cache_service.time.monotonic", return_value=100.0):
+            cache.set("a", "1")
+        with patch("src.infrastructure.cache_service.time.monotonic", return_value=111.0):
+            assert cache.get("a") is None
+        assert len(cache) == 0
+
+
+class TestMemcachedCache:
+    """Tests pour le backend Memcached."""
+
+    def test_prefixes_keys_and_decodes_values(self):
+        from src.infrastructure.cache_service import MemcachedCache
+
+        client = MagicMock()
+        client.get.return_value = b"valeur"
+        cache = MemcachedCache("completions", ttl=30, client=client)
+
+        assert cache.set("k", "valeur") is True
+        assert cache.get("k") == "valeur"
+        client.set.assert_called_once_with("1mg:completions:k", b"valeur", expire=30, noreply=True)
+
+    def test_unavailable_server_is_a_miss(self):
+        from src.infrastructure.cache_service import MemcachedCache
+
+        client = MagicMock()
+        client.get.side_effect = ConnectionRefusedError("down")
+        cache = MemcachedCache("completions", client=client)
+
+        assert cache.get("k") is None
+        stats = cache.stats()
+        assert stats["errors"] == 1
+        assert stats["misses"] == 1
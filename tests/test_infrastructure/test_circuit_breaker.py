@@ -0,0 +1,116 @@
+# tests/test_infrastructure/test_circuit_breaker.py
+"""
+Tests pour le circuit breaker partagé de l'API 1min.ai.
+"""
+
+import threading
+from unittest.mock import patch
+
+
+class TestCircuitBreaker:
+    """Tests pour les transitions CLOSED / OPEN / HALF_OPEN."""
+
+    def test_failure_rate_below_threshold_keeps_circuit_closed(self):
+        from src.infrastructure.circuit_breaker import CircuitBreaker
+
+        cb = CircuitBreaker(failure_threshold=3, failure_rate=0.5)
+        for _ in range(10):
+            cb.call_succeeded()
+        for _ in range(4):
+            cb.call_failed()
+
+        # 4 échecs sur 14 appels : taux insuffisant malgré le nombre d'échecs
+        assert cb.is_open() is False
+        assert cb.stats()["window_failures"] == 4
+
+    def test_failures_leave_the_sliding_window(self):
+        from src.infrastructure.circuit_breaker import CircuitBreaker
+
+        cb = CircuitBreaker(failure_threshold=2, window=60)
+        with patch("src.infrastructure.circuit_breaker.time.time", return_value=1000.0):
+            cb.call_failed()
+        with patch("src.infrastructure.circuit_breaker.time.time", return_value=1100.0):
+            cb.call_failed()
+            assert cb.failures == 1
+            assert cb.is_open() is False
+
+    def test_half_open_admits_limited_probes(self):
+        from src.infrastructure.circuit_breaker import HALF_OPEN, CircuitBreaker
+
+        cb = CircuitBreaker(failure_threshold=1, timeout=30, half_open_probes=1)
+        with patch("src.infrastructure.circuit_breaker.time.time", return_value=1000.0):
+            cb.call_failed()
+            assert cb.allow_request() is False
+
+        with patch("src.infrastructure.circuit_breaker.time.time", return_value=1031.0):
+            admitted = []
+            threads = [
+                threading.Thread(target=lambda: admitted.append(cb.allow_request()))
+                for _ in range(8)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            assert admitted.count(True) == 1
+            assert cb.state == HALF_OPEN
+
+            cb.call_succeeded()
+            assert cb.allow_request() is True
+
+    def test_failed_probe_reopens_the_circuit(self):
+        from src.infrastructure.circuit_breaker import OPEN, CircuitBreaker
+
+        cb = CircuitBreaker(failure_threshold=1, timeout=30)
+        with patch("src.infrastructure.circuit_breaker.time.time", return_value=1000.0):
+            cb.call_failed()
+        with patch("src.infrastructure.circuit_breaker.time.time", return_value=1031.0):
+            assert cb.allow_request() is True
+            cb.call_failed()
+
+            assert cb.state == OPEN
+            assert cb.allow_request() is False
+            assert cb.retry_after() == 31
+
+    def test_open_state_is_shared_between_workers(self):
+        from src.infrastructure.cache_service import LRUCache
+        from src.infrastructure.circuit_breaker import CircuitBreaker
+
+        shared = LRUCache("breaker")
+        worker_a = CircuitBreaker(failure_threshold=1, timeout=30, shared_state=shared)
+        worker_b = CircuitBreaker(failure_threshold=1, timeout=30, shared_state=shared)
+
+        worker_a.call_failed()
+
+        assert worker_b.is_open() is True
+
+        worker_a.reset()
+        assert shared.get("1min-api") is None
+
+    def test_shared_state_io_runs_outside_the_lock(self):
+        from src.infrastructure.cache_service import LRUCache
+        from src.infrastructure.circuit_breaker import CircuitBreaker
+
+        held = []
+
+        class RecordingCache(LRUCache):
+            def get(self, key):
+                held.append(("get", worker._lock.locked()))
+                return super().get(key)
+
+            def set(self, key, value, ttl=None):
+                held.append(("set", worker._lock.locked()))
+                return super().set(key, value, ttl=ttl)
+
+            def delete(self, key):
+                held.append(("delete", worker._lock.locked()))
+                return super().delete(key)
+
+        worker = CircuitBreaker(failure_threshold=1, timeout=30, shared_state=RecordingCache("b"))
+        assert worker.allow_request() is True
+        worker.call_failed()
+        worker.reset()
+
+        assert [op for op, _ in held] == ["get", "set", "delete"]
+        assert not any(locked for _, locked in held)
@@ -0,0 +1,119 @@
+# tests/test_infrastructure/test_concurrency_limiter.py
+"""
+Tests pour le limiteur de concurrence adaptatif (AIMD, file bornée, délestage).
+"""
+
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+
+class TestAdaptiveConcurrencyLimiter:
+    """Tests pour l'admission et l'adaptation de la limite."""
+
+    def test_sheds_immediately_when_lane_is_full(self):
+        from src.infrastructure.concurrency_limiter import (
+            AdaptiveConcurrencyLimiter,
+            GatewayOverloaded,
+        )
+
+        limiter = AdaptiveConcurrencyLimiter(max_limit=2, queue_size=4)
+        limiter.acquire()
+        limiter.acquire()
+
+        # Limite au maximum : aucune place en file sans empiéter sur la voie prioritaire
+        with pytest.raises(GatewayOverloaded) as exc:
+            limiter.acquire()
+
+        assert exc.value.reason == "queue full"
+        assert exc.value.retry_after >= 1
+        assert limiter.stats()["shed_queue_full"] == 1
+
+    def test_waiters_are_admitted_in_order_as_slots_free(self):
+        from src.infrastructure.concurrency_limiter import AdaptiveConcurrencyLimiter
+
+        limiter = AdaptiveConcurrencyLimiter(max_limit=4, queue_size=4, queue_timeout=5)
+        limiter._limit = 1.0
+        release = limiter.acquire()
+        admitted = []
+
+        def waiter(name):
+            admitted.append((name, limiter.acquire()))
+
+        threads = []
+        for name in ("a", "b"):
+            threads.append(threading.Thread(target=waiter, args=(name,)))
+            threads[-1].start()
+            while limiter.stats()["waiting"] < len(threads):
+                time.sleep(0.001)
+
+        release()
+        threads[0].join(timeout=5)
+        assert [name for name, _ in admitted] == ["a"]
+        assert limiter.stats()["waiting"] == 1
+
+        admitted[0][1]()
+        threads[1].join(timeout=5)
+        assert [name for name, _ in admitted] == ["a", "b"]
+        assert limiter.stats()["in_flight"] == 1
+
+    def test_queue_deadline_sheds_request(self):
+        from src.infrastructure.concurrency_limiter import (
+            AdaptiveConcurrencyLimiter,
+            GatewayOverloaded,
+        )
+
+        limiter = AdaptiveConcurrencyLimiter(max_limit=4, queue_size=4, queue_timeout=0.01)
+        limiter._limit = 1.0
+        limiter.acquire()
+
+        with pytest.raises(GatewayOverloaded) as exc:
+            limiter.acquire()
+
+        assert exc.value.reason == "queue timeout"
+        assert limiter.stats()["waiting"] == 0
+
+    def test_aimd_adjusts_limit(self):
+        from src.infrastructure.concurrency_limiter import AdaptiveConcurrencyLimiter
+
+        limiter = AdaptiveConcurrencyLimiter(max_limit=20)
+        limiter._limit = 10.0
+
+        with patch("src.infrastructure.concurrency_limiter.time.monotonic", return_value=100.0):
+            limiter.on_overload("429")
+            # Une rafale d'erreurs dans la même seconde ne réduit qu'une fois
+            limiter.on_overload("429")
+        assert limiter.limit == 9
+
+        for _ in range(10):
+            limiter.on_success(1.0)
+        assert limiter.limit == 10
+
+        # La latence récente dérive au-delà de 2x la référence : réduction
+        with patch("src.infrastructure.concurrency_limiter.time.monotonic", return_value=200.0):
+            for _ in range(10):
+                limiter.on_success(10.0)
+        assert limiter.limit < 10
+        assert limiter.stats()["decreases"] == 2
+
+    def test_try_acquire_never_waits(self):
+        from src.infrastructure.concurrency_limiter import AdaptiveConcurrencyLimiter
+
+        limiter = AdaptiveConcurrencyLimiter(max_limit=1, queue_size=4)
+        release = limiter.try_acquire()
+        assert release is not None
+        assert limiter.try_acquire() is None
+        assert limiter.stats()["shed_queue_full"] == 0
+
+        release()
+        assert limiter.try_acquire() is not None
+
+    def test_disabled_limiter_admits_everything(self):
+        from src.infrastructure.concurrency_limiter import AdaptiveConcurrencyLimiter
+
+        limiter = AdaptiveConcurrencyLimiter(max_limit=1, queue_size=0, enabled=False)
+        for _ in range(5):
+            limiter.acquire()
+        assert limiter.stats()["in_flight"] == 0
@@ -0,0 +1,159 @@
+# tests/test_infrastructure/test_logging_service.py
+"""
+Tests pour la journalisation non bloquante (format JSON, échantillonnage, file d'attente).
+"""
+
+import json
+import logging
+import queue
+import threading
+
+
+class _Collector(logging.Handler):
+    """Handler de test : garde les lignes formatées et le thread qui les a écrites."""
+
+    def __init__(self):
+        super().__init__()
+        self.lines = []
+        self.threads = []
+        self.written = threading.Event()
+
+    def emit(self, record):
+        self.lines.append(self.format(record))
+        self.threads.append(threading.current_thread().name)
+        self.written.set()
+
+
+def _record(name="1min-gateway.routes", level=logging.INFO, msg="API_CALL | %s", args=("x",)):
+    return logging.LogRecord(name, level, __file__, 1, msg, args, None)
+
+
+class TestJsonFormatter:
+    """Tests pour la sortie JSON structurée."""
+
+    def test_record_is_one_json_object_with_extra_fields(self):
+        from src.infrastructure.logging_service import JsonFormatter
+
+        record = _record(args=("gpt-4o",))
+        record.request_id = "req-1"
+        entry = json.loads(JsonFormatter().format(record))
+
+        assert entry["level"] == "INFO"
+        assert entry["logger"] == "1min-gateway.routes"
+        assert entry["msg"] == "API_CALL | gpt-4o"
+        assert entry["request_id"] == "req-1"
+        assert entry["ts"].endswith("+00:00")
+
+    def test_exception_is_serialized(self):
+        from src.infrastructure.logging_service import JsonFormatter
+
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            import sys
+
+            record = _record()
+            record.exc_info = sys.exc_info()
+
+        entry = json.loads(JsonFormatter().format(record))
+        assert "ValueError: boom" in entry["exc"]
+
+
+class TestSamplingFilter:
+    """Tests pour l'échantillonnage par logger."""
+
+    def test_keeps_one_record_in_n_below_warning(self):
+        from src.infrastructure.logging_service import SamplingFilter
+
+        sampler = SamplingFilter({"1min-gateway.routes": 0.25})
+        kept = [sampler.filter(_record()) for _ in range(8)]
+        assert kept.count(True) == 2
+
+        # Les avertissements et erreurs ne sont jamais écartés
+        assert all(sampler.filter(_record(level=logging.WARNING)) for _ in range(4))
+
+    def test_child_loggers_inherit_closest_rate(self):
+        from src.infrastructure.logging_service import SamplingFilter
+
+        sampler = SamplingFilter({"1min-gateway": 0.5, "1min-gateway.routes": 0.0})
+        assert not any(sampler.filter(_record("1min-gateway.routes")) for _ in range(4))
+        kept = [_record("1min-gateway.orchestrator") for _ in range(4)]
+        assert [sampler.filter(record) for record in kept].count(True) == 2
+        assert kept[0].sampled == 2
+        # Un logger homonyme par préfixe n'hérite pas
+        assert all(sampler.filter(_record("1min-gateway-other")) for _ in range(3))
+
+    def test_parse_sample_rates_skips_invalid_entries(self):
+        from src.infrastructure.logging_service import parse_sample_rates
+
+        rates = parse_sample_rates("1min-gateway.routes=0.1, bad, x=2, 1min-gateway.asgi=1")
+        assert rates == {"1min-gateway.routes": 0.1, "1min-gateway.asgi": 1.0}
+
+
+class TestLogPipeline:
+    """Tests pour la file d'attente et le thread d'écriture."""
+
+    def test_formatting_and_io_happen_off_the_caller_thread(self):
+        from src.infrastructure.logging_service import LogPipeline
+
+        formatted_in = []
+
+        class Lazy:
+            def __str__(self):
+                formatted_in.append(threading.current_thread().name)
+                return "lazy"
+
+        collector = _Collector()
+        target = logging.getLogger("test-pipeline.lazy")
+        target.propagate = False
+        target.setLevel(logging.INFO)
+        pipeline = LogPipeline(queue_size=16)
+        pipeline.install(target, [collector])
+        try:
+            target.debug("Jamais formaté: %s", Lazy())
+            target.info("Valeur: %s", Lazy())
+            assert collector.written.wait(5)
+        finally:
+            pipeline.stop()
+            target.removeHandler(pipeline.handler)
+
+        caller = threading.current_thread().name
+        assert collector.lines == ["Valeur: lazy"]
+        assert formatted_in and caller not in formatted_in
+        assert caller not in collector.threads
+
+    def test_full_queue_drops_instead_of_blocking(self):
+        from src.infrastructure.logging_service import LogPipeline
+
+        pipeline = LogPipeline(queue_size=2)
+        for _ in range(5):
+            pipeline.handler.handle(_record())
+
+        stats = pipeline.stats()
+        assert stats["queued"] == 2
+        assert stats["dropped"] == 3
+        assert stats["running"] is False
+
+    def test_child_process_gets_a_fresh_queue_and_writer(self):
+        from src.infrastructure.logging_service import LogPipeline
+
+        collector = _Collector()
+        target = logging.getLogger("test-pipeline.fork")
+        target.propagate = False
+        target.setLevel(logging.INFO)
+        pipeline = LogPipeline(queue_size=16)
+        pipeline.install(target, [collector])
+        inherited = pipeline.handler.queue
+        try:
+            # Simule le hook after_in_child : file et thread neufs, journaux toujours écrits
+            pipeline._listener.stop()
+            pipeline._after_fork_in_child()
+            target.info("après fork")
+            assert collector.written.wait(5)
+        finally:
+            pipeline.stop()
+            target.removeHandler(pipeline.handler)
+
+        assert pipeline.handler.queue is not inherited
+        assert isinstance(pipeline.handler.queue, queue.Queue)
+        assert collector.lines == ["après fork"]
@@ -0,0 +1,54 @@
+# tests/test_infrastructure/test_metrics.py
+"""
+Tests pour les métriques Prometheus de la Gateway.
+"""
+
+
+class TestHistogram:
+    """Tests pour les histogrammes à buckets fixes."""
+
+    def test_observations_are_cumulative_in_rendering(self):
+        from src.infrastructure.metrics import Histogram
+
+        histogram = Histogram("latency_seconds", "Latency.", ("model",), buckets=(0.1, 1))
+        histogram.observe(0.05, "gpt-4o")
+        histogram.observe(0.5, "gpt-4o")
+        histogram.observe(3, "gpt-4o")
+
+        lines = histogram.render()
+        assert 'latency_seconds_bucket{model="gpt-4o",le="0.1"} 1' in lines
+        assert 'latency_seconds_bucket{model="gpt-4o",le="1"} 2' in lines
+        assert 'latency_seconds_bucket{model="gpt-4o",le="+Inf"} 3' in lines
+        assert 'latency_seconds_sum{model="gpt-4o"} 3.55' in lines
+        assert 'latency_seconds_count{model="gpt-4o"} 3' in lines
+        assert histogram.count("gpt-4o") == 3
+
+    def test_bucket_upper_bound_is_inclusive(self):
+        from src.infrastructure.metrics import Histogram
+
+        histogram = Histogram("h", "H.", buckets=(1, 2))
+        histogram.observe(1)
+
+        assert 'h_bucket{le="1"} 1' in histogram.render()
+
+
+class TestRegistry:
+    """Tests pour le rendu texte et les étiquettes bornées."""
+
+    def test_render_includes_help_and_type(self):
+        from src.infrastructure.metrics import MetricsRegistry
+
+        registry = MetricsRegistry()
+        counter = registry.counter("calls_total", "Calls.", ("outcome",))
+        counter.inc("2xx")
+        counter.inc("2xx", amount=2)
+
+        text = registry.render()
+        assert "# HELP calls_total Calls.\n# TYPE calls_total counter\n" in text
+        assert 'calls_total{outcome="2xx"} 3' in text
+
+    def test_unknown_models_share_one_label(self):
+        from src.infrastructure.metrics import model_label
+
+        assert model_label("gpt-4o") == "gpt-4o"
+        assert model_label("client-invented-model-123") == "other"
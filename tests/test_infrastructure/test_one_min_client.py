@@ -12,18 +12,9 @@ import requests
 class TestOneMinClient:
     """Tests pour le client 1min.ai."""
 
-    def test_get_retry_session(self):
-        """Test la création d'une session avec retry."""
-        from src.infrastructure.one_min_client import get_retry_session
-
-        session = get_retry_session()
-
-        assert session is not None
-        assert hasattr(session, "mount")
-
     def test_circuit_breaker_initial_state(self):
         """Test l'état initial du circuit breaker."""
-        from src.infrastructure.one_min_client import CircuitBreaker
+        from src.infrastructure.circuit_breaker import CircuitBreaker
 
         cb = CircuitBreaker(failure_threshold=3, timeout=30)
 
@@ -33,7 +24,7 @@ class TestOneMinClient:
 
     def test_circuit_breaker_call_failed(self):
         """Test l'enregistrement d'un échec."""
-        from src.infrastructure.one_min_client import CircuitBreaker
+        from src.infrastructure.circuit_breaker import CircuitBreaker
 
         cb = CircuitBreaker(failure_threshold=2, timeout=30)
 
@@ -47,7 +38,7 @@ class TestOneMinClient:
 
     def test_circuit_breaker_call_succeeded(self):
         """Test la réinitialisation après un succès."""
-        from src.infrastructure.one_min_client import CircuitBreaker
+        from src.infrastructure.circuit_breaker import CircuitBreaker
 
         cb = CircuitBreaker(failure_threshold=2, timeout=30)
 
@@ -94,6 +85,27 @@ class TestOneMinClient:
 
         assert result is None
 
+    @patch("src.infrastructure.one_min_client.requests.Session.post")
+    def test_unusable_success_is_not_counted_as_a_failure(self, mock_post):
+        """Une réponse 200 inexploitable n'est comptée qu'une fois (succès amont)."""
+        from src.infrastructure.circuit_breaker import one_min_breaker
+        from src.infrastructure.one_min_client import create_1min_conversation
+
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.headers = {"Content-Type": "application/json"}
+        mock_response.json.return_value = {"conversation": {}}
+        mock_post.return_value = mock_response
+
+        with (
+            patch.object(one_min_breaker, "call_succeeded") as succeeded,
+            patch.object(one_min_breaker, "call_failed") as failed,
+        ):
+            assert create_1min_conversation(api_key="test-key", model="gpt-4o") is None
+
+        succeeded.assert_called_once()
+        failed.assert_not_called()
+
     # Dans tests/test_infrastructure/test_one_min_client.py
     @patch("src.infrastructure.one_min_client.requests.Session.post")
     def test_create_1min_conversation_timeout(self, mock_post):
@@ -0,0 +1,193 @@
+# tests/test_infrastructure/test_rate_limiter.py
+"""
+Tests pour la limitation de débit par clé API (seau à jetons, fenêtre glissante, flux).
+"""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+
+class FakeMemcached:
+    """Sous-ensemble de pymemcache (add/incr/decr/gets/cas) sur un dict."""
+
+    def __init__(self):
+        self.data = {}
+        self.versions = {}
+
+    def _bump(self, key, value):
+        self.data[key] = str(value).encode()
+        self.versions[key] = self.versions.get(key, 0) + 1
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def add(self, key, value, expire=0, noreply=True):
+        if key in self.data:
+            return False
+        self._bump(key, value)
+        return True
+
+    def incr(self, key, value, noreply=False):
+        if key not in self.data:
+            return None
+        self._bump(key, int(self.data[key]) + value)
+        return int(self.data[key])
+
+    def decr(self, key, value, noreply=False):
+        if key in self.data:
+            self._bump(key, max(0, int(self.data[key]) - value))
+
+    def touch(self, key, expire=0, noreply=True):
+        return key in self.data
+
+    def gets(self, key):
+        if key not in self.data:
+            return None, None
+        return self.data[key], self.versions[key]
+
+    def cas(self, key, value, cas, expire=0, noreply=False):
+        if key not in self.data:
+            return None
+        if self.versions[key] != cas:
+            return False
+        self._bump(key, value)
+        return True
+
+
+class TestApiKeyRateLimiter:
+    """Tests pour les quotas par clé API."""
+
+    def _limiter(self, **kwargs):
+        from src.infrastructure.rate_limiter import ApiKeyRateLimiter, MemoryQuotaStore
+
+        return ApiKeyRateLimiter(MemoryQuotaStore(), **kwargs)
+
+    def test_token_bucket_allows_burst_then_rejects_with_retry_after(self):
+        from src.infrastructure.rate_limiter import RateLimitExceeded
+
+        limiter = self._limiter(rate=60, burst=3)
+        with patch("src.infrastructure.rate_limiter.time.time", return_value=1000.0):
+            for _ in range(3):
+                limiter.acquire("sk-a")
+            with pytest.raises(RateLimitExceeded) as exc:
+                limiter.acquire("sk-a")
+            # Une autre clé a son propre seau
+            limiter.acquire("sk-b")
+
+        assert exc.value.retry_after == 1
+        # Un jeton revient par seconde (60 par minute)
+        with patch("src.infrastructure.rate_limiter.time.time", return_value=1001.0):
+            limiter.acquire("sk-a")
+        assert limiter.stats()["rejected"] == 1
+
+    def test_cost_is_weighted_by_prompt_tokens(self):
+        from src.infrastructure.rate_limiter import RateLimitExceeded
+
+        limiter = self._limiter(rate=60, burst=5, tokens_per_request=1000)
+        assert limiter.request_cost(0) == 1
+        assert limiter.request_cost(4500) == 5
+
+        with patch("src.infrastructure.rate_limiter.time.time", return_value=1000.0):
+            limiter.acquire("sk-a", limiter.request_cost(4500))
+            with pytest.raises(RateLimitExceeded) as exc:
+                limiter.acquire("sk-a", limiter.request_cost(2500))
+
+        # Trois jetons manquent : trois secondes d'attente
+        assert exc.value.retry_after == 3
+
+    def test_sliding_window_counts_previous_window_pro_rata(self):
+        from src.infrastructure.rate_limiter import RateLimitExceeded
+
+        limiter = self._limiter(strategy="sliding-window", rate=4)
+        with patch("src.infrastructure.rate_limiter.time.time", return_value=1200.0):
+            for _ in range(4):
+                limiter.acquire("sk-a")
+        # À mi-fenêtre suivante, la moitié des 4 requêtes précédentes compte encore
+        with patch("src.infrastructure.rate_limiter.time.time", return_value=1290.0):
+            limiter.acquire("sk-a")
+            limiter.acquire("sk-a")
+            with pytest.raises(RateLimitExceeded) as exc:
+                limiter.acquire("sk-a")
+
+        assert exc.value.retry_after == 15
+        assert limiter.stats()["allowed"] == 6
+
+    def test_concurrent_streams_are_capped_and_released(self):
+        from src.infrastructure.rate_limiter import RateLimitExceeded
+
+        limiter = self._limiter(max_streams=2)
+        first = limiter.open_stream("sk-a")
+        limiter.open_stream("sk-a")
+        with pytest.raises(RateLimitExceeded):
+            limiter.open_stream("sk-a")
+
+        first()
+        first()  # libération idempotente
+        limiter.open_stream("sk-a")
+        assert limiter.stats()["streams_rejected"] == 1
+
+    def test_disabled_limiter_never_rejects(self):
+        limiter = self._limiter(rate=1, burst=1, max_streams=1, enabled=False)
+        for _ in range(5):
+            limiter.acquire("sk-a")
+            limiter.open_stream("sk-a")
+
+    def test_api_key_is_stored_hashed(self):
+        from src.infrastructure.rate_limiter import ApiKeyRateLimiter, MemcachedQuotaStore
+
+        client = FakeMemcached()
+        limiter = ApiKeyRateLimiter(MemcachedQuotaStore(client=client))
+        limiter.acquire("sk-secret")
+        limiter.open_stream("sk-secret")
+
+        assert client.data
+        assert not any(b"sk-secret" in key.encode() for key in client.data)
+
+
+class TestMemcachedQuotaStore:
+    """Tests pour le stockage partagé des quotas."""
+
+    def test_replicas_share_the_same_bucket(self):
+        from src.infrastructure.rate_limiter import (
+            ApiKeyRateLimiter,
+            MemcachedQuotaStore,
+            RateLimitExceeded,
+        )
+
+        client = FakeMemcached()
+        replicas = [
+            ApiKeyRateLimiter(MemcachedQuotaStore(client=client), rate=60, burst=2)
+            for _ in range(2)
+        ]
+        with patch("src.infrastructure.rate_limiter.time.time", return_value=1000.0):
+            replicas[0].acquire("sk-a")
+            replicas[1].acquire("sk-a")
+            with pytest.raises(RateLimitExceeded):
+                replicas[0].acquire("sk-a")
+
+    def test_cas_conflict_is_retried(self):
+        from src.infrastructure.rate_limiter import MemcachedQuotaStore
+
+        client = FakeMemcached()
+        store = MemcachedQuotaStore(client=client)
+        store.update("k", lambda value: (1, 60))
+        # Un autre worker écrit entre gets et cas lors de la première tentative
+        client.cas = MagicMock(side_effect=[False, True])
+
+        assert store.update("k", lambda value: ((value or 0) + 1, 60)) is True
+        assert client.cas.call_count == 2
+
+    def test_falls_back_to_memory_when_memcached_is_down(self):
+        from src.infrastructure.rate_limiter import MemcachedQuotaStore
+
+        client = MagicMock()
+        client.incr.side_effect = ConnectionError("unreachable")
+        store = MemcachedQuotaStore(client=client)
+
+        assert store.incr("k", 1, 60) == 1
+        assert store.shared is False
+        # Memcached n'est plus sollicité pendant la fenêtre de repli
+        assert store.incr("k", 1, 60) == 2
+        assert client.incr.call_count == 1
+        assert store.errors == 1
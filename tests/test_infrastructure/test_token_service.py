@@ -96,3 +96,281 @@ class TestTokenService:
         # Devrait tomber en fallback
         assert isinstance(result, int)
         assert result > 0
+
+
+class TestTokenizerRegistry:
+    """Tests pour le registre de tokenizers partagé."""
+
+    def test_model_table_built_from_domain_catalog(self):
+        """La table modèle -> encodage couvre tout le catalogue du domaine."""
+        from src.domain.models import AVAILABLE_MODELS
+        from src.infrastructure.token_service import MISTRAL_ENCODING, get_tokenizer_registry
+
+        registry = get_tokenizer_registry()
+
+        for model in AVAILABLE_MODELS:
+            assert registry.encoding_name(model)
+        assert registry.encoding_name("open-mistral-nemo") == MISTRAL_ENCODING
+        assert registry.encoding_name("gpt-4o") == "o200k_base"
+
+    def test_unknown_model_uses_default_encoding(self):
+        """Un modèle inconnu retombe sur cl100k_base."""
+        from src.infrastructure.token_service import DEFAULT_ENCODING, TokenizerRegistry
+
+        registry = TokenizerRegistry()
+
+        assert registry.encoding_name("unknown-model-123") == DEFAULT_ENCODING
+
+    @patch("src.infrastructure.token_service.tiktoken.get_encoding")
+    def test_encoding_loaded_once(self, mock_get_encoding):
+        """L'encodage n'est chargé qu'une seule fois, quel que soit le nombre d'appels."""
+        from src.infrastructure.token_service import TokenizerRegistry
+
+        mock_get_encoding.return_value.encode.return_value = [1, 2, 3]
+        registry = TokenizerRegistry(["gpt-4o"])
+
+        for _ in range(5):
+            assert registry.count("Bonjour", "gpt-4o") == 3
+
+        mock_get_encoding.assert_called_once_with("o200k_base")
+
+    @patch("src.infrastructure.token_service.tiktoken.get_encoding")
+    def test_concurrent_first_load(self, mock_get_encoding):
+        """Des threads concurrents ne déclenchent qu'un seul chargement."""
+        import threading
+        import time
+
+        from src.infrastructure.token_service import TokenizerRegistry
+
+        def slow_load(name):
+            time.sleep(0.05)
+            encoding = MagicMock()
+            encoding.encode.return_value = [1]
+            return encoding
+
+        mock_get_encoding.side_effect = slow_load
+        registry = TokenizerRegistry()
+        results = []
+
+        threads = [
+            threading.Thread(target=lambda: results.append(registry.count("x", "gpt-4")))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert results == [1] * 8
+        assert mock_get_encoding.call_count == 1
+
+    @patch("src.infrastructure.token_service.tiktoken.get_encoding")
+    def test_failed_load_is_not_cached(self, mock_get_encoding):
+        """Un échec de chargement n'empoisonne pas le registre."""
+        from src.infrastructure.token_service import TokenizerRegistry
+
+        registry = TokenizerRegistry()
+        mock_get_encoding.side_effect = [Exception("download failed"), MagicMock()]
+
+        with pytest.raises(Exception, match="download failed"):
+            registry.get_counter("cl100k_base")
+
+        assert registry.get_counter("cl100k_base") is not None
+        assert registry.loaded_encodings() == ["cl100k_base"]
+
+
+class TestTokenCountCache:
+    """Tests pour le mémo des comptes de tokens."""
+
+    def test_repeated_text_is_tokenized_once(self):
+        from src.infrastructure.token_service import TokenCountCache
+
+        cache = TokenCountCache(max_entries=8, min_chars=0)
+        counter = MagicMock(return_value=42)
+
+        assert cache.count("Tu es un assistant concis.", "cl100k_base", counter) == 42
+        assert cache.count("Tu es un assistant concis.", "cl100k_base", counter) == 42
+
+        counter.assert_called_once_with("Tu es un assistant concis.")
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["hit_rate"] == 0.5
+
+    def test_key_includes_encoding(self):
+        """Un même texte compte différemment selon l'encodage."""
+        from src.infrastructure.token_service import TokenCountCache
+
+        cache = TokenCountCache(max_entries=8, min_chars=0)
+
+        assert cache.count("Bonjour", "cl100k_base", lambda text: 2) == 2
+        assert cache.count("Bonjour", "o200k_base", lambda text: 1) == 1
+
+    def test_memory_is_bounded_and_short_texts_skip_the_cache(self):
+        from src.infrastructure.token_service import TokenCountCache
+
+        cache = TokenCountCache(max_entries=2, min_chars=5)
+        for text in ("premier texte", "deuxième texte", "troisième texte"):
+            cache.count(text, "cl100k_base", len)
+        cache.count("oui", "cl100k_base", len)
+
+        stats = cache.stats()
+        assert stats["entries"] == 2
+        assert stats["evictions"] == 1
+        assert stats["sets"] == 3
+
+    def test_batch_tokenizes_each_distinct_miss_once(self):
+        from src.infrastructure.token_service import TokenCountCache
+
+        cache = TokenCountCache(max_entries=8, min_chars=0)
+        cache.count("déjà vu", "cl100k_base", lambda text: 2)
+        batch = MagicMock(side_effect=lambda texts: [len(t) for t in texts])
+
+        counts = cache.count_many(["déjà vu", "abc", "", "abc", "abcd"], "cl100k_base", batch)
+
+        assert counts == [2, 3, 0, 3, 4]
+        batch.assert_called_once_with(["abc", "abcd"])
+
+    @patch("src.infrastructure.token_service.tiktoken.get_encoding")
+    def test_tiktoken_batch_uses_encode_batch(self, mock_get_encoding):
+        from src.infrastructure import token_service
+
+        encoding = mock_get_encoding.return_value
+        encoding.encode_batch.return_value = [[1, 2], [1, 2, 3]]
+        with (
+            patch.object(token_service, "_registry", token_service.TokenizerRegistry()),
+            patch.object(token_service, "token_count_cache", token_service.TokenCountCache()),
+        ):
+            counts = token_service.count_tokens_batch(["un", "deux"], "gpt-4")
+
+        assert counts == [2, 3]
+        encoding.encode_batch.assert_called_once_with(
+            ["un", "deux"], num_threads=token_service.TOKENIZE_THREADS
+        )
+        encoding.encode.assert_not_called()
+
+    @patch("src.infrastructure.token_service.tiktoken.get_encoding")
+    def test_calculate_token_does_not_cache_fallback_estimates(self, mock_get_encoding):
+        """Une estimation de repli (tokenizer en échec) n'est jamais mémorisée."""
+        from src.infrastructure import token_service
+
+        text = "Un prompt système partagé par des milliers de requêtes. " * 4
+        encoding = MagicMock()
+        encoding.encode.return_value = [1, 2, 3]
+        mock_get_encoding.side_effect = [Exception("download failed"), encoding]
+        with (
+            patch.object(token_service, "_registry", token_service.TokenizerRegistry()),
+            patch.object(token_service, "token_count_cache", token_service.TokenCountCache()),
+        ):
+            assert token_service.calculate_token(text, "gpt-4") == len(text) // 4
+            assert token_service.calculate_token(text, "gpt-4") == 3
+            assert token_service.calculate_token(text, "gpt-4") == 3
+
+        encoding.encode.assert_called_once_with(text)
+
+
+class TestLazyLoading:
+    """Tests pour le chargement différé des tokenizers."""
+
+    def test_import_does_not_load_tokenizer_libraries(self):
+        """Importer la Gateway ne charge ni tiktoken ni mistral_common."""
+        import subprocess
+        import sys
+
+        code = (
+            "import sys, src.routes; "
+            "print([m for m in ('tiktoken', 'mistral_common') if m in sys.modules])"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True, check=True
+        )
+
+        assert result.stdout.strip().splitlines()[-1] == "[]"
+
+    def test_prewarm_loads_tokenizers_in_background(self):
+        """Le préchauffage tourne une seule fois, dans un thread dédié."""
+        from src.infrastructure import token_service
+
+        with patch.object(token_service, "_prewarm_thread", None), patch.object(
+            token_service.get_tokenizer_registry(), "preload"
+        ) as mock_preload:
+            thread = token_service.prewarm_tokenizers()
+            token_service.wait_for_prewarm(timeout=5)
+
+            assert token_service.prewarm_tokenizers() is thread
+            assert thread.name == "tokenizer-prewarm"
+            mock_preload.assert_called_once_with()
+
+
+class TestCompletionUsageCounter:
+    """Tests pour le comptage des tokens de complétion (modes exact/deferred/estimate)."""
+
+    @patch("src.infrastructure.token_service.count_text_tokens")
+    def test_exact_mode_counts_joined_text_once(self, mock_calc):
+        """Le mode exact tokenise le texte complet une seule fois."""
+        from src.infrastructure.token_service import CompletionUsageCounter
+
+        mock_calc.return_value = 7
+        counter = CompletionUsageCounter("gpt-4o", mode="exact")
+        for chunk in ["Bon", "jour", " !"]:
+            counter.add(chunk)
+
+        assert counter.total() == 7
+        mock_calc.assert_called_once_with("Bonjour !", "gpt-4o")
+
+    def test_exact_and_deferred_modes_agree(self):
+        """Mistral : exact et deferred rapportent le même completion_tokens."""
+        from src.infrastructure.token_service import CompletionUsageCounter
+
+        chunks = ["Bonjour ", "tout le ", "monde, voici ", "une réponse."]
+        totals = []
+        for mode in ("exact", "deferred"):
+            counter = CompletionUsageCounter("mistral-medium-latest", mode=mode, batch_chars=8)
+            for chunk in chunks:
+                counter.add(chunk)
+            totals.append(counter.total())
+
+        assert totals[0] == totals[1]
+
+    @patch("src.infrastructure.token_service.count_text_tokens")
+    def test_deferred_mode_counts_batches_in_background(self, mock_count):
+        """Le mode deferred compte les lots au fil du flux et somme à la fin."""
+        from src.infrastructure.token_service import CompletionUsageCounter
+
+        mock_count.side_effect = lambda text, model: len(text)
+        counter = CompletionUsageCounter("gpt-4o", mode="deferred", batch_chars=4)
+        for chunk in ["ab ", "cd", " ef", "g"]:
+            counter.add(chunk)
+
+        assert counter.total() == 9
+        # Lots coupés avant un espace (jamais au milieu d'un mot), reliquat à la fin
+        batches = [call.args[0] for call in mock_count.call_args_list]
+        assert batches == ["ab", " cd", " efg"]
+
+    def test_deferred_batches_are_counted_without_chat_template(self):
+        """Mistral : les lots sont comptés sans gabarit de chat (BOS, [INST])."""
+        from src.infrastructure.token_service import calculate_token, count_text_tokens
+
+        model = "mistral-medium-latest"
+        text = "Bonjour tout le monde, voici une réponse."
+        whole = count_text_tokens(text, model)
+
+        assert whole < calculate_token(text, model)
+        cut = text.index(" le")
+        assert count_text_tokens(text[:cut], model) + count_text_tokens(text[cut:], model) == whole
+
+    @patch("src.infrastructure.token_service.calculate_token")
+    def test_estimate_mode_skips_tokenizer(self, mock_calc):
+        """Le mode estimate n'appelle jamais le tokenizer."""
+        from src.infrastructure.token_service import CompletionUsageCounter
+
+        counter = CompletionUsageCounter("gpt-4o", mode="estimate")
+        counter.add("x" * 40)
+
+        assert counter.total() == 10
+        mock_calc.assert_not_called()
+
+    def test_empty_stream_counts_zero(self):
+        """Aucun chunk => zéro token, quel que soit le mode."""
+        from src.infrastructure.token_service import CompletionUsageCounter
+
+        for mode in ("exact", "deferred", "estimate"):
+            assert CompletionUsageCounter("gpt-4o", mode=mode).total() == 0
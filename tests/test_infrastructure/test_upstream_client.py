@@ -0,0 +1,110 @@
+# tests/test_infrastructure/test_upstream_client.py
+"""
+Tests pour le client HTTP amont mutualisé.
+"""
+
+from unittest.mock import MagicMock, patch
+
+
+class TestUpstreamClient:
+    """Tests pour le pool HTTP partagé vers 1min.ai."""
+
+    def test_adapters_mounted_per_endpoint(self):
+        """Chaque endpoint 1min.ai est servi par son propre adaptateur keep-alive."""
+        from src.config import ONE_MIN_ASSET_API_URL, ONE_MIN_FEATURE_API_URL
+        from src.infrastructure.upstream_client import UpstreamClient
+
+        client = UpstreamClient(pool_size=4)
+
+        feature_adapter = client._session.get_adapter(f"{ONE_MIN_FEATURE_API_URL}?isStreaming=true")
+        asset_adapter = client._session.get_adapter(ONE_MIN_ASSET_API_URL)
+        download_adapter = client._session.get_adapter("https://example.com/image.png")
+
+        assert feature_adapter is client._adapters["features"]
+        assert asset_adapter is client._adapters["assets"]
+        assert download_adapter is client._adapters["downloads"]
+        assert feature_adapter._pool_maxsize == 4
+
+    def test_feature_calls_only_retry_connection_errors(self):
+        """Un POST /api/features n'est jamais rejoué après envoi (non idempotent)."""
+        from src.infrastructure.upstream_client import UpstreamClient
+
+        client = UpstreamClient()
+        retry = client._adapters["features"].max_retries
+
+        assert retry.read == 0
+        assert retry.status == 0
+        assert retry.connect > 0
+
+    @patch("src.infrastructure.upstream_client.requests.Session.post")
+    def test_default_timeouts_per_endpoint(self, mock_post):
+        """Le timeout par défaut dépend de l'endpoint et du mode stream."""
+        from src.infrastructure.upstream_client import ENDPOINT_POLICIES, UpstreamClient
+
+        mock_post.return_value.status_code = 200
+        client = UpstreamClient()
+        client.post("features", "https://api.1min.ai/api/features", json={})
+        client.post("features", "https://api.1min.ai/api/features", json={}, stream=True)
+        client.post("assets", "https://api.1min.ai/api/assets", timeout=3)
+
+        timeouts = [call.kwargs["timeout"] for call in mock_post.call_args_list]
+        assert timeouts[0] == ENDPOINT_POLICIES["features"]["timeout"]
+        assert timeouts[1] == ENDPOINT_POLICIES["features"]["stream_timeout"]
+        assert timeouts[2] == 3
+
+    def test_stats_count_hits_and_misses(self):
+        """Les hits correspondent aux requêtes servies sur une connexion réutilisée."""
+        from src.infrastructure.upstream_client import UpstreamClient
+
+        client = UpstreamClient()
+        pool = MagicMock(num_requests=10, num_connections=2)
+        client._adapters["features"].poolmanager.pools = {"api.1min.ai": pool}
+
+        stats = client.stats()
+
+        assert stats["endpoints"]["features"] == {"requests": 10, "hits": 8, "misses": 2}
+        assert stats["hits"] == 8
+        assert stats["misses"] == 2
+        assert stats["hit_rate"] == 0.8
+
+    def test_stats_endpoint(self, client):
+        """L'endpoint /stats expose les statistiques du pool."""
+        response = client.get("/stats")
+
+        assert response.status_code == 200
+        assert "upstream_pool" in response.get_json()
+
+
+class TestUpstreamCircuitBreaker:
+    """Tests pour la protection des endpoints 1min.ai par le circuit breaker."""
+
+    @patch("src.infrastructure.upstream_client.requests.Session.post")
+    def test_open_circuit_rejects_without_network_call(self, mock_post):
+        import pytest
+
+        from src.infrastructure.circuit_breaker import CircuitBreaker, CircuitOpenError
+        from src.infrastructure.upstream_client import UpstreamClient
+
+        mock_post.return_value.status_code = 503
+        client = UpstreamClient(breaker=CircuitBreaker(failure_threshold=2, timeout=30))
+
+        client.post("features", "https://api.1min.ai/api/features", json={})
+        client.post("assets", "https://api.1min.ai/api/assets")
+        with pytest.raises(CircuitOpenError) as excinfo:
+            client.post("features", "https://api.1min.ai/api/features", json={})
+
+        assert mock_post.call_count == 2
+        assert excinfo.value.retry_after > 0
+
+    @patch("src.infrastructure.upstream_client.requests.Session.get")
+    def test_external_downloads_are_not_guarded(self, mock_get):
+        from src.infrastructure.circuit_breaker import CircuitBreaker
+        from src.infrastructure.upstream_client import UpstreamClient
+
+        breaker = CircuitBreaker(failure_threshold=1, timeout=30)
+        breaker.call_failed()
+        client = UpstreamClient(breaker=breaker)
+
+        client.get("downloads", "https://example.com/image.png")
+
+        mock_get.assert_called_once()
@@ -0,0 +1,128 @@
+# tests/test_infrastructure/test_upstream_throttle.py
+"""
+Tests pour le respect des limitations de débit de 1min.ai (429, Retry-After).
+"""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+
+class TestParseRetryDelay:
+    """Tests pour la lecture des en-têtes de limitation."""
+
+    def test_retry_after_seconds_and_http_date(self):
+        from src.infrastructure.upstream_throttle import parse_retry_delay
+
+        assert parse_retry_delay(429, {"Retry-After": "12"}, now=1000.0) == 12
+        # 1er janvier 2030 00:00:30 UTC, 30 secondes après "now"
+        date = "Tue, 01 Jan 2030 00:00:30 GMT"
+        assert parse_retry_delay(429, {"Retry-After": date}, now=1893456000.0) == 30
+
+    def test_reset_header_as_epoch_or_delay(self):
+        from src.infrastructure.upstream_throttle import parse_retry_delay
+
+        assert parse_retry_delay(429, {"X-RateLimit-Reset": "1700000045"}, now=1700000000.0) == 45
+        assert parse_retry_delay(429, {"RateLimit-Reset": "7"}, now=1700000000.0) == 7
+
+    def test_429_without_headers_uses_default_delay(self):
+        from src.config import UPSTREAM_THROTTLE_DEFAULT_SECONDS
+        from src.infrastructure.upstream_throttle import parse_retry_delay
+
+        assert parse_retry_delay(429, {}) == UPSTREAM_THROTTLE_DEFAULT_SECONDS
+
+    def test_success_pauses_only_when_quota_is_exhausted(self):
+        from src.infrastructure.upstream_throttle import parse_retry_delay
+
+        exhausted = {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "20"}
+        remaining = {"X-RateLimit-Remaining": "3", "X-RateLimit-Reset": "20"}
+
+        assert parse_retry_delay(200, exhausted) == 20
+        assert parse_retry_delay(200, remaining) is None
+        assert parse_retry_delay(200, {}) is None
+
+
+class TestUpstreamThrottle:
+    """Tests pour les pauses par clé API et endpoint."""
+
+    def test_pause_applies_to_key_and_endpoint_until_window_reopens(self):
+        from src.infrastructure.upstream_throttle import UpstreamThrottle, UpstreamThrottled
+
+        throttle = UpstreamThrottle()
+        with patch("src.infrastructure.upstream_throttle.time.time", return_value=1000.0):
+            assert throttle.observe("sk-a", "features", 429, {"Retry-After": "30"}) == 30
+            with pytest.raises(UpstreamThrottled) as exc:
+                throttle.check("sk-a", "features")
+            # Autre clé, autre endpoint : non concernés
+            throttle.check("sk-b", "features")
+            throttle.check("sk-a", "conversations")
+
+        assert exc.value.retry_after == 30
+        assert exc.value.from_upstream is False
+        with patch("src.infrastructure.upstream_throttle.time.time", return_value=1030.0):
+            throttle.check("sk-a", "features")
+        assert throttle.stats()["avoided_calls"] == 1
+
+    def test_absurd_delay_is_capped(self):
+        from src.infrastructure.upstream_throttle import UpstreamThrottle
+
+        throttle = UpstreamThrottle(max_delay=60)
+        assert throttle.observe("sk-a", "features", 429, {"Retry-After": "86400"}) == 60
+
+    def test_pause_is_shared_through_memcached(self):
+        from src.infrastructure.cache_service import MemcachedCache
+        from src.infrastructure.upstream_throttle import UpstreamThrottle, UpstreamThrottled
+
+        stored = {}
+        client = MagicMock()
+        client.set.side_effect = lambda key, value, **kwargs: stored.update({key: value})
+        client.get.side_effect = lambda key: stored.get(key)
+        shared = MemcachedCache("upstream-throttle", client=client)
+        first, second = UpstreamThrottle(shared_state=shared), UpstreamThrottle(shared_state=shared)
+
+        with patch("src.infrastructure.upstream_throttle.time.time", return_value=1000.0):
+            first.observe("sk-a", "features", 429, {"Retry-After": "10"})
+            with pytest.raises(UpstreamThrottled):
+                second.check("sk-a", "features")
+
+        assert not any("sk-a" in key for key in stored)
+
+    def test_shared_state_io_runs_outside_the_lock(self):
+        from src.infrastructure.cache_service import MemcachedCache
+        from src.infrastructure.upstream_throttle import UpstreamThrottle
+
+        held = []
+        client = MagicMock()
+        client.get.side_effect = lambda key: held.append(throttle._lock.locked())
+        client.set.side_effect = lambda key, value, **kwargs: held.append(throttle._lock.locked())
+        throttle = UpstreamThrottle(shared_state=MemcachedCache("t", client=client))
+
+        throttle.check("sk-a", "features")
+        throttle.observe("sk-a", "features", 429, {"Retry-After": "10"})
+
+        assert held == [False, False]
+
+
+class TestUpstreamClientThrottle:
+    """Tests pour l'application des pauses aux appels sortants."""
+
+    @patch("src.infrastructure.upstream_client.requests.Session.post")
+    def test_429_raises_and_pauses_following_calls(self, mock_post):
+        from src.infrastructure.upstream_client import UpstreamClient
+        from src.infrastructure.upstream_throttle import UpstreamThrottle, UpstreamThrottled
+
+        mock_post.return_value.status_code = 429
+        mock_post.return_value.headers = {"Retry-After": "15"}
+        client = UpstreamClient(throttle=UpstreamThrottle())
+        headers = {"API-KEY": "sk-a"}
+
+        with pytest.raises(UpstreamThrottled) as first:
+            client.post("features", "https://api.1min.ai/api/features", json={}, headers=headers)
+        with pytest.raises(UpstreamThrottled) as second:
+            client.post("features", "https://api.1min.ai/api/features", json={}, headers=headers)
+
+        assert first.value.from_upstream is True
+        assert first.value.retry_after == 15
+        assert second.value.from_upstream is False
+        # Le second appel n'a pas atteint 1min.ai
+        assert mock_post.call_count == 1
@@ -23,7 +23,7 @@ def test_chat_completion_success_stream_mode(
         "stream": True,
     }
 
-    with patch("src.routes.requests.post") as mock_post:  # <-- Mock dans routes.py
+    with patch("src.routes.upstream.post") as mock_post:  # <-- Mock dans routes.py
         mock_response = MagicMock()
         mock_response.status_code = 200
         mock_response.iter_lines.return_value = [
@@ -84,7 +84,7 @@ def test_chat_completion_success_normal_mode(
         "stream": False,
     }
 
-    with patch("requests.post") as mock_post:
+    with patch("src.routes.upstream.post") as mock_post:
         # Mock la réponse de 1min.ai
         mock_response = MagicMock()
         mock_response.status_code = 200
@@ -116,7 +116,7 @@ def test_chat_completion_success_stream_mode(
         "stream": True,
     }
 
-    with patch("src.routes.requests.post") as mock_post:
+    with patch("src.routes.upstream.post") as mock_post:
         mock_response = MagicMock()
         mock_response.status_code = 200
         mock_response.iter_lines.return_value = [
@@ -155,7 +155,7 @@ def test_only_last_message_sent(client, auth_headers):
             "prompt_object": {"prompt": "Dernier message IMPORTANT"},
         }
 
-        with patch("src.routes.requests.post") as mock_post:
+        with patch("src.routes.upstream.post") as mock_post:
             mock_response = MagicMock()
             mock_response.status_code = 200
             mock_response.json.return_value = {
@@ -177,7 +177,7 @@ def test_error_handling_1min_api_failure(client, auth_headers, mock_orchestrator
     """Test la gestion des erreurs quand 1min.ai retourne une erreur."""
     payload = {"model": "gpt-4o", "messages": [{"role": "user", "content": "Hello"}]}
 
-    with patch("requests.post") as mock_post:
+    with patch("src.routes.upstream.post") as mock_post:
         # Mock une erreur 500 de 1min.ai
         mock_response = MagicMock()
         mock_response.status_code = 500
@@ -190,3 +190,336 @@ def test_error_handling_1min_api_failure(client, auth_headers, mock_orchestrator
         data = json.loads(response.data)
         assert "error" in data
         assert data["error"]["type"] == "api_error"
+
+
+def test_chat_completion_served_from_cache(client, auth_headers, mock_token_calculation):
+    """Une requête déterministe identique est servie depuis le cache, y compris en stream."""
+    from src.application.completion_cache import CompletionCache
+
+    payload = {"model": "gpt-4o", "messages": [{"role": "user", "content": "Ping"}]}
+    cache = CompletionCache(enabled=True)
+
+    with (
+        patch("src.routes.completion_cache", cache),
+        patch("src.routes.upstream.post") as mock_post,
+    ):
+        mock_response = MagicMock()
+        mock_response.json.return_value = {
+            "aiRecord": {"aiRecordDetail": {"resultObject": ["Pong"]}}
+        }
+        mock_post.return_value = mock_response
+
+        first = client.post("/v1/chat/completions", json=payload, headers=auth_headers)
+        second = client.post("/v1/chat/completions", json=payload, headers=auth_headers)
+        streamed = client.post(
+            "/v1/chat/completions", json=dict(payload, stream=True), headers=auth_headers
+        )
+
+        assert mock_post.call_count == 1
+        assert "X-Cache" not in first.headers
+        assert second.headers["X-Cache"] == "HIT"
+        assert json.loads(second.data)["choices"][0]["message"]["content"] == "Pong"
+        assert streamed.content_type == "text/event-stream"
+        assert '"content": "Pong"' in streamed.get_data(as_text=True)
+
+
+def test_open_circuit_returns_503(client, auth_headers, mock_token_calculation):
+    """Circuit 1min.ai ouvert : réponse 503 immédiate avec Retry-After."""
+    from src.infrastructure.circuit_breaker import CircuitOpenError
+
+    payload = {"model": "gpt-4o", "messages": [{"role": "user", "content": "Hello"}]}
+
+    with patch("src.routes.upstream.post", side_effect=CircuitOpenError("1min-api", 12)):
+        response = client.post("/v1/chat/completions", json=payload, headers=auth_headers)
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "12"
+    assert json.loads(response.data)["error"]["code"] == "service_unavailable"
+
+
+def test_metrics_endpoint_exposes_upstream_latency(client, auth_headers, mock_token_calculation):
+    """Un appel amont alimente les histogrammes servis par /metrics."""
+    from datetime import timedelta
+
+    from src.infrastructure.metrics import UPSTREAM_TTFB
+
+    payload = {"model": "gpt-4o", "messages": [{"role": "user", "content": "Hello"}]}
+    before = UPSTREAM_TTFB.count("gpt-4o", "CHAT_WITH_AI", "normal")
+
+    with patch("src.routes.upstream.post") as mock_post:
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.elapsed = timedelta(milliseconds=120)
+        mock_response.json.return_value = {"aiRecord": {"aiRecordDetail": {"resultObject": ["Ok"]}}}
+        mock_post.return_value = mock_response
+        client.post("/v1/chat/completions", json=payload, headers=auth_headers)
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.content_type.startswith("text/plain; version=0.0.4")
+    assert UPSTREAM_TTFB.count("gpt-4o", "CHAT_WITH_AI", "normal") == before + 1
+    body = response.get_data(as_text=True)
+    assert (
+        'gateway_upstream_requests_total{model="gpt-4o",type="CHAT_WITH_AI",outcome="2xx"}'
+        in body
+    )
+    assert "gateway_overhead_seconds_count" in body
+
+
+def test_rate_limiter_falls_back_to_memory_without_memcached():
+    """Sans Memcached, le démarrage n'attend pas et le limiteur bascule en mémoire."""
+    from limits.storage import MemoryStorage
+
+    from src.factory import create_app
+
+    with patch("src.factory.RATELIMIT_ENABLED", True):
+        app_instance, _, limiter = create_app()
+
+    with patch.object(limiter._storage, "incr", side_effect=ConnectionError("unreachable")):
+        response = app_instance.test_client().get("/v1/models")
+
+    assert response.status_code == 200
+    assert isinstance(limiter.limiter.storage, MemoryStorage)
+
+
+def test_tokenize_counts_strings_and_message_arrays(client, auth_headers):
+    """/v1/tokenize compte par élément, en un seul lot, sans appeler 1min.ai."""
+    payload = {
+        "model": "gpt-4o",
+        "input": [
+            "un deux trois",
+            [
+                {"role": "system", "content": "Sois bref"},
+                {"role": "user", "content": "Bonjour"},
+            ],
+        ],
+    }
+
+    with patch("src.routes.upstream.post") as mock_post, patch(
+        "src.routes.count_tokens_batch",
+        side_effect=lambda texts, model: [len(text.split()) for text in texts],
+    ) as mock_batch:
+        response = client.post("/v1/tokenize", json=payload, headers=auth_headers)
+
+    assert response.status_code == 200
+    data = response.get_json()
+    assert [item["tokens"] for item in data["data"]] == [3, 5]
+    assert data["usage"]["total_tokens"] == 8
+    mock_batch.assert_called_once_with(
+        ["un deux trois", "System: Sois bref", "User: Bonjour"], "gpt-4o"
+    )
+    mock_post.assert_not_called()
+
+
+def test_tokenize_rejects_invalid_input(client, auth_headers):
+    response = client.post("/v1/tokenize", json={"input": [42]}, headers=auth_headers)
+
+    assert response.status_code == 400
+    assert response.get_json()["error"]["param"] == "input"
+
+
+def test_models_list_is_revalidated_with_etag(client):
+    """Le corps est précalculé ; un client qui présente l'ETag reçoit un 304 vide."""
+    first = client.get("/v1/models")
+    etag = first.headers["ETag"]
+
+    assert first.status_code == 200
+    assert "max-age" in first.headers["Cache-Control"]
+
+    second = client.get("/v1/models", headers={"If-None-Match": etag})
+    assert second.status_code == 304
+    assert second.data == b""
+
+
+def test_retrieve_model_from_index(client):
+    from src.config import AVAILABLE_MODELS
+
+    model_id = AVAILABLE_MODELS[0]
+    response = client.get(f"/v1/models/{model_id}")
+
+    assert response.status_code == 200
+    assert response.get_json()["id"] == model_id
+    assert "capabilities" in response.get_json()
+    assert client.get("/v1/models/not-a-model").status_code == 404
+
+
+def test_chat_completions_rejects_exhausted_key_quota_with_retry_after(client, auth_headers):
+    """Quota de la clé atteint : 429 et Retry-After, sans orchestration ni appel amont."""
+    from src.infrastructure.rate_limiter import RateLimitExceeded
+
+    payload = {"model": "gpt-4o", "messages": [{"role": "user", "content": "Hello"}]}
+    with (
+        patch(
+            "src.routes.key_rate_limiter.acquire",
+            side_effect=RateLimitExceeded("requests", 7),
+        ),
+        patch("src.routes.resolve_conversation_context") as mock_resolve,
+    ):
+        response = client.post("/v1/chat/completions", json=payload, headers=auth_headers)
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "7"
+    assert response.get_json()["error"]["code"] == "rate_limit_exceeded"
+    mock_resolve.assert_not_called()
+
+
+def test_stream_slot_is_released_when_stream_ends(
+    client, auth_headers, mock_orchestrator, mock_token_calculation
+):
+    """Le créneau de flux de la clé est rendu une fois le flux SSE consommé."""
+    payload = {
+        "model": "gpt-4o",
+        "messages": [{"role": "user", "content": "Hello"}],
+        "stream": True,
+    }
+    release = MagicMock()
+    with (
+        patch("src.routes.upstream.post") as mock_post,
+        patch("src.routes.key_rate_limiter.open_stream", return_value=release),
+    ):
+        mock_post.return_value.status_code = 200
+        mock_post.return_value.iter_lines.return_value = [b'data: {"result": "Bonjour"}']
+        response = client.post("/v1/chat/completions", json=payload, headers=auth_headers)
+        release.assert_not_called()
+        response.get_data()
+
+    release.assert_called_once()
+
+
+def test_stream_cap_is_checked_before_orchestration(client, auth_headers):
+    """Clé au plafond de flux : 429 sans conversation ni upload chez 1min.ai."""
+    from src.infrastructure.rate_limiter import RateLimitExceeded
+
+    payload = {
+        "model": "gpt-4o",
+        "messages": [{"role": "user", "content": "Hello"}],
+        "stream": True,
+    }
+    release_upstream = MagicMock()
+    with (
+        patch(
+            "src.routes.key_rate_limiter.open_stream",
+            side_effect=RateLimitExceeded("concurrent streams", 1),
+        ),
+        patch("src.routes.upstream_limiter.acquire", return_value=release_upstream),
+        patch("src.routes.resolve_conversation_context") as mock_resolve,
+    ):
+        response = client.post("/v1/chat/completions", json=payload, headers=auth_headers)
+
+    assert response.status_code == 429
+    mock_resolve.assert_not_called()
+    release_upstream.assert_not_called()
+
+
+def test_stream_slot_is_released_when_orchestration_fails(client, auth_headers):
+    """Créneau de flux réservé avant l'orchestration, rendu si celle-ci échoue."""
+    payload = {
+        "model": "gpt-4o",
+        "messages": [{"role": "user", "content": "Hello"}],
+        "stream": True,
+    }
+    release = MagicMock()
+    with (
+        patch("src.routes.key_rate_limiter.open_stream", return_value=release),
+        patch(
+            "src.routes.resolve_conversation_context", side_effect=RuntimeError("upload failed")
+        ),
+    ):
+        response = client.post("/v1/chat/completions", json=payload, headers=auth_headers)
+
+    assert response.status_code == 500
+    release.assert_called_once()
+
+
+def test_prompt_over_context_budget_is_a_client_error(client, auth_headers):
+    """Dernier message au-delà du budget (HISTORY_MODE=pack) : 400 explicite, pas de 500."""
+    from src.domain.conversation_service import HistoryTooLong
+
+    payload = {"model": "gpt-4o", "messages": [{"role": "user", "content": "Hello"}]}
+    with patch(
+        "src.routes.resolve_conversation_context", side_effect=HistoryTooLong(9000, 8000)
+    ):
+        response = client.post("/v1/chat/completions", json=payload, headers=auth_headers)
+
+    assert response.status_code == 400
+    assert response.get_json()["error"]["code"] == "context_length_exceeded"
+
+
+def test_overloaded_gateway_sheds_completion_but_serves_health(client, auth_headers):
+    """File d'attente pleine : 503 + Retry-After immédiat ; la voie prioritaire répond."""
+    from src.infrastructure.concurrency_limiter import GatewayOverloaded
+
+    payload = {"model": "gpt-4o", "messages": [{"role": "user", "content": "Hello"}]}
+    with (
+        patch(
+            "src.routes.upstream_limiter.acquire",
+            side_effect=GatewayOverloaded("queue full", 3),
+        ),
+        patch("src.routes.resolve_conversation_context") as mock_resolve,
+    ):
+        response = client.post("/v1/chat/completions", json=payload, headers=auth_headers)
+        health = client.get("/")
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "3"
+    assert response.get_json()["error"]["code"] == "server_overloaded"
+    mock_resolve.assert_not_called()
+    assert health.status_code == 200
+
+
+def test_upstream_429_is_relayed_with_retry_after(
+    client, auth_headers, mock_orchestrator, mock_token_calculation
+):
+    """Un 429 de 1min.ai devient un 429 client avec le délai annoncé, pas une erreur 500."""
+    from src.infrastructure.upstream_throttle import upstream_throttle
+
+    payload = {"model": "gpt-4o", "messages": [{"role": "user", "content": "Hello"}]}
+    headers = dict(auth_headers)
+    headers.update({"Authorization": "Bearer throttled-key", "API-KEY": "throttled-key"})
+    with patch("src.infrastructure.upstream_client.requests.Session.post") as mock_post:
+        mock_post.return_value.status_code = 429
+        mock_post.return_value.headers = {"Retry-After": "20"}
+        first = client.post("/v1/chat/completions", json=payload, headers=headers)
+        second = client.post("/v1/chat/completions", json=payload, headers=headers)
+
+    assert first.status_code == 429
+    assert 19 <= int(first.headers["Retry-After"]) <= 20
+    assert second.status_code == 429
+    assert mock_post.call_count == 1
+    assert upstream_throttle.stats()["throttled"] >= 1
+
+
+def test_slow_stateless_completion_is_hedged(client, auth_headers, mock_token_calculation):
+    """Appel initial au-delà du p95 appris : la réponse du second appel identique l'emporte."""
+    import threading
+
+    from src.application.hedging import HedgedRequests
+
+    hedger = HedgedRequests(enabled=True, budget_percent=100, min_samples=1, min_delay=0.01)
+    hedger.observe("gpt-4o", 0.01)
+    release = threading.Event()
+
+    def answer(text):
+        response = MagicMock(status_code=200)
+        response.json.return_value = {"aiRecord": {"aiRecordDetail": {"resultObject": [text]}}}
+        return response
+
+    def post(*args, **kwargs):
+        if mock_post.call_count == 1:
+            release.wait(5)
+            return answer("Slow")
+        return answer("Fast")
+
+    payload = {"model": "gpt-4o", "messages": [{"role": "user", "content": "Hedge me"}]}
+    with (
+        patch("src.routes.hedged_requests", hedger),
+        patch("src.routes.upstream.post", side_effect=post) as mock_post,
+    ):
+        response = client.post("/v1/chat/completions", json=payload, headers=auth_headers)
+        release.set()
+
+    assert response.status_code == 200
+    assert response.get_json()["choices"][0]["message"]["content"] == "Fast"
+    assert mock_post.call_count == 2
+    assert hedger.stats()["hedge_wins"] == 1
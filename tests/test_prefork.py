@@ -0,0 +1,58 @@
+# tests/test_prefork.py
+"""
+Tests pour le mode multi-processus (pre-fork).
+"""
+
+from unittest.mock import MagicMock, patch
+
+
+class TestPerWorkerLimit:
+    """Tests pour la répartition des limites entre workers."""
+
+    def test_single_worker_keeps_the_limit(self):
+        from src.prefork import per_worker_limit
+
+        assert per_worker_limit("180 per minute") == "180 per minute"
+
+    def test_limit_is_split_between_workers(self):
+        from src.prefork import per_worker_limit
+
+        with patch("src.prefork._worker_count", 4):
+            assert per_worker_limit("180 per minute") == "45 per minute"
+            assert per_worker_limit("20 per minute") == "5 per minute"
+        with patch("src.prefork._worker_count", 8):
+            # Arrondi supérieur : jamais de limite nulle
+            assert per_worker_limit("20 per minute") == "3 per minute"
+
+    def test_route_limit_is_global_with_shared_storage(self):
+        from src.routes import _rate_limit
+
+        limiter = MagicMock()
+        with patch("src.prefork._worker_count", 4):
+            assert _rate_limit(limiter, "180 per minute")() == "180 per minute"
+
+    def test_route_limit_is_split_while_falling_back_to_memory(self):
+        """Memcached injoignable : le repli en mémoire compte par worker."""
+        from limits.storage import MemoryStorage
+
+        from src.routes import _rate_limit
+
+        limiter = MagicMock()
+        limiter.limiter.storage = MemoryStorage()
+        with patch("src.prefork._worker_count", 4):
+            assert _rate_limit(limiter, "180 per minute")() == "45 per minute"
+
+
+class TestGracefulStop:
+    """Tests pour l'arrêt d'un worker."""
+
+    def test_idle_keepalive_connections_are_not_busy(self):
+        from src.prefork import _is_busy
+
+        idle = MagicMock(requests=[], total_outbufs_len=0)
+        serving = MagicMock(requests=[object()], total_outbufs_len=0)
+        flushing = MagicMock(requests=[], total_outbufs_len=512)
+
+        assert _is_busy(idle) is False
+        assert _is_busy(serving) is True
+        assert _is_busy(flushing) is True